@@ -1,5 +1,5 @@
 from typing import AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -8,6 +8,12 @@ from sqlalchemy import select
 
 from app.core import security
 from app.core.config import settings
+from app.core.access_log import set_access_log_user
+from app.core.data_scope import DataScope, resolve_data_scope
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import principal_of
+from app.db.replica import replica_router
+from app.db.request_session import track_request_session
 from app.db.session import SessionLocal
 from app.models.sys.user import SysUser
 from app.schemas.sys.auth import TokenPayload
@@ -17,14 +23,45 @@ oauth2_scheme = OAuth2PasswordBearer(
 )
 
 
-async def get_db() -> AsyncGenerator:
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+async def get_db(request: Request) -> AsyncGenerator:
+    if replica_router.enabled and request.method not in SAFE_METHODS:
+        # Open the read-your-writes window before the write can land
+        await replica_router.mark_write(principal_of(request.scope))
     async with SessionLocal() as session:
+        track_request_session(session)
+        yield session
+
+
+async def get_read_db(
+    request: Request, db: AsyncSession = Depends(get_db)
+) -> AsyncGenerator:
+    """
+    Session for read-only handlers: a replica when configured, unless the
+    caller wrote recently. The primary session from get_db only connects
+    when used, so taking it on the replica path costs nothing.
+    """
+    if not replica_router.enabled or await replica_router.wrote_recently(
+        principal_of(request.scope)
+    ):
+        yield db
+        return
+    async with replica_router.replica_session() as session:
         yield session
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> SysUser:
+    # Repeat callers are served from the per-worker cache without any I/O
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        cached = principal_cache.get(token)
+        if cached is not None:
+            set_access_log_user(cached[1].id)
+            return cached[1]
+
     try:
         # Check Redis
         is_valid = await security.validate_login_token(token)
@@ -46,9 +83,23 @@ async def get_current_user(
 
     result = await db.execute(select(SysUser).where(SysUser.id == int(token_data.sub)))
     user = result.scalar_one_or_none()
+    # Don't hold the connection while the handler validates or exits early;
+    # its first query checks one out again
+    await db.release()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        principal_cache.set(token, token_data, user, token_exp=payload.get("exp"))
+    set_access_log_user(user.id)
     return user
+
+
+async def get_data_scope(
+    db: AsyncSession = Depends(get_db),
+    current_user: SysUser = Depends(get_current_user),
+) -> DataScope:
+    return await resolve_data_scope(db, current_user)
@@ -1,18 +1,22 @@
+import base64
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, Body, status
-from fastapi.responses import JSONResponse
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, Depends, Body, Request, status
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.api import deps
 from app.core import security
+from app.core.captcha import captcha_pool
 from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.login_limiter import login_limiter
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import client_ip
 from app.models.sys.user import SysUser
 from app.schemas.sys.auth import Login, Token, Captcha
-from app.utils.captcha import generate_captcha
 from app.db.redis import RedisManager
 from app.schemas.response import ResponseSchema, response
 from app.core.codes import ErrorCode
@@ -21,17 +25,29 @@ from app.core.codes import ErrorCode
 router = APIRouter()
 
 
+def captcha_required(failed_attempts: int) -> bool:
+    return (
+        settings.LOGIN_CAPTCHA_ENABLED
+        and failed_attempts >= settings.LOGIN_CAPTCHA_AFTER_FAILURES
+    )
+
+
 @router.post("/login", response_model=ResponseSchema[Token])
 async def login_access_token(
-    db: AsyncSession = Depends(deps.get_db), form_data: Login = Body(...)
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    form_data: Login = Body(...),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    # Check if user is locked due to too many failed attempts
-    if await security.is_user_locked(form_data.username):
+    # Check the lockout and count this attempt in one atomic call
+    # Same client resolution as the rate limiter, so a proxy isn't counted
+    attempt = await login_limiter.hit(form_data.username, client_ip(request.scope))
+    if not attempt.allowed:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
+            headers={"Retry-After": str(attempt.locked_for)},
             content=ResponseSchema(
                 code=ErrorCode.LOGIN_FAILED,
                 message="User account is locked due to too many failed login attempts. Please try again later.",
@@ -39,22 +55,41 @@ async def login_access_token(
             ).model_dump(),
         )
 
+    # Earlier failures in the window; a successful login resets the count
+    if captcha_required(attempt.attempts - 1):
+        if not form_data.captcha_key or not form_data.captcha_code:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=ResponseSchema(
+                    code=ErrorCode.CAPTCHA_REQUIRED,
+                    message="Captcha is required",
+                    result={"captcha_required": True},
+                ).model_dump(),
+            )
+        answer = await RedisManager.pop_captcha(form_data.captcha_key)
+        if answer is None or answer != form_data.captcha_code.strip():
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content=ResponseSchema(
+                    code=ErrorCode.CAPTCHA_INVALID,
+                    message="Captcha is incorrect or expired",
+                    result={"captcha_required": True},
+                ).model_dump(),
+            )
+
     result = await db.execute(
         select(SysUser).where(SysUser.username == form_data.username)
     )
     user = result.scalar_one_or_none()
 
-    if not user or not security.verify_password(
-        form_data.password, user.hashed_password
-    ):
-        # Increment login attempts
-        attempts = await security.get_login_attempts(form_data.username)
-        attempts += 1
-
-        # Check if max attempts reached
-        if attempts >= settings.MAX_LOGIN_ATTEMPTS:
-            # Lock user account
-            await security.lock_user_account(form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
+        # This attempt reached the limit, the lock is already in place
+        if attempt.locked_for:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content=ResponseSchema(
@@ -64,15 +99,12 @@ async def login_access_token(
                 ).model_dump(),
             )
 
-        # Store updated attempts count
-        await security.save_login_attempt(form_data.username, attempts)
-
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content=ResponseSchema(
                 code=ErrorCode.LOGIN_FAILED,
                 message="Incorrect username or password",
-                result=None,
+                result={"captcha_required": captcha_required(attempt.attempts)},
             ).model_dump(),
         )
 
@@ -84,14 +116,16 @@ async def login_access_token(
             ).model_dump(),
         )
 
-    # Reset login attempts on successful login
-    await security.reset_login_attempts(form_data.username)
+    # Transparently upgrade hashes made with a weaker cost or older scheme
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     token = security.create_access_token(user.id, expires_delta=access_token_expires)
 
-    # Save token to Redis
-    await security.save_login_token(token, user.id)
+    # Reset login attempts and save the token in one round-trip
+    await security.complete_login(form_data.username, token, user.id, attempt)
 
     return response(
         data={
@@ -103,27 +137,44 @@ async def login_access_token(
 
 @router.get("/captcha", response_model=ResponseSchema[Captcha])
 async def get_captcha():
-    # Run sync CPU-bound task in threadpool
-    b64_str, code = await run_in_threadpool(generate_captcha)
+    png_bytes, code = await captcha_pool.pop()
 
     # Save to redis
     captcha_key = await RedisManager.save_captcha(code)
 
     return response(
         data=Captcha(
-            captcha_base64="data:image/png;base64," + b64_str,
+            captcha_base64="data:image/png;base64,"
+            + base64.b64encode(png_bytes).decode("ascii"),
             captcha_key=captcha_key,
         )
     )
 
 
+@router.get("/captcha/image", response_class=Response)
+async def get_captcha_image():
+    """
+    Raw PNG variant of /captcha, about a third smaller than the base64 data
+    URI; the key to submit with the answer is in the X-Captcha-Key header
+    """
+    png_bytes, code = await captcha_pool.pop()
+    captcha_key = await RedisManager.save_captcha(code)
+    return Response(
+        content=png_bytes,
+        media_type="image/png",
+        headers={"X-Captcha-Key": captcha_key, "Cache-Control": "no-store"},
+    )
+
+
 @router.delete("/logout")
 async def logout(
     db: AsyncSession = Depends(deps.get_db),
     current_user: SysUser = Depends(deps.get_current_user),
+    token: str = Depends(deps.oauth2_scheme),
 ):
     """
     Logout
     """
-    await security.delete_login_token(current_user.id)
+    await security.delete_login_token(token)
+    principal_cache.invalidate_token(token)
     return response()
\ No newline at end of file
@@ -1,75 +1,88 @@
 from fastapi import APIRouter, Depends
-from api.libs.authentication import get_current_user
-from api.globals.error import ErrorCode
-from api.libs.decorations.permission import has_permission
-from api.schemes.admin.config import ConfigForm, ConfigInfo
-from conf.config_web import Config
-from api.models.sys.sys_config import SysConfig
-from api.globals.error import BackupErrorCode
-from api.services.admin.backup_service import BackupService, get_backup_service
-from api.schemes.admin.backup import BackupForm
-from typing import List
-from api.globals.response import response
-import traceback
+from fastapi.responses import FileResponse
+
+from app.api.deps import get_current_user
+from app.core.backup import (
+    BackupError,
+    backup_path,
+    backup_service,
+    delete_backup,
+    get_job,
+    list_backups,
+)
+from app.core.codes import ErrorCode
+from app.models.sys.user import SysUser as User
+from app.schemas.response import ResponseSchema, response
 
 router = APIRouter()
 
 
-@router.get("/list")
-# @has_permission("sys:backup:query")
-async def backupList(
-    keywords: str = "",
-    user: SysConfig = Depends(get_current_user),
-    backup_service: BackupService = Depends(get_backup_service),
-):
-    backup_list, total_count, error_code = await backup_service.query_backup_list(
-        keywords
-    )
-    if error_code != BackupErrorCode.SUCCESS:
-        return response(code=error_code)
-    # 恢复原始代码，因为现在response函数会自动处理枚举类型序列化
-    backup_list = [
-        ConfigInfo.model_validate(backup).model_dump() for backup in backup_list
-    ]
-    return response(result={"list": backup_list, "total": total_count})
+@router.get("/list", response_model=ResponseSchema[dict])
+async def backup_list(user: User = Depends(get_current_user)):
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    backups = list_backups()
+    return response(data={"list": backups, "total": len(backups)})
 
 
-@router.post("/add")
-# @has_permission("sys:backup:add")
-async def add_backup(
-    backup_form: BackupForm,
-    backup_service: BackupService = Depends(get_backup_service),
-):
-    error_code = await backup_service.add_backup(backup_form)
-    if error_code != BackupErrorCode.SUCCESS:
-        return response(code=error_code)
+@router.post("/add", response_model=ResponseSchema[dict])
+async def add_backup(user: User = Depends(get_current_user)):
+    """
+    启动后台备份任务, 通过 /jobs/{job_id} 查询进度
+    """
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    try:
+        job = await backup_service.start_backup()
+    except BackupError as e:
+        return response(code=e.code, message=e.message)
+    return response(data=job)
 
-    return response()
 
+@router.get("/jobs/{job_id}", response_model=ResponseSchema[dict])
+async def backup_job(job_id: str, user: User = Depends(get_current_user)):
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    job = await get_job(job_id)
+    if job is None:
+        return response(code=ErrorCode.NOT_FOUND, message="Job not found")
+    return response(data=job)
 
-@router.delete("/delete/{id}")
-@has_permission("sys:backup:delete")
-async def delete_backup(
-    id: int,
-    user: SysConfig = Depends(get_current_user),
-    backup_service: BackupService = Depends(get_backup_service),
-):
-    error_code = await backup_service.delete_backup(id, user.uid)   
-    if error_code != BackupErrorCode.SUCCESS:
-        return response(code=error_code)
 
-    return response()
+@router.get("/download/{name}")
+async def download_backup(name: str, user: User = Depends(get_current_user)):
+    """
+    流式下载备份文件, 支持 Range 断点续传
+    """
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    try:
+        path = backup_path(name)
+    except BackupError as e:
+        return response(code=e.code, message=e.message)
+    return FileResponse(path, media_type="application/zip", filename=name)
 
 
-@router.get("/download/{id}")
-@has_permission("sys:backup:download")
-async def download_backup(
-    id: int,
-    user: SysConfig = Depends(get_current_user),
-    backup_service: BackupService = Depends(get_backup_service),
-):
-    download_url, error_code = await backup_service.get_download_url(id, user.uid)
-    if error_code != BackupErrorCode.SUCCESS:
-        return response(code=error_code)
+@router.delete("/delete/{name}", response_model=ResponseSchema)
+async def remove_backup(name: str, user: User = Depends(get_current_user)):
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    try:
+        delete_backup(name)
+    except BackupError as e:
+        return response(code=e.code, message=e.message)
+    return response()
+
 
-    return response(result={"download_url": download_url})
+@router.post("/restore/{name}", response_model=ResponseSchema[dict])
+async def restore_backup(name: str, user: User = Depends(get_current_user)):
+    """
+    用备份覆盖当前数据(先校验 sha256), 后台并发导入各表
+    """
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    try:
+        job = await backup_service.start_restore(name)
+    except BackupError as e:
+        return response(code=e.code, message=e.message)
+    return response(data=job)
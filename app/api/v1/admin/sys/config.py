@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func
@@ -7,18 +7,31 @@ from app.api import deps
 from app.models.sys.config import SysConfig
 from app.models.sys.user import SysUser
 from app.schemas.sys.config import ConfigCreate, ConfigUpdate, ConfigResponse
-from app.schemas.response import ResponseSchema, PageSchema
+from app.schemas.response import (
+    ResponseSchema,
+    PageSchema,
+    CursorPageSchema,
+    keyset_paginate,
+    cursor_page,
+)
 from app.core.codes import ErrorCode
 
 router = APIRouter()
 
 
-@router.get("/list", response_model=ResponseSchema[PageSchema[ConfigResponse]])
+@router.get(
+    "/list",
+    response_model=ResponseSchema[
+        Union[PageSchema[ConfigResponse], CursorPageSchema[ConfigResponse]]
+    ],
+)
 async def get_config_list(
     keywords: Optional[str] = None,
     page_size: int = 10,
     page_number: int = 1,
-    db: AsyncSession = Depends(deps.get_db),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = (
@@ -43,8 +56,30 @@ async def get_config_list(
         )
 
     # Count
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = await db.scalar(count_stmt)
+    total = None
+    if cursor is None or with_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total = await db.scalar(count_stmt)
+
+    # Keyset paging
+    if cursor is not None:
+        try:
+            stmt = keyset_paginate(stmt, None, SysConfig.id, cursor, page_size)
+        except ValueError:
+            return ResponseSchema(
+                code=ErrorCode.INVALID_ARGUMENT, message="Invalid cursor"
+            )
+        result = await db.execute(stmt)
+        configs, next_cursor = cursor_page(
+            result.scalars().all(), page_size, key=lambda c: (c.id, c.id)
+        )
+        return ResponseSchema(
+            result=CursorPageSchema(
+                list=[ConfigResponse.model_validate(c) for c in configs],
+                next_cursor=next_cursor,
+                total=total,
+            )
+        )
 
     # Paging
     stmt = stmt.offset((page_number - 1) * page_size).limit(page_size)
@@ -4,6 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update, delete, desc
 
 from app.api import deps
+from app.core.data_scope import DataScope, data_scope_cache
+from app.db.hierarchy import dept_hierarchy
 from app.models.sys.dept import SysDept
 from app.models.sys.user import SysUser
 from app.schemas.sys.dept import (
@@ -15,6 +17,7 @@ from app.schemas.sys.dept import (
 )
 from app.schemas.response import ResponseSchema
 from app.core.codes import ErrorCode
+from app.utils.tree import build_tree, set_children_attr
 
 router = APIRouter()
 
@@ -23,13 +26,15 @@ router = APIRouter()
 async def get_dept_tree(
     name: Optional[str] = None,
     status: Optional[int] = None,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
+    data_scope: DataScope = Depends(deps.get_data_scope),
 ):
     """
     Get department tree
     """
     stmt = select(SysDept).order_by(SysDept.sort)
+    stmt = data_scope.apply(stmt, dept_column=SysDept.id)
     if name:
         stmt = stmt.where(SysDept.name.like(f"%{name}%"))
     if status is not None:
@@ -38,8 +43,9 @@ async def get_dept_tree(
     result = await db.execute(stmt)
     depts = result.scalars().all()
 
-    # Build tree
-    return ResponseSchema(result=build_dept_tree(depts, 0))
+    # Build tree, a scoped subtree is rooted at the user's own dept
+    root_id = 0 if data_scope.unrestricted else None
+    return ResponseSchema(result=build_dept_tree(depts, root_id))
 
 '''
 smpt = select(SysDept).filter(SysDept.is_deleted == False)
@@ -60,7 +66,7 @@ def build_dept_children(parent_uid: str, dept_list: List[SysDept]) -> List[DeptI
 
 @router.get("/options", response_model=ResponseSchema)
 async def get_dept_options(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
     keywords: Optional[str] = None,
 ):
@@ -118,7 +124,10 @@ async def add_dept(
         new_dept.tree_path = f"{parent.tree_path},{parent.id}"
 
     db.add(new_dept)
+    await db.flush()  # get id
+    await dept_hierarchy.insert_node(db, new_dept.id, new_dept.parent_id)
     await db.commit()
+    data_scope_cache.clear()
     return ResponseSchema(message="Success")
 
 
@@ -173,43 +182,25 @@ async def update_dept(
                 )
             new_tree_path = f"{parent.tree_path},{parent.id}"
 
-        # Update children's tree_path?
-        # Usually we need to update all children tree_paths recursively or by like query.
-        # This is complex. For now let's assume simple update.
-        # TODO: Update children tree_path if structure changes.
-        # A simple way: find all children whose tree_path starts with old_path and replace prefix.
+        if str(dept.id) in new_tree_path.split(","):
+            return ResponseSchema(
+                code=ErrorCode.INVALID_ARGUMENT,
+                message="Cannot move department under its own descendant",
+            )
 
+        # Rewrite the descendants' tree_path prefix and closure links in bulk
         old_tree_path = f"{dept.tree_path},{dept.id}"
         new_level_tree_path = f"{new_tree_path},{dept.id}"
-
-        # We need to find all descendants
-        # Descendants have tree_path like "old_tree_path,%"
-        # But wait, logic:
-        # Dept A (id 1, path 0). Child B (id 2, path 0,1). Child C (id 3, path 0,1,2).
-        # Move B to Root. B (id 2, path 0). C (id 3, path 0,2).
-        # Yes, we need to update descendants.
+        await dept_hierarchy.rewrite_tree_paths(
+            db, dept.id, old_tree_path, new_level_tree_path
+        )
+        await dept_hierarchy.move_subtree(db, dept.id, form.parent_id)
 
         dept.parent_id = form.parent_id
         dept.tree_path = new_tree_path
 
-        # Find descendants
-        descendants_stmt = select(SysDept).where(
-            SysDept.tree_path.like(f"{old_tree_path}%")
-        )
-        descendants_result = await db.execute(descendants_stmt)
-        descendants = descendants_result.scalars().all()
-
-        for child in descendants:
-            # Replace prefix
-            # child.tree_path was "0,1,2" (old_tree_path "0,1")
-            # new_level_tree_path is "0,1" (if just moved same place)
-            # wait.
-            # old descendant path starts with old_tree_path.
-            # new descendant path should starts with new_level_tree_path.
-            suffix = child.tree_path[len(old_tree_path) :]
-            child.tree_path = f"{new_level_tree_path}{suffix}"
-
     await db.commit()
+    data_scope_cache.clear()
     return ResponseSchema(message="Success")
 
 
@@ -239,17 +230,11 @@ async def delete_dept(
         )
 
     await db.execute(delete(SysDept).where(SysDept.id.in_(form.ids)))
+    await dept_hierarchy.delete_nodes(db, form.ids)
     await db.commit()
+    data_scope_cache.clear()
     return ResponseSchema(message="Success")
 
 
-def build_dept_tree(depts: List[SysDept], parent_id: int) -> List[DeptTree]:
-    tree = []
-    for dept in depts:
-        if dept.parent_id == parent_id:
-            node = DeptTree.model_validate(dept)
-            children = build_dept_tree(depts, dept.id)
-            if children:
-                node.children = children
-            tree.append(node)
-    return tree
+def build_dept_tree(depts: List[SysDept], parent_id: Optional[int]) -> List[DeptTree]:
+    return build_tree(depts, parent_id, DeptTree.model_validate, set_children_attr)
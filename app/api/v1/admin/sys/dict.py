@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.future import select
 from sqlalchemy import delete, func, or_
@@ -8,18 +8,32 @@ from app.api import deps
 from app.models.sys.user import SysUser
 from app.models.sys.dictionary import SysDict
 from app.schemas.sys.dict import DictCreate, DictUpdate, DictResponse, DeleteObjsForm
-from app.schemas.response import ResponseSchema, PageSchema, response
+from app.schemas.response import (
+    ResponseSchema,
+    PageSchema,
+    CursorPageSchema,
+    keyset_paginate,
+    cursor_page,
+    response,
+)
 from app.core.codes import ErrorCode
 
 router = APIRouter()
 
 
-@router.get("/list", response_model=ResponseSchema[PageSchema[DictResponse]])
+@router.get(
+    "/list",
+    response_model=ResponseSchema[
+        Union[PageSchema[DictResponse], CursorPageSchema[DictResponse]]
+    ],
+)
 async def list_dicts(
     keywords: Optional[str] = None,
     page_size: int = 10,
     page_number: int = 1,
-    db: AsyncSession = Depends(deps.get_db),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = select(SysDict)
@@ -32,8 +46,30 @@ async def list_dicts(
         )
 
     # Count
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = await db.scalar(count_stmt)
+    total = None
+    if cursor is None or with_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total = await db.scalar(count_stmt)
+
+    # Keyset paging
+    if cursor is not None:
+        try:
+            stmt = keyset_paginate(
+                stmt, SysDict.sort, SysDict.id, cursor, page_size, nullable=True
+            )
+        except ValueError:
+            return response(code=ErrorCode.INVALID_ARGUMENT, message="Invalid cursor")
+        result = await db.execute(stmt)
+        dicts, next_cursor = cursor_page(
+            result.scalars().all(), page_size, key=lambda d: (d.sort, d.id)
+        )
+        return response(
+            data=CursorPageSchema(
+                list=[DictResponse.model_validate(d) for d in dicts],
+                next_cursor=next_cursor,
+                total=total,
+            )
+        )
 
     # Paging
     stmt = (
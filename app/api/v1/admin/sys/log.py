@@ -1,75 +1,195 @@
-from datetime import datetime
-from typing import List
+import re
+from datetime import date, datetime, timedelta
 from fastapi import APIRouter, Depends, Query
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_read_db
+from app.core import visit_stats
+from app.core.config import settings
+from app.db import log_tables
 from app.models.sys.user import SysUser as User
-from app.api.deps import get_db as get_async_session
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import match
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.response import ResponseSchema, response
+from app.schemas.response import (
+    CursorPageSchema,
+    ResponseSchema,
+    cursor_page,
+    decode_cursor,
+    keyset_paginate,
+    response,
+)
 from app.core.codes import ErrorCode
 
-import traceback
-
 router = APIRouter()
 
 
+def _growth_rate(today: int, yesterday: int) -> float:
+    return round((today - yesterday) / yesterday, 2) if yesterday else 0.0
+
+
 @router.get("/visit-trend", response_model=ResponseSchema[dict])
 async def visit_trend(
-    title: str | None = "",
+    start_date: date | None = None,
+    end_date: date | None = None,
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    """
+    每日 PV/UV/IP 趋势, 只读汇总表和 Redis 计数, 不扫描 sys_log
+    """
     if not user.is_superuser:
-        return response(code=ErrorCode.FORBIDDEN, message="Permission denied")
-    try:
-        r = {
-            "dates": [
-                "2024-06-30",
-                "2024-07-01",
-                "2024-07-02",
-                "2024-07-03",
-                "2024-07-04",
-                "2024-07-05",
-                "2024-07-06",
-                "2024-07-07",
-            ],
-            "pvList": [1751, 5168, 4882, 5301, 4721, 4885, 1901, 1003],
-            "uvList": None,
-            "ipList": [207, 566, 565, 631, 579, 496, 222, 152],
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    if start_date > end_date:
+        return response(code=ErrorCode.INVALID_ARGUMENT, message="start_date is after end_date")
+    if (end_date - start_date).days >= settings.VISIT_TREND_MAX_DAYS:
+        return response(
+            code=ErrorCode.INVALID_ARGUMENT,
+            message=f"Date range is limited to {settings.VISIT_TREND_MAX_DAYS} days",
+        )
+
+    visits = await visit_stats.daily_visits(db, start_date, end_date)
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+    counts = [visits.get(day, visit_stats.DailyVisits()) for day in days]
+    return response(
+        data={
+            "dates": [day.isoformat() for day in days],
+            "pvList": [c.pv for c in counts],
+            "uvList": [c.uv for c in counts],
+            "ipList": [c.ip for c in counts],
         }
-        return response(data=r)
-    except Exception as e:
-        print(e)
-        print(traceback.format_exc())
-        return response(code=ErrorCode.UNKNOWN_ERROR, message="Unknown error")
+    )
 
 
 @router.get("/visit-stats", response_model=ResponseSchema[dict])
-async def visit_stats(
-    title: str | None = "",
+async def visit_stats_summary(
     user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_async_session),
+    db: AsyncSession = Depends(get_read_db),
 ):
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    visits = await visit_stats.daily_visits(db, yesterday, today)
+    today_visits = visits.get(today, visit_stats.DailyVisits())
+    yesterday_visits = visits.get(yesterday, visit_stats.DailyVisits())
     data = {
-        "todayUvCount": 374,
-        "totalUvCount": 16542,
-        "uvGrowthRate": 0.34,
-        "todayPvCount": 3766,
-        "totalPvCount": 271258,
-        "pvGrowthRate": 0.51,
+        "todayUvCount": today_visits.uv,
+        "totalUvCount": await visit_stats.total_uv(),
+        "uvGrowthRate": _growth_rate(today_visits.uv, yesterday_visits.uv),
+        "todayPvCount": today_visits.pv,
+        "totalPvCount": await visit_stats.total_pv(db, today, today_visits.pv),
+        "pvGrowthRate": _growth_rate(today_visits.pv, yesterday_visits.pv),
     }
     return response(data=data)
 
 
-@router.get("/list", response_model=ResponseSchema[dict])
+# Columns returned by /list; request_params and response_content stay in the row
+LOG_LIST_COLUMNS = (
+    "id",
+    "create_time",
+    "user_id",
+    "module",
+    "content",
+    "request_method",
+    "request_uri",
+    "method",
+    "ip",
+    "province",
+    "city",
+    "execution_time",
+    "browser",
+    "browser_version",
+    "os",
+    "status_code",
+)
+
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+
+def fulltext_query(keywords: str) -> str | None:
+    """
+    Boolean mode query requiring every keyword; operator characters typed by
+    the user are dropped so they can't change the query, and single
+    characters are skipped since the ngram index never matches them
+    """
+    terms = [term for term in _BOOLEAN_OPERATORS.sub(" ", keywords).split() if len(term) > 1]
+    return " ".join(f'+"{term}"' for term in terms) or None
+
+
+def parse_date_range(date_range: list[str] | None) -> tuple[date, date]:
+    if date_range and len(date_range) == 2:
+        start, end = (datetime.strptime(value, "%Y-%m-%d").date() for value in date_range)
+        if start > end:
+            raise ValueError("start is after end")
+        return start, end
+    end = date.today()
+    return end - timedelta(days=settings.LOG_LIST_DEFAULT_DAYS - 1), end
+
+
+@router.get("/list", response_model=ResponseSchema[CursorPageSchema[dict]])
 async def log_list(
     keywords: str | None = "",
     date_range: list[str] | None = Query(
         default=None, description="例如 ?date_range=2025-07-01&date_range=2025-08-15"
     ),
-    page_number: int = 1,
-    page_size: int = 20,
+    request_uri: str | None = None,
+    user_id: int | None = None,
+    cursor: str | None = None,
+    page_size: int = Query(20, ge=1, le=100),
     user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    # 简化实现，返回空列表
-    return response(data={"list": [], "total": 0})
+    """
+    请求日志查询, 按 (create_time, id) 倒序 keyset 分页
+
+    只查询 date_range 覆盖的月表(默认最近 LOG_LIST_DEFAULT_DAYS 天), 从最新的月份
+    开始, 取满一页即停止; keywords 走 content 全文索引
+    """
+    if not user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    try:
+        start, end = parse_date_range(date_range)
+        position = decode_cursor(cursor)
+        # Well-formed cursors from other lists carry other sort values
+        if position is not None and not isinstance(position[0], datetime):
+            raise ValueError("Invalid cursor")
+    except ValueError:
+        return response(code=ErrorCode.INVALID_ARGUMENT, message="Invalid date_range or cursor")
+
+    start_time = datetime.combine(start, datetime.min.time())
+    end_time = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    if position is not None:
+        # Months after the cursor were already paged through
+        end_time = min(end_time, position[0] + timedelta(microseconds=1))
+    months = await log_tables.existing_log_months(
+        db, log_tables.months_between(start_time.date(), end_time.date())
+    )
+    against = fulltext_query(keywords) if keywords else None
+
+    rows = []
+    for month in months:
+        table = log_tables.log_table(month)
+        stmt = select(*(table.c[name] for name in LOG_LIST_COLUMNS)).where(
+            table.c.create_time >= start_time, table.c.create_time < end_time
+        )
+        if against:
+            stmt = stmt.where(match(table.c.content, against=against).in_boolean_mode())
+        if request_uri:
+            stmt = stmt.where(table.c.request_uri == request_uri)
+        if user_id is not None:
+            stmt = stmt.where(table.c.user_id == user_id)
+        stmt = keyset_paginate(
+            stmt, table.c.create_time, table.c.id, cursor, page_size - len(rows), descending=True
+        )
+        rows.extend((await db.execute(stmt)).mappings().all())
+        if len(rows) > page_size:
+            break
+
+    page, next_cursor = cursor_page(
+        rows, page_size, key=lambda row: (row["create_time"], row["id"])
+    )
+    return response(
+        data=CursorPageSchema(list=[dict(row) for row in page], next_cursor=next_cursor)
+    )
@@ -1,8 +1,10 @@
 from typing import List, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, desc, distinct
+from sqlalchemy import select, update, delete, desc, distinct, inspect
 from app.api import deps
+from app.core import perm_bundle, route_cache
+from app.db.hierarchy import menu_hierarchy
 from app.globals.constants import ROOT_ROUTER_PARENT_ID
 from app.globals.enum import MenuType
 from app.models.sys.menu import SysMenu, SysRoleMenu
@@ -10,6 +12,7 @@ from app.models.sys.role import SysRole
 from app.models.sys.user import SysUser, SysUserRoleRef
 from app.schemas.sys.menu import MenuCreate, MenuUpdate, MenuResponse, MenuTree
 from app.schemas.response import ResponseSchema
+from app.utils.tree import build_tree
 from app.core.codes import ErrorCode
 from pydantic import BaseModel
 from app.globals.constants import ROOT_ROUTER_PARENT_ID
@@ -24,7 +27,7 @@ class DeleteMenuForm(BaseModel):
 @router.get("/list", response_model=ResponseSchema)
 async def menu_list(
     keywords: str = None,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = select(SysMenu).order_by(SysMenu.sort)
@@ -57,8 +60,12 @@ async def add_menu(
         new_menu.tree_path = f"{parent.tree_path},{parent.id}"
 
     db.add(new_menu)
+    await db.flush()  # get id
+    await menu_hierarchy.insert_node(db, new_menu.id, new_menu.parent_id)
     await db.commit()
     await db.refresh(new_menu)
+    await perm_bundle.bump_perm_version()
+    await route_cache.bump_menu_version()
     return ResponseSchema(
         message="Success", result=MenuResponse.model_validate(new_menu).model_dump()
     )
@@ -99,35 +106,23 @@ async def update_menu(
                 )
             new_tree_path = f"{parent.tree_path},{parent.id}"
 
-        menu.tree_path = new_tree_path
+        if str(menu.id) in new_tree_path.split(","):
+            return ResponseSchema(
+                code=ErrorCode.INVALID_ARGUMENT,
+                message="Cannot move menu under its own descendant",
+            )
 
-        # Update children tree paths
-        # We need to match precise children constraints to avoid updating unrelated paths
-        # Old tree path: "0,1" -> Children start with "0,1,"
-        search_path = f"{old_tree_path},{menu.id}"
+        menu.tree_path = new_tree_path
 
-        descendants_stmt = select(SysMenu).where(
-            SysMenu.tree_path.like(f"{search_path}%")
+        # Rewrite the descendants' tree_path prefix and closure links in bulk
+        await menu_hierarchy.rewrite_tree_paths(
+            db, menu.id, f"{old_tree_path},{menu.id}", f"{new_tree_path},{menu.id}"
         )
-        descendants_result = await db.execute(descendants_stmt)
-        descendants = descendants_result.scalars().all()
-
-        new_level_tree_path = f"{new_tree_path},{menu.id}"
-
-        for child in descendants:
-            # suffix includes the comma separator usually if we slice correctly
-            # child.tree_path = "0,1,5" -> suffix (len("0,1")) -> ",5"
-            suffix = child.tree_path[len(search_path) :]
-            # new path = "0,2,5" (if moved to 2) -> "0,2" + ",5" -> wait.
-            # search_path included menu.id.
-            # "0,1,5" (menu is 5). Child is 6 ("0,1,5,6").
-            # search_path "0,1,5". len=5.
-            # child path "0,1,5,6". suffix ",6".
-            # new_level_tree_path "0,2,5".
-            # child new path "0,2,5,6".
-            child.tree_path = f"{new_level_tree_path}{suffix}"
+        await menu_hierarchy.move_subtree(db, menu.id, form.parent_id)
 
     await db.commit()
+    await perm_bundle.bump_perm_version()
+    await route_cache.bump_menu_version()
     return ResponseSchema(message="Success")
 
 
@@ -146,64 +141,73 @@ async def delete_menu(
 
     await db.execute(delete(SysMenu).where(SysMenu.id == form.uid))
     await db.execute(delete(SysRoleMenu).where(SysRoleMenu.menu_id == form.uid))
+    await menu_hierarchy.delete_nodes(db, [form.uid])
 
     await db.commit()
+    await perm_bundle.bump_perm_version()
+    await route_cache.bump_menu_version()
     return ResponseSchema(message="Success")
 
 
+_MENU_FIELDS = [attr.key for attr in inspect(SysMenu).column_attrs]
+
+
+def menu_to_dict(menu: SysMenu) -> dict:
+    return {key: getattr(menu, key) for key in _MENU_FIELDS}
+
+
+def menu_to_route(menu: SysMenu) -> dict:
+    route = {
+        "name": menu.name,
+        "path": menu.route_path,
+        "component": menu.component,
+        "type": menu.type,
+        "meta": {
+            "title": menu.name,
+            "icon": menu.icon,
+            "hidden": not menu.visible,
+            "keepAlive": True if menu.keep_alive == 1 else False,
+            "alwaysShow": True if menu.always_show == 1 else False,
+        },
+    }
+    if menu.type == MenuType.CATALOG:  # Catalog
+        route["redirect"] = menu.redirect
+    return route
+
+
 def build_menu_tree(menus: List[SysMenu], parent_id: int) -> List[dict]:
-    tree = []
-    for menu in menus:
-        if menu.parent_id == parent_id and menu.type != MenuType.BUTTON:
-            # Convert menu to dict using vars() and exclude private attributes
-            menu_dict = {
-                key: value
-                for key, value in vars(menu).items()
-                if not key.startswith("_")
-            }
-            # Find children
-            children = build_menu_tree(menus, menu.id)
-            if children:
-                menu_dict["children"] = children
-            tree.append(menu_dict)
-    return tree
+    return build_tree(
+        menus,
+        parent_id,
+        menu_to_dict,
+        include=lambda menu: menu.type != MenuType.BUTTON,
+    )
 
 
 def build_route_tree(menus: List[SysMenu], parent_id: int) -> List[dict]:
-    tree = []
-    for menu in menus:
-        if menu.parent_id == parent_id:
-            route = {
-                "name": menu.name,
-                "path": menu.route_path,
-                "component": menu.component,
-                "type": menu.type,
-                "meta": {
-                    "title": menu.name,
-                    "icon": menu.icon,
-                    "hidden": not menu.visible,
-                    "keepAlive": True if menu.keep_alive == 1 else False,
-                    "alwaysShow": True if menu.always_show == 1 else False,
-                },
-            }
-            if menu.type == MenuType.CATALOG:  # Catalog
-                route["redirect"] = menu.redirect
-            children = build_route_tree(menus, menu.id)
-            if children:
-                route["children"] = children
-
-            tree.append(route)
-    return tree
+    return build_tree(menus, parent_id, menu_to_route)
 
 
 @router.get("/routes", response_model=ResponseSchema)
 async def get_current_user_routes(
+    # Not routed to replicas: a miss here fills the shared route cache for
+    # the current menu version, and a lagging replica would pin a stale tree
     db: AsyncSession = Depends(deps.get_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     """
     Get routes for current user
     """
+    if current_user.is_superuser:
+        role_ids = []
+    else:
+        role_ids = (await perm_bundle.get_perm_bundle(db, current_user))["role_ids"]
+    cache_key = route_cache.role_key(role_ids, current_user.is_superuser)
+
+    routes, version = await route_cache.get_routes(cache_key)
+    if routes is not None:
+        return ResponseSchema(result=routes)
+
     if current_user.is_superuser:
         stmt = (
             select(SysMenu)
@@ -211,19 +215,9 @@ async def get_current_user_routes(
             .order_by(SysMenu.sort)
         )
     else:
-        # Check user roles
-        # SysUserRoleRef: user_id, role_id
-        # SysRoleMenu: role_id, menu_id
-        # We need menus where id in (select menu_id from role_menu where role_id in (select role_id from user_role where user_id = current_user.id))
-
-        # Subquery for role ids
-        sub_roles_ids = select(SysUserRoleRef.role_id).where(
-            SysUserRoleRef.user_id == current_user.id
-        )
-
         # Subquery for menu ids
         sub_menus = select(SysRoleMenu.menu_id).where(
-            SysRoleMenu.role_id.in_(sub_roles_ids)
+            SysRoleMenu.role_id.in_(role_ids)
         )
 
         stmt = (
@@ -235,7 +229,9 @@ async def get_current_user_routes(
     result = await db.execute(stmt)
     menus = result.scalars().all()
 
-    return ResponseSchema(result=build_route_tree(menus, ROOT_ROUTER_PARENT_ID))
+    routes = build_route_tree(menus, ROOT_ROUTER_PARENT_ID)
+    await route_cache.save_routes(cache_key, version, routes)
+    return ResponseSchema(result=routes)
 
 
 # @router.get("/options", response_model=ResponseSchema)
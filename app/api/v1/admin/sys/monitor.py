@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.core.access_log import access_log_writer
+from app.core.codes import ErrorCode
+from app.core.hashing import password_hasher
+from app.db.engine import pool_stats
+from app.db.request_session import hold_time_stats
+from app.db.session import engine
+from app.models.sys.user import SysUser
+from app.schemas.response import ResponseSchema, response
+
+router = APIRouter()
+
+
+@router.get("/password-hasher", response_model=ResponseSchema)
+async def password_hasher_stats(
+    current_user: SysUser = Depends(deps.get_current_user),
+):
+    if not current_user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    return ResponseSchema(result=password_hasher.stats())
+
+
+@router.get("/db-pool", response_model=ResponseSchema)
+async def db_pool_stats(
+    current_user: SysUser = Depends(deps.get_current_user),
+):
+    if not current_user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    return ResponseSchema(
+        result={**pool_stats(engine), "connection_hold": hold_time_stats.snapshot()}
+    )
+
+
+@router.get("/access-log", response_model=ResponseSchema)
+async def access_log_stats(
+    current_user: SysUser = Depends(deps.get_current_user),
+):
+    if not current_user.is_superuser:
+        return response(code=ErrorCode.PERMISSION_DENIED, message="Permission denied")
+    return ResponseSchema(result=access_log_writer.stats())
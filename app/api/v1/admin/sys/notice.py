@@ -1,10 +1,13 @@
-from typing import List, Any
+from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete, desc, and_, or_
+from sqlalchemy import select, insert, update, delete, desc, and_, or_, func, literal, true
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 
 from app.api import deps
-from app.models.sys.notice import SysNotice, SysUserNotice
+from app.core import notice_counter
+from app.core.data_scope import DataScope
+from app.models.sys.notice import SysNotice, SysNoticeTarget, SysUserNotice
 from app.models.sys.user import SysUser
 from app.schemas.sys.notice import (
     NoticeCreate,
@@ -23,37 +26,184 @@ class DeleteObjsForm(BaseModel):
     ids: List[int]
 
 
+# List views skip the Text content column, only detail loads it
+_LIST_COLUMNS = [c for c in SysNotice.__table__.columns if c.key != "content"]
+
+
+def parse_target_user_ids(target_user_ids_str: Optional[str]) -> List[int]:
+    if not target_user_ids_str:
+        return []
+    return sorted(
+        {int(uid) for uid in target_user_ids_str.split(",") if uid.strip().isdigit()}
+    )
+
+
+async def sync_notice_targets(db: AsyncSession, notice: SysNotice) -> None:
+    """
+    Mirror target_user_ids_str into sys_notice_target
+    """
+    await db.execute(
+        delete(SysNoticeTarget).where(SysNoticeTarget.notice_id == notice.id)
+    )
+    if notice.target_type == 0:
+        return
+    user_ids = parse_target_user_ids(notice.target_user_ids_str)
+    if user_ids:
+        await db.execute(
+            insert(SysNoticeTarget),
+            [{"notice_id": notice.id, "user_id": uid} for uid in user_ids],
+        )
+
+
+def visible_to(user_id: int):
+    """
+    Notices targeting all users or explicitly this user
+    """
+    return or_(
+        SysNotice.target_type == 0,
+        SysNotice.id.in_(
+            select(SysNoticeTarget.notice_id).where(SysNoticeTarget.user_id == user_id)
+        ),
+    )
+
+
+async def fetch_notice_page(db: AsyncSession, stmt, page: int, size: int) -> PageSchema:
+    count_stmt = select(func.count()).select_from(stmt.subquery())
+    total = await db.scalar(count_stmt) or 0
+
+    result = await db.execute(stmt.offset((page - 1) * size).limit(size))
+    return PageSchema(
+        list=[
+            NoticeResponse.model_validate(dict(row)).model_dump()
+            for row in result.mappings().all()
+        ],
+        total=total,
+    )
+
+
+async def mark_all_read(db: AsyncSession, user_id: int) -> int:
+    """
+    Mark every published notice visible to the user as read in one statement
+
+    INSERT ... SELECT over the visible notices, relying on the
+    (notice_id, user_id) unique key to turn existing rows into updates.
+    Rows that were already read keep their original read_time.
+    """
+    visible = select(
+        SysNotice.id, literal(user_id), true(), func.now()
+    ).where(SysNotice.publish_status == 1, visible_to(user_id))
+    stmt = mysql_insert(SysUserNotice).from_select(
+        ["notice_id", "user_id", "is_read", "read_time"], visible
+    )
+    # MySQL applies assignments left to right, so read_time must be set
+    # while is_read still holds the old value
+    stmt = stmt.on_duplicate_key_update(
+        [
+            (
+                "read_time",
+                func.if_(
+                    SysUserNotice.is_read, SysUserNotice.read_time, stmt.inserted.read_time
+                ),
+            ),
+            ("is_read", true()),
+            ("update_time", func.now()),
+        ]
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+def is_visible(notice: SysNotice, user_id: int) -> bool:
+    return notice.target_type == 0 or user_id in parse_target_user_ids(
+        notice.target_user_ids_str
+    )
+
+
+async def notice_audience(db: AsyncSession, notice: SysNotice) -> List[int]:
+    """
+    Ids of the users a notice is delivered to
+    """
+    if notice.target_type != 0:
+        return parse_target_user_ids(notice.target_user_ids_str)
+    return list((await db.scalars(select(SysUser.id))).all())
+
+
+async def published_audience(db: AsyncSession, notice: SysNotice) -> set:
+    if notice.publish_status != 1:
+        return set()
+    return set(await notice_audience(db, notice))
+
+
+async def count_unread(db: AsyncSession, user_id: int) -> int:
+    read = select(SysUserNotice.id).where(
+        SysUserNotice.notice_id == SysNotice.id,
+        SysUserNotice.user_id == user_id,
+        SysUserNotice.is_read == True,
+    )
+    stmt = select(func.count(SysNotice.id)).where(
+        SysNotice.publish_status == 1, visible_to(user_id), ~read.exists()
+    )
+    return await db.scalar(stmt) or 0
+
+
+async def count_all_unread(db: AsyncSession) -> Dict[int, int]:
+    """
+    Unread count of every user, in a fixed number of grouped queries
+    """
+    published = SysNotice.publish_status == 1
+    broadcast = await db.scalar(
+        select(func.count(SysNotice.id)).where(published, SysNotice.target_type == 0)
+    ) or 0
+    targeted = await db.execute(
+        select(SysNoticeTarget.user_id, func.count())
+        .join(SysNotice, SysNotice.id == SysNoticeTarget.notice_id)
+        .where(published, SysNotice.target_type != 0)
+        .group_by(SysNoticeTarget.user_id)
+    )
+    # Only reads of notices the user can still see count against the total
+    target_match = (
+        select(SysNoticeTarget.id)
+        .where(
+            SysNoticeTarget.notice_id == SysNotice.id,
+            SysNoticeTarget.user_id == SysUserNotice.user_id,
+        )
+        .exists()
+    )
+    read = await db.execute(
+        select(SysUserNotice.user_id, func.count())
+        .join(SysNotice, SysNotice.id == SysUserNotice.notice_id)
+        .where(
+            published,
+            SysUserNotice.is_read == True,
+            or_(SysNotice.target_type == 0, target_match),
+        )
+        .group_by(SysUserNotice.user_id)
+    )
+    targeted_counts = dict(targeted.all())
+    read_counts = dict(read.all())
+
+    user_ids = (await db.scalars(select(SysUser.id))).all()
+    return {
+        uid: max(broadcast + targeted_counts.get(uid, 0) - read_counts.get(uid, 0), 0)
+        for uid in user_ids
+    }
+
+
 @router.get("/list", response_model=ResponseSchema[PageSchema[NoticeResponse]])
 async def notice_list(
     title: str = None,
     page: int = 1,
     size: int = 20,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
+    data_scope: DataScope = Depends(deps.get_data_scope),
 ):
-    stmt = select(SysNotice).order_by(desc(SysNotice.create_time))
+    stmt = select(*_LIST_COLUMNS).order_by(desc(SysNotice.create_time))
+    stmt = data_scope.apply(stmt, owner_column=SysNotice.publisher_id)
     if title:
         stmt = stmt.where(SysNotice.title.like(f"%{title}%"))
 
-    result = await db.execute(stmt)
-    all_notices = result.scalars().all()
-    total = len(all_notices)
-
-    start = (page - 1) * size
-    end = start + size
-    notices = all_notices[start:end]
-
-    # Enrich with publisher info? Original did.
-    # But usually frontend just needs simple list.
-    # Original did: fetch publisher name.
-    # We can join with SysUser if needed, but let's stick to simple return first.
-
-    return ResponseSchema(
-        result=PageSchema(
-            list=[NoticeResponse.model_validate(n).model_dump() for n in notices],
-            total=total,
-        )
-    )
+    return ResponseSchema(result=await fetch_notice_page(db, stmt, page, size))
 
 
 @router.post("/add", response_model=ResponseSchema)
@@ -66,8 +216,16 @@ async def add_notice(
     new_notice.publisher_id = current_user.id
     new_notice.create_by = current_user.username
 
+    if new_notice.publish_status == 1 and new_notice.publish_time is None:
+        new_notice.publish_time = datetime.now()
+
     db.add(new_notice)
+    await db.flush()  # get id
+    await sync_notice_targets(db, new_notice)
+    # Created as published: same fan-out as publish_notice
+    audience = list(await published_audience(db, new_notice))
     await db.commit()
+    await notice_counter.adjust_unread(audience, 1)
     await db.refresh(new_notice)
     return ResponseSchema(result=NoticeResponse.model_validate(new_notice).model_dump())
 
@@ -84,11 +242,17 @@ async def update_notice(
             code=ErrorCode.NOTICE_NOT_FOUND, message="Notice not found"
         )
 
+    old_audience = await published_audience(db, notice)
+
     for key, value in form.model_dump().items():
         setattr(notice, key, value)
 
     notice.update_by = current_user.username
+    await sync_notice_targets(db, notice)
+    new_audience = await published_audience(db, notice)
     await db.commit()
+    # Users who keep seeing the notice keep their count
+    await notice_counter.invalidate_unread(old_audience ^ new_audience)
     return ResponseSchema(message="Success")
 
 
@@ -98,10 +262,23 @@ async def delete_notices(
     db: AsyncSession = Depends(deps.get_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
+    published = (
+        await db.scalars(
+            select(SysNotice).where(SysNotice.id.in_(form.ids), SysNotice.publish_status == 1)
+        )
+    ).all()
+    audience = set()
+    for notice in published:
+        audience.update(await notice_audience(db, notice))
+
     await db.execute(delete(SysNotice).where(SysNotice.id.in_(form.ids)))
     # Delete user associations?
     await db.execute(delete(SysUserNotice).where(SysUserNotice.notice_id.in_(form.ids)))
+    await db.execute(
+        delete(SysNoticeTarget).where(SysNoticeTarget.notice_id.in_(form.ids))
+    )
     await db.commit()
+    await notice_counter.invalidate_unread(audience)
     return ResponseSchema(message="Success")
 
 
@@ -128,6 +305,7 @@ async def notice_detail(
         )
     )
     user_notice = await db.scalar(stmt)
+    newly_read = not user_notice or not user_notice.is_read
     if not user_notice:
         user_notice = SysUserNotice(
             notice_id=notice_id,
@@ -142,6 +320,13 @@ async def notice_detail(
         user_notice.read_time = datetime.now()
         await db.commit()
 
+    if (
+        newly_read
+        and notice.publish_status == 1
+        and is_visible(notice, current_user.id)
+    ):
+        await notice_counter.adjust_unread([current_user.id], -1)
+
     return ResponseSchema(
         result={"result": NoticeResponse.model_validate(notice).model_dump()}
     )
@@ -159,10 +344,14 @@ async def publish_notice(
             code=ErrorCode.NOTICE_NOT_FOUND, message="Notice not found"
         )
 
+    newly_published = notice.publish_status != 1
     notice.publish_status = 1  # Published
     notice.publish_time = datetime.now()
     notice.update_by = current_user.username
+    audience = await notice_audience(db, notice) if newly_published else []
     await db.commit()
+    # Fan out +1 to every recipient's counter
+    await notice_counter.adjust_unread(audience, 1)
     return ResponseSchema(message="Success")
 
 
@@ -178,10 +367,14 @@ async def revoke_notice(
             code=ErrorCode.NOTICE_NOT_FOUND, message="Notice not found"
         )
 
+    was_published = notice.publish_status == 1
     notice.publish_status = 0  # Draft/Revoked
     notice.revoke_time = datetime.now()
     notice.update_by = current_user.username
+    audience = await notice_audience(db, notice) if was_published else []
     await db.commit()
+    # Whether each recipient had read it is unknown here, recount lazily
+    await notice_counter.invalidate_unread(audience)
     return ResponseSchema(message="Success")
 
 
@@ -189,55 +382,15 @@ async def revoke_notice(
 async def my_notice_list(
     page: int = 1,
     size: int = 20,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
-    # Logic: Notices that target this user valid.
-    # target_type: 0 all, 1 specific.
-    # If specific, check target_user_ids_str contains user_id?
-    # Or rely on SysUserNotice entries?
-    # Usually we query SysNotice where (target_type=All OR (target_type=Specific AND user_id in target_ids))
-    # AND status=Published.
-
-    # Original `notice.py` used `query_my_notice_list`.
-    # Let's simple implementation:
-    # Select * from sys_notice where publish_status=1
-    # Filter by user?
-
-    # Since checking string `target_user_ids_str` in SQL is messy (`FIND_IN_SET` or like `%,id,%`),
-    # and we have `SysUserNotice` ... wait, `SysUserNotice` usually tracks read status.
-
-    # Let's assume `target_user_ids_str` approach for simplified RBAC matching.
-    # Better to fetch all published notices and filter in python if simplified.
-
     stmt = (
-        select(SysNotice)
-        .where(SysNotice.publish_status == 1)
+        select(*_LIST_COLUMNS)
+        .where(SysNotice.publish_status == 1, visible_to(current_user.id))
         .order_by(desc(SysNotice.publish_time))
     )
-    result = await db.execute(stmt)
-    all_notices = result.scalars().all()
-
-    valid_notices = []
-    for notice in all_notices:
-        if notice.target_type == 0:  # All
-            valid_notices.append(notice)
-        elif notice.target_user_ids_str:
-            target_ids = notice.target_user_ids_str.split(",")
-            if str(current_user.id) in target_ids:
-                valid_notices.append(notice)
-
-    total = len(valid_notices)
-    start = (page - 1) * size
-    end = start + size
-    ret_notices = valid_notices[start:end]
-
-    return ResponseSchema(
-        result=PageSchema(
-            list=[NoticeResponse.model_validate(n).model_dump() for n in ret_notices],
-            total=total,
-        )
-    )
+    return ResponseSchema(result=await fetch_notice_page(db, stmt, page, size))
 
 
 @router.post("/allRead", response_model=ResponseSchema)
@@ -245,49 +398,19 @@ async def read_all_notices(
     db: AsyncSession = Depends(deps.get_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
-    # Mark all valid notices as read for this user.
-    # Find all published notices effective for this user.
-    # For each, ensure SysUserNotice exists and is_read=True.
-
-    # Reuse my_list logic properly?
-    # Simple way: Select all published notices where target matches.
-    # For each, update/insert SysUserNotice.
-
-    # This might be heavy if many notices.
-    # Let's do it simply.
-
-    stmt = select(SysNotice).where(SysNotice.publish_status == 1)
-    result = await db.execute(stmt)
-    all_notices = result.scalars().all()
-
-    for notice in all_notices:
-        is_target = False
-        if notice.target_type == 0:
-            is_target = True
-        elif notice.target_user_ids_str and str(
-            current_user.id
-        ) in notice.target_user_ids_str.split(","):
-            is_target = True
-
-        if is_target:
-            stmt = select(SysUserNotice).where(
-                and_(
-                    SysUserNotice.notice_id == notice.id,
-                    SysUserNotice.user_id == current_user.id,
-                )
-            )
-            un = await db.scalar(stmt)
-            if not un:
-                un = SysUserNotice(
-                    notice_id=notice.id,
-                    user_id=current_user.id,
-                    is_read=True,
-                    read_time=datetime.now(),
-                )
-                db.add(un)
-            elif not un.is_read:
-                un.is_read = True
-                un.read_time = datetime.now()
-
+    await mark_all_read(db, current_user.id)
     await db.commit()
+    await notice_counter.set_unread(current_user.id, 0)
     return ResponseSchema(message="Success")
+
+
+@router.get("/unread-count", response_model=ResponseSchema)
+async def unread_count(
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: SysUser = Depends(deps.get_current_user),
+):
+    count = await notice_counter.get_unread(current_user.id)
+    if count is None:
+        count = await count_unread(db, current_user.id)
+        await notice_counter.set_unread(current_user.id, count)
+    return ResponseSchema(result={"count": count})
@@ -1,16 +1,23 @@
-from typing import List, Any
+from typing import List, Any, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert, update, delete, desc, func
 
 from app.api import deps
+from app.core import perm_bundle, route_cache
 from app.models.sys.role import SysRole
 from app.models.sys.menu import SysRoleMenu, SysMenu
 from app.models.sys.user import SysUser
 
 # from app.models.sys.user import SysUser as User # Avoid alias confusion
 from app.schemas.sys.role import RoleCreate, RoleUpdate, RoleResponse, DeleteObjsForm
-from app.schemas.response import ResponseSchema, PageSchema
+from app.schemas.response import (
+    ResponseSchema,
+    PageSchema,
+    CursorPageSchema,
+    keyset_paginate,
+    cursor_page,
+)
 from app.core.codes import ErrorCode
 from pydantic import BaseModel
 
@@ -21,13 +28,20 @@ class RoleAssignPermsForm(BaseModel):
     menu_ids: List[int]
 
 
-@router.get("/list", response_model=ResponseSchema[PageSchema[RoleResponse]])
+@router.get(
+    "/list",
+    response_model=ResponseSchema[
+        Union[PageSchema[RoleResponse], CursorPageSchema[RoleResponse]]
+    ],
+)
 async def role_list(
     page: int = 1,
     size: int = 20,
     name: str = None,
     status: int = None,
-    db: AsyncSession = Depends(deps.get_db),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = select(SysRole).order_by(desc(SysRole.create_time))
@@ -37,8 +51,38 @@ async def role_list(
         stmt = stmt.where(SysRole.status == status)
 
     # Count query
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = await db.scalar(count_stmt) or 0
+    total = None
+    if cursor is None or with_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total = await db.scalar(count_stmt) or 0
+
+    # Keyset pagination
+    if cursor is not None:
+        try:
+            stmt = keyset_paginate(
+                stmt,
+                SysRole.create_time,
+                SysRole.id,
+                cursor,
+                size,
+                descending=True,
+                nullable=True,
+            )
+        except ValueError:
+            return ResponseSchema(
+                code=ErrorCode.INVALID_ARGUMENT, message="Invalid cursor"
+            )
+        result = await db.execute(stmt)
+        roles, next_cursor = cursor_page(
+            result.scalars().all(), size, key=lambda r: (r.create_time, r.id)
+        )
+        return ResponseSchema(
+            result=CursorPageSchema(
+                list=[RoleResponse.model_validate(r).model_dump() for r in roles],
+                next_cursor=next_cursor,
+                total=total,
+            )
+        )
 
     # Pagination
     stmt = stmt.offset((page - 1) * size).limit(size)
@@ -55,7 +99,7 @@ async def role_list(
 
 @router.get("/options", response_model=ResponseSchema)
 async def role_options(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = select(SysRole).where(SysRole.status == 1).order_by(SysRole.sort)
@@ -110,6 +154,7 @@ async def update_role(
 
     role.update_by = current_user.username
     await db.commit()
+    await perm_bundle.invalidate_roles(db, [role.id])
     return ResponseSchema(message="Success")
 
 
@@ -127,6 +172,7 @@ async def delete_roles(
     await db.execute(delete(SysRoleMenu).where(SysRoleMenu.role_id.in_(form.ids)))
 
     await db.commit()
+    await perm_bundle.invalidate_roles(db, form.ids)
     return ResponseSchema(message="Success")
 
 
@@ -163,6 +209,8 @@ async def assign_perms(
         await db.execute(insert(SysRoleMenu), values)
 
     await db.commit()
+    await perm_bundle.invalidate_roles(db, [role_id])
+    await route_cache.bump_menu_version()
     return ResponseSchema(message="Success")
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,7 +7,10 @@ from sqlalchemy import select, insert, update, delete, func, or_
 import bcrypt
 
 from app.api import deps
-from app.core import security
+from app.core import perm_bundle
+from app.core.data_scope import DataScope
+from app.core.hashing import password_hasher
+from app.core.principal_cache import principal_cache
 from app.models.sys.user import SysUser, SysUserRoleRef
 from app.models.sys.dept import SysDept
 from app.models.sys.menu import SysMenu, SysRoleMenu
@@ -24,7 +27,13 @@ from app.schemas.sys.user import (
     BindPhoneForm,
     BindEmailForm,
 )
-from app.schemas.response import ResponseSchema, PageSchema
+from app.schemas.response import (
+    ResponseSchema,
+    PageSchema,
+    CursorPageSchema,
+    keyset_paginate,
+    cursor_page,
+)
 from app.core.codes import ErrorCode
 
 router = APIRouter()
@@ -38,63 +47,43 @@ async def get_user_me(
     """
     Get current user info
     """
-    # Fetch roles
-    roles_smpt = await db.execute(
-        select(SysRole)
-        .join(SysUserRoleRef, SysUserRoleRef.role_id == SysRole.id)
-        .where(SysUserRoleRef.user_id == user.id)
-    )
-    role_ids =[] #[role.id for role in roles_smpt.scalars().all()]
-    role_codes =[] #[role.code for role in roles_smpt.scalars().all()]
-    for role in roles_smpt.scalars().all():
-        role_ids.append(role.id)
-        role_codes.append(role.code)
-
-    # Fetch perms
-    if user.is_superuser:
-        perms_smpt = await db.execute(
-            select(SysMenu.perm)
-            .where(
-                SysMenu.perm.isnot(None),
-                SysMenu.is_deleted == False,
-            )
-        )
-    else:
-        perms_smpt = await db.execute(
-                    select(SysMenu.perm)
-                    .join(SysRoleMenu, SysRoleMenu.menu_id == SysMenu.id)
-                    .where(
-                        SysRoleMenu.role_id.in_(role_ids),
-                        SysRoleMenu.is_deleted == False,
-                        SysMenu.perm.isnot(None),
-                        SysMenu.is_deleted == False,
-                    )
-                )
-    perms = perms_smpt.scalars().all()
+    bundle = await perm_bundle.get_perm_bundle(db, user)
 
     # Create response
     user_resp = UserResponse.model_validate(user)
-    user_resp.roles = list(role_codes)
-    user_resp.perms = list(perms)
+    user_resp.roles = list(bundle["role_codes"])
+    user_resp.perms = list(bundle["perms"])
     return ResponseSchema(result=user_resp)
 
 
-@router.get("/list", response_model=ResponseSchema[PageSchema[UserResponse]])
+@router.get(
+    "/list",
+    response_model=ResponseSchema[
+        Union[PageSchema[UserResponse], CursorPageSchema[UserResponse]]
+    ],
+)
 async def list_users(
     keywords: Optional[str] = None,
     status: Optional[int] = None,
     date_range: Optional[List[str]] = Query(None),
     page_size: int = 10,
     page_number: int = 1,
-    db: AsyncSession = Depends(deps.get_db),
+    cursor: Optional[str] = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
+    data_scope: DataScope = Depends(deps.get_data_scope),
 ):
     """
     Get user list
+
+    Pass `cursor` (empty for the first page) to use keyset paging instead of
+    page_number; the total is then only counted when `with_total` is set.
     """
     stmt = select(SysUser, SysDept.name.label("dept_name")).outerjoin(
         SysDept, SysUser.dept_id == SysDept.id
     )
+    stmt = data_scope.apply(stmt, owner_column=SysUser.id, dept_column=SysUser.dept_id)
 
     filters = []
     if keywords:
@@ -122,12 +111,21 @@ async def list_users(
         stmt = stmt.where(*filters)
 
     # Count
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = await db.scalar(count_stmt)
+    total = None
+    if cursor is None or with_total:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        total = await db.scalar(count_stmt)
 
     # Paging
-    # Paging
-    stmt = stmt.offset((page_number - 1) * page_size).limit(page_size)
+    if cursor is not None:
+        try:
+            stmt = keyset_paginate(stmt, None, SysUser.id, cursor, page_size)
+        except ValueError:
+            return ResponseSchema(
+                code=ErrorCode.INVALID_ARGUMENT, message="Invalid cursor"
+            )
+    else:
+        stmt = stmt.offset((page_number - 1) * page_size).limit(page_size)
     result = await db.execute(stmt)
 
     # Process result to include dept info if needed, or just return users
@@ -138,6 +136,11 @@ async def list_users(
     users_with_dept = (
         result.all()
     )  # list of (SysUser, dept_name) or just (SysUser,) if outer join selected specific cols
+    next_cursor = None
+    if cursor is not None:
+        users_with_dept, next_cursor = cursor_page(
+            users_with_dept, page_size, key=lambda row: (row[0].id, row[0].id)
+        )
 
     # Collect user IDs
     user_ids = [row[0].id for row in users_with_dept if row[0]]
@@ -163,6 +166,10 @@ async def list_users(
         u_dict["role_ids"] = role_map.get(u.id, [])
         users.append(u_dict)
 
+    if cursor is not None:
+        return ResponseSchema(
+            result=CursorPageSchema(list=users, next_cursor=next_cursor, total=total)
+        )
     return ResponseSchema(result=PageSchema(list=users, total=total))
 
 
@@ -187,7 +194,7 @@ async def add_user(
         phone_number=form.phone_number,
         is_active=form.is_active if form.is_active is not None else True,
         dept_id=form.dept_id,
-        hashed_password=security.get_password_hash(
+        hashed_password=await password_hasher.hash(
             form.password or "123456"
         ),  # Default password
         create_by=current_user.username,
@@ -246,6 +253,9 @@ async def update_user(
             db.add(SysUserRoleRef(user_id=user.id, role_id=rid))
 
     await db.commit()
+    principal_cache.invalidate_user(user.id)
+    if form.role_ids is not None:
+        await perm_bundle.invalidate_users(user.id)
     return ResponseSchema(message="Success")
 
 
@@ -271,6 +281,8 @@ async def delete_users(
 
     await db.execute(delete(SysUser).where(SysUser.id.in_(form.uid_arr)))
     await db.commit()
+    principal_cache.invalidate_user(*form.uid_arr)
+    await perm_bundle.invalidate_users(*form.uid_arr)
     return ResponseSchema(message="Success")
 
 
@@ -289,9 +301,10 @@ async def reset_password(
             code=ErrorCode.PASSWORD_MISMATCH, message="Passwords do not match"
         )
 
-    user.hashed_password = security.get_password_hash(form.password)
+    user.hashed_password = await password_hasher.hash(form.password)
     user.update_by = current_user.username
     await db.commit()
+    principal_cache.invalidate_user(user.id)
 
     relogin = user.id == current_user.id
     return ResponseSchema(result={"relogin": relogin})
@@ -315,13 +328,14 @@ async def change_active_status(
     user.is_active = form.status
     user.update_by = current_user.username
     await db.commit()
+    principal_cache.invalidate_user(user.id)
     return ResponseSchema(message="Success")
 
 
 @router.get("/options", response_model=ResponseSchema)
 async def get_user_options(
     keywords: Optional[str] = None,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     current_user: SysUser = Depends(deps.get_current_user),
 ):
     stmt = select(SysUser)
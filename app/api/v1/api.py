@@ -1,5 +1,7 @@
 from fastapi import APIRouter
 
+from app.core.rate_limit import RateLimit
+
 # from app.api.v1.admin import items as admin_items
 # from app.api.v1.client import items as client_items
 from app.api.v1.admin.sys import auth as admin_auth
@@ -11,9 +13,22 @@ from app.api.v1.admin.sys import dict_item as admin_dict_item
 from app.api.v1.admin.sys import menu as admin_menu
 from app.api.v1.admin.sys import role as admin_role
 from app.api.v1.admin.sys import log as admin_log
+from app.api.v1.admin.sys import backup as admin_backup
 from app.api.v1.admin.sys import notice as admin_notice
+from app.api.v1.admin.sys import monitor as admin_monitor
 
 api_router = APIRouter()
+
+# Token bucket limits per router prefix (tokens per second, burst), applied
+# per principal by RateLimitMiddleware; other routes use the default limit.
+# Routes reachable without a login are limited per client IP.
+rate_limits = {
+    "/admin/auth/login": RateLimit(rate=1, burst=10, by_ip=True),
+    # PIL rendering, the most CPU heavy anonymous endpoint
+    "/admin/auth/captcha": RateLimit(rate=2, burst=10, by_ip=True),
+    # Anonymous dictionary lookups, a favourite of scrapers
+    "/admin/sys/dict-items": RateLimit(rate=10, burst=40, by_ip=True),
+}
 # api_router.include_router(admin_items.router, prefix="/admin/items", tags=["admin-items"])
 # api_router.include_router(client_items.router, prefix="/client/items", tags=["client-items"])
 api_router.include_router(admin_auth.router, prefix="/admin/auth", tags=["admin-auth"])
@@ -42,3 +57,9 @@ api_router.include_router(admin_log.router, prefix="/admin/sys/log", tags=["admi
 api_router.include_router(
     admin_notice.router, prefix="/admin/sys/notice", tags=["admin-notice"]
 )
+api_router.include_router(
+    admin_monitor.router, prefix="/admin/sys/monitor", tags=["admin-monitor"]
+)
+api_router.include_router(
+    admin_backup.router, prefix="/admin/sys/backup", tags=["admin-backup"]
+)
@@ -0,0 +1,276 @@
+import asyncio
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.rate_limit import client_ip
+from app.core.visit_stats import record_visits
+from app.db.log_tables import ensure_log_table, month_of
+
+# Checked in order: Edge and Opera UAs also carry "Chrome", Chrome carries "Safari"
+_BROWSERS = [
+    ("Edge", re.compile(r"Edg(?:e|A|iOS)?/([\d.]+)")),
+    ("Opera", re.compile(r"OPR/([\d.]+)")),
+    ("Firefox", re.compile(r"Firefox/([\d.]+)")),
+    ("Chrome", re.compile(r"Chrome/([\d.]+)")),
+    ("Safari", re.compile(r"Version/([\d.]+).*Safari/")),
+    ("IE", re.compile(r"(?:MSIE |Trident/.*rv:)([\d.]+)")),
+]
+_SYSTEMS = [
+    ("Android", re.compile(r"Android")),
+    ("iOS", re.compile(r"iPhone|iPad|iPod")),
+    ("Windows", re.compile(r"Windows")),
+    ("macOS", re.compile(r"Mac OS X|Macintosh")),
+    ("Linux", re.compile(r"Linux")),
+]
+
+# Truncation lengths of the free text columns
+_CONTENT_MAX = 255
+_PARAMS_MAX = 2000
+
+
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    (browser, browser_version, os) from a User-Agent header; clients send
+    the same few strings over and over, so results are cached
+    """
+    browser = version = system = None
+    for name, pattern in _BROWSERS:
+        match = pattern.search(user_agent)
+        if match:
+            browser, version = name, match.group(1)
+            break
+    for name, pattern in _SYSTEMS:
+        if pattern.search(user_agent):
+            system = name
+            break
+    return browser, version, system
+
+
+class AccessLogWriter:
+    """
+    Bounded in-memory queue of request log rows, drained by a background task.
+
+    Requests only append to the queue. Every `flush_interval` seconds, or
+    as soon as `batch_size` rows are waiting, the rows are written with one
+    multi-row INSERT per batch into the month's log table. Once `max_queue` rows are waiting new rows
+    are dropped and counted, so a slow database never backs up requests.
+    Each batch is also passed to `on_batch` (visit counters).
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_batch = on_batch
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def put(self, row: Dict[str, Any]) -> bool:
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._queue.append(row)
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background task and write what is still queued
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._queue:
+            batch = [
+                self._queue.popleft()
+                for _ in range(min(self.batch_size, len(self._queue)))
+            ]
+            try:
+                await self._write(batch)
+            except Exception as e:
+                # Audit rows are best effort; never retry into a failing database
+                self.failed += len(batch)
+                print(f"access log: dropped batch of {len(batch)} rows: {e}")
+            else:
+                self.written += len(batch)
+                self.batches += 1
+            if self.on_batch is not None:
+                try:
+                    await self.on_batch(batch)
+                except Exception as e:
+                    print(f"access log: batch hook failed: {e}")
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> None:
+        from app.db.session import engine
+
+        by_month: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_month.setdefault(month_of(row["create_time"]), []).append(row)
+        async with engine.begin() as conn:
+            for month, month_rows in by_month.items():
+                table = await ensure_log_table(conn, month)
+                await conn.execute(insert(table), month_rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+access_log_writer = AccessLogWriter(
+    max_queue=settings.ACCESS_LOG_QUEUE_SIZE,
+    batch_size=settings.ACCESS_LOG_BATCH_SIZE,
+    flush_interval=settings.ACCESS_LOG_FLUSH_MS / 1000,
+    on_batch=record_visits,
+)
+
+
+# User of the current request, filled in by get_current_user
+_request_user: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "access_log_user", default=None
+)
+
+
+def set_access_log_user(user_id: int) -> None:
+    holder = _request_user.get()
+    if holder is not None:
+        holder["user_id"] = user_id
+
+
+def _module_of(path: str, prefix: str) -> Optional[str]:
+    # /api/v1/admin/sys/user/list -> user
+    parts = path[len(prefix):].strip("/").split("/")
+    if len(parts) >= 3 and parts[0] == "admin" and parts[1] == "sys":
+        return parts[2]
+    if len(parts) >= 2 and parts[0] == "admin":
+        return parts[1]
+    return parts[0] or None
+
+
+class AccessLogMiddleware:
+    """
+    Records one SysLog row per API request; the row is only queued, the
+    database write happens later in AccessLogWriter
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        writer: AccessLogWriter,
+        prefix: str = "",
+        exclude_methods: Tuple[str, ...] = ("OPTIONS", "HEAD"),
+    ):
+        self.app = app
+        self.writer = writer
+        self.prefix = prefix
+        self.exclude_methods = exclude_methods
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in self.exclude_methods
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        holder: Dict[str, Any] = {}
+        token = _request_user.set(holder)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_user.reset(token)
+            self.writer.put(
+                self._row(scope, status_code, time.perf_counter() - start, holder)
+            )
+
+    def _row(
+        self, scope: Scope, status_code: int, elapsed: float, holder: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        user_agent = ""
+        for name, value in scope.get("headers", []):
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+                break
+        browser, browser_version, system = parse_user_agent(user_agent)
+        path = scope["path"]
+        query = scope.get("query_string", b"").decode("latin-1")
+        endpoint = scope.get("endpoint")
+        return {
+            "user_id": holder.get("user_id", -1),
+            "module": _module_of(path, self.prefix),
+            "request_method": scope["method"],
+            "request_params": query[:_PARAMS_MAX] or None,
+            "content": f"{scope['method']} {path}"[:_CONTENT_MAX],
+            "request_uri": path[:255],
+            "method": getattr(endpoint, "__name__", None),
+            # The client behind a trusted proxy, as the rate limiter sees it
+            "ip": client_ip(scope) if scope.get("client") else None,
+            "execution_time": round(elapsed * 1000),
+            "browser": browser,
+            "browser_version": browser_version,
+            "os": system,
+            "status_code": status_code,
+            "create_time": datetime.now(),
+        }
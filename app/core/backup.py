@@ -0,0 +1,452 @@
+import asyncio
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import uuid
+import zipfile
+from datetime import date, datetime
+from datetime import time as dt_time
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    LargeBinary,
+    Table,
+    Time,
+    insert,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.core.codes import ErrorCode
+from app.core.config import settings
+from app.core.notice_counter import invalidate_all_unread
+from app.core.perm_bundle import bump_perm_version
+from app.core.principal_cache import principal_cache
+from app.core.route_cache import bump_menu_version
+from app.db import log_tables
+from app.db.base import Base
+from app.db.redis import RedisManager
+from app.db.session import engine
+
+BACKUP_NAME_RE = re.compile(r"^backup-\d{8}-\d{6}\.zip$")
+JOB_KEY = "backup:job:{job_id}"
+# Id of the job holding the lock; one backup or restore at a time across
+# all workers, since restores truncate and reload the same tables
+RUNNING_KEY = "backup:running"
+MANIFEST = "manifest.json"
+# Read size when checksumming an archive
+_HASH_BLOCK = 1024 * 1024
+
+# Archive layout (zip, deflated, zip64):
+#   manifest.json           tables with row count and sha256 of each member,
+#                           for checking an archive outside the app
+#   tables/<name>.jsonl     {"columns": [...]} then one JSON array per row
+# plus <archive>.sha256 next to it, checked before every restore.
+
+
+class BackupError(Exception):
+    def __init__(self, code: ErrorCode, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decoders(table: Table) -> Dict[str, Callable[[Any], Any]]:
+    """
+    Per column conversions undoing _encode; other values load as is
+    """
+    decoders = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            decoders[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            decoders[column.name] = date.fromisoformat
+        elif isinstance(column.type, Time):
+            decoders[column.name] = dt_time.fromisoformat
+        elif isinstance(column.type, LargeBinary):
+            decoders[column.name] = base64.b64decode
+    return decoders
+
+
+def backup_path(name: str) -> str:
+    if not BACKUP_NAME_RE.match(name):
+        raise BackupError(ErrorCode.INVALID_ARGUMENT, "Invalid backup name")
+    path = os.path.join(settings.BACKUP_DIR, name)
+    if not os.path.isfile(path):
+        raise BackupError(ErrorCode.BACKUP_NOT_FOUND, "Backup not found")
+    return path
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_checksum(path: str) -> Optional[str]:
+    try:
+        with open(path + ".sha256", encoding="ascii") as f:
+            return f.read().split()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def list_backups() -> List[Dict[str, Any]]:
+    if not os.path.isdir(settings.BACKUP_DIR):
+        return []
+    backups = []
+    for name in os.listdir(settings.BACKUP_DIR):
+        if not BACKUP_NAME_RE.match(name):
+            continue
+        path = os.path.join(settings.BACKUP_DIR, name)
+        stat = os.stat(path)
+        backups.append(
+            {
+                "name": name,
+                "size": stat.st_size,
+                "create_time": datetime.fromtimestamp(stat.st_mtime),
+                "sha256": _read_checksum(path),
+            }
+        )
+    backups.sort(key=lambda backup: backup["name"], reverse=True)
+    return backups
+
+
+def delete_backup(name: str) -> None:
+    path = backup_path(name)
+    os.remove(path)
+    if os.path.exists(path + ".sha256"):
+        os.remove(path + ".sha256")
+
+
+async def _existing_tables(conn: AsyncConnection) -> Set[str]:
+    result = await conn.execute(
+        text(
+            "SELECT table_name FROM information_schema.tables "
+            "WHERE table_schema = DATABASE()"
+        )
+    )
+    return {name for (name,) in result.all()}
+
+
+async def table_chunks(
+    conn: AsyncConnection, table: Table, chunk_size: int
+) -> AsyncIterator[List[Any]]:
+    """
+    Rows of a table in primary key order, chunk_size at a time
+
+    Each chunk is a keyset query past the previous chunk's last key, read
+    through a server-side cursor, so neither the client nor the server
+    ever materializes more than one chunk.
+    """
+    pk = list(table.primary_key.columns)
+    last = None
+    while True:
+        stmt = select(table).order_by(*pk).limit(chunk_size)
+        if last is not None:
+            if len(pk) == 1:
+                stmt = stmt.where(pk[0] > last[0])
+            else:
+                stmt = stmt.where(tuple_(*pk) > tuple_(*last))
+        result = await conn.stream(stmt.execution_options(yield_per=chunk_size))
+        rows = [row async for row in result]
+        if not rows:
+            return
+        yield rows
+        if not pk or len(rows) < chunk_size:
+            return
+        last = [rows[-1]._mapping[column.name] for column in pk]
+
+
+class _Job:
+    """
+    Progress of a backup or restore, kept in Redis so any worker can
+    answer a poll
+    """
+
+    def __init__(self, kind: str, name: str):
+        self.state: Dict[str, Any] = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "name": name,
+            "status": "running",
+            "tables_total": 0,
+            "tables_done": 0,
+            "rows": 0,
+            "rows_per_sec": 0.0,
+            "error": None,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "finished_at": None,
+        }
+        self._started = time.perf_counter()
+
+    @property
+    def id(self) -> str:
+        return self.state["id"]
+
+    async def save(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        self.state["rows_per_sec"] = round(self.state["rows"] / elapsed, 1) if elapsed else 0.0
+        async with RedisManager.pipeline() as pipe:
+            pipe.set(
+                JOB_KEY.format(job_id=self.id),
+                json.dumps(self.state),
+                ex=settings.BACKUP_JOB_EXPIRE_SECONDS,
+            )
+            # Progress doubles as the lock's heartbeat
+            pipe.expire(RUNNING_KEY, settings.BACKUP_LOCK_EXPIRE_SECONDS)
+            await pipe.execute()
+
+    async def add_rows(self, rows: int) -> None:
+        self.state["rows"] += rows
+        await self.save()
+
+    async def finish(self, error: Optional[str] = None) -> None:
+        self.state["status"] = "failed" if error else "succeeded"
+        self.state["error"] = error
+        self.state["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        await self.save()
+
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    value = await RedisManager.get(JOB_KEY.format(job_id=job_id))
+    return json.loads(value) if value else None
+
+
+class BackupService:
+    """
+    Logical backups of every table in Base.metadata, plus the monthly
+    sys_log_YYYYMM tables, to zip archives on local disk, and restores
+    from them; both run as background jobs, one at a time across all
+    workers (see RUNNING_KEY)
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def _start(self, job: _Job, run: Callable) -> Dict[str, Any]:
+        locked = await RedisManager.set_nx(
+            RUNNING_KEY, job.id, expire=settings.BACKUP_LOCK_EXPIRE_SECONDS
+        )
+        if not locked:
+            running = await RedisManager.get(RUNNING_KEY)
+            raise BackupError(ErrorCode.BACKUP_BUSY, f"Job {running} is still running")
+        try:
+            await job.save()
+        except Exception:
+            await RedisManager.delete_if_equal(RUNNING_KEY, job.id)
+            raise
+
+        async def wrapper():
+            try:
+                await run(job)
+            except Exception as e:
+                await job.finish(error=str(e) or type(e).__name__)
+            else:
+                await job.finish()
+            finally:
+                await RedisManager.delete_if_equal(RUNNING_KEY, job.id)
+
+        task = asyncio.create_task(wrapper())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job.state
+
+    async def start_backup(self) -> Dict[str, Any]:
+        name = datetime.now().strftime("backup-%Y%m%d-%H%M%S.zip")
+        return await self._start(_Job("backup", name), self._backup)
+
+    async def start_restore(self, name: str) -> Dict[str, Any]:
+        backup_path(name)
+        return await self._start(_Job("restore", name), self._restore)
+
+    async def _backup(self, job: _Job) -> None:
+        os.makedirs(settings.BACKUP_DIR, exist_ok=True)
+        path = os.path.join(settings.BACKUP_DIR, job.state["name"])
+        part = path + ".part"
+        manifest = {"created_at": job.state["started_at"], "tables": []}
+        try:
+            async with engine.connect() as conn:
+                # One snapshot for all tables, so the archive is consistent
+                await conn.execute(text("START TRANSACTION WITH CONSISTENT SNAPSHOT"))
+                existing = await _existing_tables(conn)
+                tables = [t for t in Base.metadata.sorted_tables if t.name in existing]
+                # Request logs live in month tables outside Base.metadata
+                months = await log_tables.existing_log_months(conn)
+                tables += [log_tables.log_table(month) for month in sorted(months)]
+                job.state["tables_total"] = len(tables)
+                await job.save()
+
+                with zipfile.ZipFile(part, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                    for table in tables:
+                        manifest["tables"].append(
+                            await self._export_table(conn, archive, table, job)
+                        )
+                        job.state["tables_done"] += 1
+                        await job.save()
+                    archive.writestr(MANIFEST, json.dumps(manifest, indent=2))
+                await conn.rollback()
+
+            checksum = await asyncio.to_thread(file_sha256, part)
+            with open(path + ".sha256", "w", encoding="ascii") as f:
+                f.write(f"{checksum}  {job.state['name']}\n")
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+    async def _export_table(
+        self, conn: AsyncConnection, archive: zipfile.ZipFile, table: Table, job: _Job
+    ) -> Dict[str, Any]:
+        columns = [column.name for column in table.columns]
+        digest = hashlib.sha256()
+        rows = 0
+        with archive.open(f"tables/{table.name}.jsonl", "w", force_zip64=True) as member:
+            header = (json.dumps({"columns": columns}) + "\n").encode("utf-8")
+            digest.update(header)
+            member.write(header)
+            async for chunk in table_chunks(conn, table, settings.BACKUP_CHUNK_SIZE):
+                # Serializing, hashing and compressing are CPU bound; keep
+                # them all off the event loop
+                await asyncio.to_thread(_write_chunk, member, digest, chunk)
+                rows += len(chunk)
+                await job.add_rows(len(chunk))
+        return {"name": table.name, "rows": rows, "sha256": digest.hexdigest()}
+
+    async def _restore(self, job: _Job) -> None:
+        path = backup_path(job.state["name"])
+        expected = _read_checksum(path)
+        if expected is None or expected != await asyncio.to_thread(file_sha256, path):
+            raise BackupError(ErrorCode.BACKUP_CHECKSUM_MISMATCH, "Backup checksum mismatch")
+
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read(MANIFEST))
+        tables = []
+        for entry in manifest["tables"]:
+            name = entry["name"]
+            month = log_tables.month_of_table(name)
+            if name in Base.metadata.tables:
+                tables.append(Base.metadata.tables[name])
+            elif month:
+                # Month tables may have been dropped by retention since
+                async with engine.begin() as conn:
+                    tables.append(await log_tables.ensure_log_table(conn, month))
+        job.state["tables_total"] = len(tables)
+        await job.save()
+
+        semaphore = asyncio.Semaphore(settings.BACKUP_RESTORE_CONCURRENCY)
+
+        async def load(table):
+            async with semaphore:
+                await self._load_table(path, table, job)
+                job.state["tables_done"] += 1
+                await job.save()
+
+        # A failed table cancels the other loads, and the job is only
+        # reported failed once they have all stopped
+        try:
+            async with asyncio.TaskGroup() as group:
+                for table in tables:
+                    group.create_task(load(table))
+        except BaseExceptionGroup as e:
+            raise e.exceptions[0] from None
+        finally:
+            # Even a failed restore may already have replaced some tables
+            await _invalidate_caches()
+
+    async def _load_table(self, path: str, table: Table, job: _Job) -> None:
+        """
+        Replace a table's rows with the archived ones, in chunks; each table
+        loads on its own connection so tables load concurrently
+        """
+        decoders = _decoders(table)
+        with zipfile.ZipFile(path) as archive, archive.open(f"tables/{table.name}.jsonl") as raw:
+            reader = io.TextIOWrapper(raw, encoding="utf-8")
+            columns = json.loads(reader.readline())["columns"]
+            # Columns dropped from the model since the backup are skipped
+            keep = [(i, name) for i, name in enumerate(columns) if name in table.c]
+
+            async with engine.connect() as conn:
+                # Tables load in any order, so references can't be checked yet
+                await conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+                try:
+                    quoted = conn.dialect.identifier_preparer.quote_identifier(table.name)
+                    await conn.execute(text(f"TRUNCATE TABLE {quoted}"))
+                    while True:
+                        lines = await asyncio.to_thread(
+                            _read_lines, reader, settings.BACKUP_CHUNK_SIZE
+                        )
+                        if not lines:
+                            break
+                        rows = [_decode_row(json.loads(line), keep, decoders) for line in lines]
+                        await conn.execute(insert(table), rows)
+                        await conn.commit()
+                        await job.add_rows(len(rows))
+                finally:
+                    # The connection goes back to the pool
+                    await conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+
+async def _invalidate_caches() -> None:
+    """
+    Cached permissions, menus, unread counts and principals describe the
+    data that was just replaced
+    """
+    await bump_perm_version()
+    await bump_menu_version()
+    await invalidate_all_unread()
+    # Only this worker's cache; other workers catch up within the cache TTL
+    principal_cache.clear()
+
+
+def _write_chunk(member, digest, chunk: List[Any]) -> None:
+    data = "".join(
+        json.dumps(list(row), default=_encode, ensure_ascii=False) + "\n" for row in chunk
+    ).encode("utf-8")
+    digest.update(data)
+    member.write(data)
+
+
+def _decode_row(values: List[Any], keep, decoders) -> Dict[str, Any]:
+    row = {}
+    for index, name in keep:
+        value = values[index]
+        if value is not None and name in decoders:
+            value = decoders[name](value)
+        row[name] = value
+    return row
+
+
+def _read_lines(reader: io.TextIOWrapper, count: int) -> List[str]:
+    lines = []
+    for _ in range(count):
+        line = reader.readline()
+        if not line:
+            break
+        lines.append(line)
+    return lines
+
+
+backup_service = BackupService()
@@ -0,0 +1,81 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.captcha import load_font, render_captcha
+
+
+class CaptchaPool:
+    """
+    Ring buffer of pre-rendered (png_bytes, answer) captchas.
+
+    Once the buffer drops below low_watermark a background task renders it
+    back up to high_watermark on a dedicated thread, so requests only pop
+    and never compete with the default threadpool. When the buffer is empty
+    (burst before the refill caught up) one captcha is rendered on demand.
+    Each captcha is handed out once.
+    """
+
+    def __init__(self, low_watermark: int, high_watermark: int):
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._buffer: Deque[Tuple[bytes, str]] = deque(maxlen=high_watermark)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._refill_task: Optional[asyncio.Task] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="captcha-render"
+            )
+        return self._executor
+
+    async def _render(self) -> Tuple[bytes, str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), render_captcha)
+
+    async def start(self) -> None:
+        """
+        Load the font and fill the buffer; called at application startup
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), load_font)
+        self._schedule_refill()
+
+    def stop(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            self._refill_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _schedule_refill(self) -> None:
+        if self._refill_task is None and len(self._buffer) < self.low_watermark:
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        try:
+            while len(self._buffer) < self.high_watermark:
+                self._buffer.append(await self._render())
+        finally:
+            self._refill_task = None
+
+    async def pop(self) -> Tuple[bytes, str]:
+        try:
+            captcha = self._buffer.popleft()
+        except IndexError:
+            captcha = await self._render()
+        self._schedule_refill()
+        return captcha
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+
+captcha_pool = CaptchaPool(
+    low_watermark=settings.CAPTCHA_POOL_LOW_WATERMARK,
+    high_watermark=settings.CAPTCHA_POOL_HIGH_WATERMARK,
+)
@@ -11,6 +11,8 @@ class ErrorCode(str, Enum):
     NOT_FOUND = "NOT_FOUND"
     PERMISSION_DENIED = "PERMISSION_DENIED"
     OPERATION_FAILED = "OPERATION_FAILED"
+    SERVICE_BUSY = "SERVICE_BUSY"
+    TOO_MANY_REQUESTS = "TOO_MANY_REQUESTS"
 
     # User
     USER_ALREADY_EXISTS = "USER_ALREADY_EXISTS"
@@ -18,6 +20,8 @@ class ErrorCode(str, Enum):
     PASSWORD_MISMATCH = "PASSWORD_MISMATCH"
     LOGIN_FAILED = "LOGIN_FAILED"
     USER_DISABLED = "USER_DISABLED"
+    CAPTCHA_REQUIRED = "CAPTCHA_REQUIRED"
+    CAPTCHA_INVALID = "CAPTCHA_INVALID"
 
     # Role
     ROLE_ALREADY_EXISTS = "ROLE_ALREADY_EXISTS"
@@ -46,6 +50,11 @@ class ErrorCode(str, Enum):
     # Notice
     NOTICE_NOT_FOUND = "NOTICE_NOT_FOUND"
 
+    # Backup
+    BACKUP_NOT_FOUND = "BACKUP_NOT_FOUND"
+    BACKUP_BUSY = "BACKUP_BUSY"
+    BACKUP_CHECKSUM_MISMATCH = "BACKUP_CHECKSUM_MISMATCH"
+
 
 # def error_code_to_http_status(code: ErrorCode) -> int:
 #     """业务错误码到HTTP状态码的映射"""
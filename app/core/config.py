@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import List, Optional, Any
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyHttpUrl, EmailStr, field_validator
 
@@ -18,15 +18,123 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     MAX_LOGIN_ATTEMPTS: int = 5
     LOGIN_LOCKOUT_MINUTES: int = 15
+    # 0 disables the per client IP limit
+    MAX_LOGIN_ATTEMPTS_PER_IP: int = 0
+    # Count attempts in a true sliding window instead of a restarting one
+    LOGIN_SLIDING_WINDOW: bool = False
+
+    # Password hashing policy. BCRYPT_ROUNDS=None calibrates the cost at
+    # startup to PASSWORD_HASH_TARGET_MS; "argon2" needs argon2-cffi installed
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_TARGET_MS: int = 250
+    BCRYPT_ROUNDS: Optional[int] = None
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 15
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 64 * 1024  # KiB
+    ARGON2_PARALLELISM: int = 2
+
+    # Password hashing pool; calls beyond workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Login captcha: required once a username has this many failed attempts
+    # in the lockout window (0 = always); disabled entirely when False
+    LOGIN_CAPTCHA_ENABLED: bool = True
+    LOGIN_CAPTCHA_AFTER_FAILURES: int = 2
+
+    # Pre-rendered captcha buffer, refilled below the low watermark
+    CAPTCHA_POOL_LOW_WATERMARK: int = 32
+    CAPTCHA_POOL_HIGH_WATERMARK: int = 128
+
+    # Request rate limiting; per router limits live in app/api/v1/api.py
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DEFAULT_RATE: float = 50.0
+    RATE_LIMIT_DEFAULT_BURST: int = 100
+    RATE_LIMIT_SYNC_SECONDS: float = 1.0
+    # Reverse proxies whose X-Forwarded-For is trusted for the client IP
+    TRUSTED_PROXIES: List[str] = []
+
+    # Access log: rows are queued per request and written in batches
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
+    ACCESS_LOG_BATCH_SIZE: int = 500
+    ACCESS_LOG_FLUSH_MS: int = 1000
+
+    # Visit analytics: per-day Redis counters kept this long, rolled up
+    # into sys_visit_daily this many seconds after midnight
+    VISIT_STATS_KEEP_DAYS: int = 7
+    VISIT_ROLLUP_DELAY_SECONDS: int = 300
+    # Longest range /log/visit-trend accepts
+    VISIT_TREND_MAX_DAYS: int = 366
+
+    # Range /log/list searches when no date_range is given
+    LOG_LIST_DEFAULT_DAYS: int = 30
+
+    # Log retention (worker/log_retention.py): older rows are archived to
+    # gzip'd JSONL under LOG_ARCHIVE_DIR, then deleted in batches
+    LOG_RETENTION_DAYS: int = 180
+    LOG_ARCHIVE_DIR: str = "archives/logs"
+    LOG_ARCHIVE_CHUNK_SIZE: int = 5000
+    LOG_DELETE_BATCH_SIZE: int = 2000
+    LOG_DELETE_PAUSE_MS: int = 50
+
+    # Database backups (app/core/backup.py)
+    BACKUP_DIR: str = "backups"
+    BACKUP_CHUNK_SIZE: int = 5000
+    BACKUP_RESTORE_CONCURRENCY: int = 4
+    BACKUP_JOB_EXPIRE_SECONDS: int = 86400
+    # The running job's lock is refreshed on every progress save; a worker
+    # that dies mid-job frees it after this long
+    BACKUP_LOCK_EXPIRE_SECONDS: int = 300
+
+    # Principal cache (per worker process)
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # Permission bundle cache (Redis)
+    PERM_BUNDLE_EXPIRE_SECONDS: int = 60 * 60 * 24
+    ROUTE_TREE_EXPIRE_SECONDS: int = 60 * 60 * 24
+
+    # Closure table index for dept/menu hierarchies (backfill before enabling)
+    HIERARCHY_INDEX_ENABLED: bool = False
+
+    # Resolved data scope cache (per worker process)
+    DATA_SCOPE_CACHE_TTL_SECONDS: int = 60
+
+    # Per-user unread notice counters (Redis)
+    NOTICE_UNREAD_EXPIRE_SECONDS: int = 60 * 60 * 24
 
     # Redis
     REDIS_HOST: str = "127.0.0.1"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
     REDIS_PASSWORD: Optional[str] = None
 
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
 
+    # Optional read replicas for list/tree/options/routes endpoints, e.g.
+    # ["mysql+aiomysql://user:pw@replica1:3306/db", ...]; a principal reads
+    # from the primary for READ_YOUR_WRITES_SECONDS after any write
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Engine profile (dev/test/prod, see app/db/engine.py); DB_* values
+    # left at None use the profile's default
+    DB_PROFILE: str = "dev"
+    DB_ECHO: Optional[bool] = None
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = None
+
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: Optional[str], info: Any) -> any:
         if isinstance(v, str):
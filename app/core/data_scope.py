@@ -0,0 +1,155 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import false, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import perm_bundle
+from app.core.config import settings
+from app.db.hierarchy import dept_hierarchy
+from app.globals.enum import RoleDataScope
+from app.models.sys.dept import SysDept
+from app.models.sys.user import SysUser
+
+
+class DataScope:
+    """
+    A user's resolved data scope.
+
+    dept_ids is the materialised dept set (the user's dept, plus its
+    descendants for DEPT_AND_CHILD), so predicates are plain IN lists on
+    indexed columns with no tree_path matching at query time.
+    """
+
+    def __init__(
+        self,
+        scope: RoleDataScope,
+        user_id: int,
+        dept_ids: Tuple[int, ...] = (),
+    ):
+        self.scope = scope
+        self.user_id = user_id
+        self.dept_ids = dept_ids
+
+    @property
+    def unrestricted(self) -> bool:
+        return self.scope == RoleDataScope.ALL
+
+    def predicate(self, owner_column=None, dept_column=None):
+        """
+        Row filter for this scope, None when unrestricted
+
+        :param owner_column: column holding the owning user id
+        :param dept_column: column holding the dept id; if omitted, dept
+            scopes match rows whose owner belongs to one of the depts
+        """
+        if self.unrestricted:
+            return None
+
+        conditions = []
+        if owner_column is not None:
+            conditions.append(owner_column == self.user_id)
+
+        if self.scope != RoleDataScope.SELF or owner_column is None:
+            if self.dept_ids:
+                if dept_column is not None:
+                    conditions.append(dept_column.in_(self.dept_ids))
+                elif owner_column is not None:
+                    conditions.append(
+                        owner_column.in_(
+                            select(SysUser.id).where(SysUser.dept_id.in_(self.dept_ids))
+                        )
+                    )
+
+        if not conditions:
+            return false()
+        return or_(*conditions)
+
+    def apply(self, stmt, owner_column=None, dept_column=None):
+        condition = self.predicate(owner_column, dept_column)
+        return stmt if condition is None else stmt.where(condition)
+
+
+class DataScopeCache:
+    """
+    Per-worker TTL cache of resolved scopes, keyed by user id.
+
+    An entry is only reused while the user's scope and dept are unchanged;
+    dept tree changes call clear().
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, Tuple, DataScope]]" = OrderedDict()
+
+    def get(self, user_id: int, fingerprint: Tuple) -> Optional[DataScope]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, cached_fingerprint, data_scope = entry
+        if expires_at <= time.monotonic() or cached_fingerprint != fingerprint:
+            del self._entries[user_id]
+            return None
+        return data_scope
+
+    def set(self, user_id: int, fingerprint: Tuple, data_scope: DataScope) -> None:
+        self._entries.pop(user_id, None)
+        self._entries[user_id] = (time.monotonic() + self.ttl, fingerprint, data_scope)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+data_scope_cache = DataScopeCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.DATA_SCOPE_CACHE_TTL_SECONDS,
+)
+
+
+async def _dept_ids(db: AsyncSession, scope: RoleDataScope, dept_id: Optional[int]):
+    if dept_id is None:
+        return ()
+    if scope != RoleDataScope.DEPT_AND_CHILD:
+        return (dept_id,)
+
+    if dept_hierarchy.enabled:
+        stmt = dept_hierarchy.descendant_ids(dept_id, include_self=True)
+    else:
+        dept = await db.get(SysDept, dept_id)
+        if not dept:
+            return (dept_id,)
+        stmt = select(SysDept.id).where(
+            or_(
+                SysDept.id == dept_id,
+                dept_hierarchy.subtree_filter(dept_id, f"{dept.tree_path},{dept_id}"),
+            )
+        )
+    result = await db.execute(stmt)
+    return tuple(result.scalars().all())
+
+
+async def resolve_data_scope(db: AsyncSession, user: SysUser) -> DataScope:
+    """
+    Resolve the user's data scope, reusing the cached one when still valid
+    """
+    if user.is_superuser:
+        return DataScope(RoleDataScope.ALL, user.id)
+
+    bundle = await perm_bundle.get_perm_bundle(db, user)
+    # Users without any scoped role only see their own data
+    scope = RoleDataScope(bundle.get("data_scope") or RoleDataScope.SELF)
+    if scope == RoleDataScope.ALL:
+        return DataScope(scope, user.id)
+
+    fingerprint = (scope, user.dept_id)
+    cached = data_scope_cache.get(user.id, fingerprint)
+    if cached is not None:
+        return cached
+
+    data_scope = DataScope(scope, user.id, await _dept_ids(db, scope, user.dept_id))
+    data_scope_cache.set(user.id, fingerprint, data_scope)
+    return data_scope
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.security import (
+    configure_password_context,
+    get_password_hash,
+    verify_and_update,
+    verify_password,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised instead of queueing when the hashing pool is saturated
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism
+    without the pickling cost of a process pool. At most
+    workers + max_queue calls are admitted; beyond that callers get
+    PasswordHasherBusy right away, which the app turns into a 503, rather
+    than piling up behind seconds of queued hashing.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self.policy: dict = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hasher"
+            )
+        return self._executor
+
+    def _timed(self, fn: Callable[..., T], queued_at: float, *args) -> T:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_seconds += started_at - queued_at
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._run_seconds += time.perf_counter() - started_at
+
+    async def _submit(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._admitted >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._admitted += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), self._timed, fn, time.perf_counter(), *args
+            )
+        finally:
+            with self._lock:
+                self._admitted -= 1
+
+    async def configure(self) -> dict:
+        """
+        Apply the hashing policy from settings; calibration hashes too, so
+        it runs on the pool as well
+        """
+        loop = asyncio.get_running_loop()
+        self.policy = await loop.run_in_executor(
+            self._get_executor(), configure_password_context
+        )
+        return self.policy
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await self._submit(verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(get_password_hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self._completed
+            return {
+                "policy": self.policy,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._admitted - self._running,
+                "utilization": round(self._running / self.workers, 3),
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 3)
+                if completed
+                else 0.0,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 3)
+                if completed
+                else 0.0,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,174 @@
+import time
+import uuid
+from typing import List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.db.redis import RedisManager
+
+# KEYS: (attempts, lockout) pairs, one per dimension (user, then ip)
+# ARGV: window seconds, now ms, sliding flag, unique member, then one
+#       attempt limit per dimension
+# Returns {allowed, user attempts, lock seconds}. An active lock on any
+# dimension rejects without counting; otherwise the attempt is counted and
+# a dimension reaching its limit is locked for the window.
+LOGIN_ATTEMPT = """
+local window = tonumber(ARGV[1])
+local now = tonumber(ARGV[2])
+local sliding = ARGV[3] == '1'
+
+local retry_after = 0
+for i = 2, #KEYS, 2 do
+    local ttl = redis.call('TTL', KEYS[i])
+    if ttl > retry_after then
+        retry_after = ttl
+    end
+end
+if retry_after > 0 then
+    return {0, 0, retry_after}
+end
+
+local attempts, lock = 0, 0
+for i = 1, #KEYS, 2 do
+    local count
+    if sliding then
+        redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window * 1000)
+        redis.call('ZADD', KEYS[i], now, ARGV[4])
+        count = redis.call('ZCARD', KEYS[i])
+        redis.call('EXPIRE', KEYS[i], window)
+    else
+        count = redis.call('INCR', KEYS[i])
+        -- The window starts with its first attempt, later ones don't extend it
+        if count == 1 then
+            redis.call('EXPIRE', KEYS[i], window)
+        end
+    end
+    if count >= tonumber(ARGV[4 + (i + 1) / 2]) then
+        redis.call('SET', KEYS[i + 1], '1', 'EX', window)
+        lock = window
+    end
+    if i == 1 then
+        attempts = count
+    end
+end
+return {1, attempts, lock}
+"""
+
+# Takes a successful attempt back out of the IP counter, so logins that
+# succeed never add up to an IP lock; the lock is lifted when the count
+# drops back under the limit (it can only have been set by this attempt).
+# KEYS: ip attempts, ip lockout
+# ARGV: sliding flag, the attempt's unique member, ip attempt limit
+LOGIN_FORGIVE = """
+local count
+if ARGV[1] == '1' then
+    redis.call('ZREM', KEYS[1], ARGV[2])
+    count = redis.call('ZCARD', KEYS[1])
+else
+    count = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if count > 0 then
+        count = redis.call('DECR', KEYS[1])
+    end
+end
+if count < tonumber(ARGV[3]) then
+    redis.call('DEL', KEYS[2])
+end
+return count
+"""
+
+
+class LoginAttempt(NamedTuple):
+    # False when a lock was already active and the attempt was refused
+    allowed: bool
+    # Attempts on this username within the window, including this one
+    attempts: int
+    # Seconds until the lock expires, 0 when not locked
+    locked_for: int
+    # Client IP whose counter includes this attempt, None when not counted
+    ip: Optional[str] = None
+    # Unique id of this attempt in the sliding window
+    member: Optional[str] = None
+
+
+class LoginRateLimiter:
+    """
+    Counts login attempts per username (and optionally per client IP) and
+    locks a dimension once it reaches its limit, all in one Lua script.
+
+    Every attempt is counted before the password is checked, so a burst of
+    concurrent guesses can't slip past the limit; a successful login clears
+    the username's state and takes the attempt back out of the IP counter
+    (see security.complete_login), so only failures add up per IP. With
+    sliding=True attempts are kept in a sorted set and only the last
+    `window` seconds count, instead of a fixed window that starts with the
+    first attempt.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        window: int,
+        max_attempts_per_ip: int = 0,
+        sliding: bool = False,
+    ):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_attempts_per_ip = max_attempts_per_ip
+        self.sliding = sliding
+
+    @staticmethod
+    def user_keys(username: str) -> List[str]:
+        return [f"login_attempts:{username}", f"login_lockout:{username}"]
+
+    @staticmethod
+    def ip_keys(ip: str) -> List[str]:
+        return [f"login_attempts:ip:{ip}", f"login_lockout:ip:{ip}"]
+
+    async def hit(self, username: str, ip: Optional[str] = None) -> LoginAttempt:
+        """
+        Check the locks and count one login attempt in a single round-trip
+        """
+        keys = self.user_keys(username)
+        limits = [self.max_attempts]
+        if not ip or self.max_attempts_per_ip <= 0:
+            ip = None
+        if ip:
+            keys += self.ip_keys(ip)
+            limits.append(self.max_attempts_per_ip)
+
+        member = uuid.uuid4().hex
+        allowed, attempts, locked_for = await RedisManager.eval_script(
+            LOGIN_ATTEMPT,
+            keys,
+            [
+                self.window,
+                int(time.time() * 1000),
+                1 if self.sliding else 0,
+                member,
+                *limits,
+            ],
+        )
+        return LoginAttempt(bool(allowed), int(attempts), int(locked_for), ip, member)
+
+    def forgive(self, pipe, attempt: LoginAttempt) -> None:
+        """
+        Queue taking a successful attempt back out of its IP counter
+        """
+        if attempt.ip is None:
+            return
+        keys = self.ip_keys(attempt.ip)
+        pipe.eval(
+            LOGIN_FORGIVE,
+            len(keys),
+            *keys,
+            1 if self.sliding else 0,
+            attempt.member,
+            self.max_attempts_per_ip,
+        )
+
+
+login_limiter = LoginRateLimiter(
+    max_attempts=settings.MAX_LOGIN_ATTEMPTS,
+    window=settings.LOGIN_LOCKOUT_MINUTES * 60,
+    max_attempts_per_ip=settings.MAX_LOGIN_ATTEMPTS_PER_IP,
+    sliding=settings.LOGIN_SLIDING_WINDOW,
+)
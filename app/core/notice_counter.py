@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.db.redis import RedisManager
+
+UNREAD_KEY = "notice:unread:{user_id}"
+
+# Keys per Redis call when fanning out to large audiences
+BATCH_SIZE = 1000
+
+
+def _key(user_id: int) -> str:
+    return UNREAD_KEY.format(user_id=user_id)
+
+
+def _batches(user_ids: Iterable[int]):
+    batch: List[str] = []
+    for user_id in user_ids:
+        batch.append(_key(user_id))
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def get_unread(user_id: int) -> Optional[int]:
+    """
+    Cached unread count, None when the counter has to be recomputed
+    """
+    value = await RedisManager.get(_key(user_id))
+    return None if value is None else max(int(value), 0)
+
+
+async def set_unread(user_id: int, count: int) -> None:
+    await RedisManager.set(
+        _key(user_id), str(count), expire=settings.NOTICE_UNREAD_EXPIRE_SECONDS
+    )
+
+
+async def set_unread_many(counts: Dict[int, int]) -> None:
+    items = list(counts.items())
+    for start in range(0, len(items), BATCH_SIZE):
+        await RedisManager.mset(
+            {_key(uid): str(count) for uid, count in items[start : start + BATCH_SIZE]},
+            expire=settings.NOTICE_UNREAD_EXPIRE_SECONDS,
+        )
+
+
+async def adjust_unread(user_ids: Iterable[int], delta: int) -> None:
+    """
+    Add delta to the users' counters
+
+    Only existing counters are touched; a missing one is recomputed from
+    the database on its next read, so fan-out never creates a wrong base.
+    """
+    for batch in _batches(user_ids):
+        await RedisManager.incrby_existing(batch, delta)
+
+
+async def invalidate_unread(user_ids: Iterable[int]) -> None:
+    """
+    Drop the users' counters so they are recomputed on next read
+    """
+    for batch in _batches(user_ids):
+        await RedisManager.delete_many(batch)
+
+
+async def invalidate_all_unread() -> None:
+    """
+    Drop every user's counter, e.g. after notices were restored from a backup
+    """
+    await RedisManager.delete_matching(UNREAD_KEY.format(user_id="*"), batch_size=BATCH_SIZE)
@@ -0,0 +1,133 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.redis import RedisManager
+from app.globals.enum import RoleDataScope
+from app.models.sys.menu import SysMenu, SysRoleMenu
+from app.models.sys.role import SysRole
+from app.models.sys.user import SysUser, SysUserRoleRef
+
+PERM_BUNDLE_KEY = "perm_bundle:{user_id}"
+# Bumped on menu changes, which can affect every user's perms at once
+PERM_VERSION_KEY = "perm_bundle:version"
+
+# Broadest scope first
+_DATA_SCOPE_ORDER = list(RoleDataScope)
+
+
+def _bundle_key(user_id: int) -> str:
+    return PERM_BUNDLE_KEY.format(user_id=user_id)
+
+
+def _broadest_scope(scopes: Iterable[Any]) -> Optional[str]:
+    ranked = []
+    for scope in scopes:
+        try:
+            ranked.append(RoleDataScope(scope))
+        except ValueError:
+            continue
+    if not ranked:
+        return None
+    return min(ranked, key=_DATA_SCOPE_ORDER.index).value
+
+
+async def build_perm_bundle(db: AsyncSession, user: SysUser) -> Dict[str, Any]:
+    """
+    Compile {role_ids, role_codes, perms, data_scope} for a user from the DB
+    """
+    roles_result = await db.execute(
+        select(SysRole.id, SysRole.code, SysRole.data_scope)
+        .join(SysUserRoleRef, SysUserRoleRef.role_id == SysRole.id)
+        .where(SysUserRoleRef.user_id == user.id)
+    )
+    role_ids: List[int] = []
+    role_codes: List[str] = []
+    scopes = []
+    for role_id, code, data_scope in roles_result.all():
+        role_ids.append(role_id)
+        role_codes.append(code)
+        scopes.append(data_scope)
+
+    if user.is_superuser:
+        perms_result = await db.execute(
+            select(SysMenu.perm).where(
+                SysMenu.perm.isnot(None),
+                SysMenu.is_deleted == False,
+            )
+        )
+    else:
+        perms_result = await db.execute(
+            select(SysMenu.perm)
+            .join(SysRoleMenu, SysRoleMenu.menu_id == SysMenu.id)
+            .where(
+                SysRoleMenu.role_id.in_(role_ids),
+                SysRoleMenu.is_deleted == False,
+                SysMenu.perm.isnot(None),
+                SysMenu.is_deleted == False,
+            )
+        )
+
+    return {
+        "role_ids": role_ids,
+        "role_codes": role_codes,
+        "perms": list(perms_result.scalars().all()),
+        "data_scope": (
+            RoleDataScope.ALL.value if user.is_superuser else _broadest_scope(scopes)
+        ),
+    }
+
+
+async def get_perm_bundle(db: AsyncSession, user: SysUser) -> Dict[str, Any]:
+    """
+    Get the user's permission bundle, rebuilding it only when missing or stale.
+
+    The bundle and the global version are fetched with a single MGET.
+    """
+    raw, version = await RedisManager.mget(_bundle_key(user.id), PERM_VERSION_KEY)
+    version = version or "0"
+    if raw:
+        bundle = json.loads(raw)
+        if bundle.get("version") == version:
+            return bundle
+
+    bundle = await build_perm_bundle(db, user)
+    bundle["version"] = version
+    await RedisManager.set(
+        _bundle_key(user.id),
+        json.dumps(bundle),
+        expire=settings.PERM_BUNDLE_EXPIRE_SECONDS,
+    )
+    return bundle
+
+
+async def invalidate_users(*user_ids: int) -> None:
+    """
+    Drop the bundles of the given users, e.g. after their roles changed
+    """
+    await RedisManager.delete_many(_bundle_key(uid) for uid in user_ids)
+
+
+async def invalidate_roles(db: AsyncSession, role_ids: Iterable[int]) -> None:
+    """
+    Drop the bundles of every user holding one of the given roles
+    """
+    role_ids = list(role_ids)
+    if not role_ids:
+        return
+    result = await db.execute(
+        select(SysUserRoleRef.user_id)
+        .where(SysUserRoleRef.role_id.in_(role_ids))
+        .distinct()
+    )
+    await invalidate_users(*result.scalars().all())
+
+
+async def bump_perm_version() -> None:
+    """
+    Mark all bundles stale, used when menus (and thus perms) change
+    """
+    await RedisManager.incr(PERM_VERSION_KEY)
@@ -0,0 +1,129 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import inspect
+
+from app.core.config import settings
+from app.models.sys.user import SysUser
+from app.schemas.sys.auth import TokenPayload
+
+
+class PrincipalCache:
+    """
+    Per-worker cache of authenticated principals, keyed by token hash.
+
+    Each entry holds the decoded token claims plus a snapshot of the user's
+    column values, so repeat callers skip both the Redis token check and the
+    user SELECT. Entries expire after ``ttl`` seconds (never later than the
+    token's own ``exp``) and the cache is LRU-bounded to ``max_size``.
+
+    The cache lives in process memory: invalidation only reaches the current
+    worker, other workers catch up once their entry expires.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, TokenPayload, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def snapshot(user: SysUser) -> Dict[str, Any]:
+        """
+        Copy the loaded column values of a user, detached from any session
+        """
+        return {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(SysUser).column_attrs
+        }
+
+    def get(self, token: str) -> Optional[Tuple[TokenPayload, SysUser]]:
+        """
+        Return (claims, transient user) for a cached token, or None on miss
+        """
+        key = self.token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, claims, snapshot = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        # A fresh instance per hit, so handlers can't mutate the cached copy
+        return claims, SysUser(**snapshot)
+
+    def set(
+        self,
+        token: str,
+        claims: TokenPayload,
+        user: SysUser,
+        token_exp: Optional[float] = None,
+    ) -> None:
+        """
+        Cache a validated principal; token_exp is the JWT exp as a unix timestamp
+        """
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        key = self.token_key(token)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, claims, self.snapshot(user))
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._remove(self.token_key(token))
+
+    def invalidate_user(self, *user_ids: int) -> None:
+        """
+        Drop every cached token belonging to the given users
+        """
+        with self._lock:
+            for user_id in user_ids:
+                for key in list(self._by_user.get(user_id, ())):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[2].get("id")
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
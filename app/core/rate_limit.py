@@ -0,0 +1,244 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.codes import ErrorCode
+from app.core.config import settings
+from app.core.security import ALGORITHM
+from app.db.redis import RedisManager
+from app.schemas.response import ResponseSchema
+
+BUCKET_KEY = "ratelimit:{key}"
+
+
+class RateLimit:
+    """
+    Token bucket: `rate` tokens per second refill, up to `burst` tokens.
+    `by_ip` keys the bucket on the client IP even for token holders, for
+    routes anonymous callers can reach.
+    """
+
+    def __init__(self, rate: float, burst: int, by_ip: bool = False):
+        self.rate = rate
+        self.burst = burst
+        self.by_ip = by_ip
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated_at", "pending", "seen_global")
+
+    def __init__(self, burst: int, now: float):
+        self.tokens = float(burst)
+        self.updated_at = now
+        # Tokens taken locally and not yet reported to Redis
+        self.pending = 0
+        # Cluster wide count last read back from Redis, None before the
+        # first sync so an existing count isn't mistaken for new traffic
+        self.seen_global: Optional[int] = None
+
+
+class TokenBucketLimiter:
+    """
+    Per-worker token buckets that share consumption through Redis.
+
+    Requests are decided against the local bucket only, so the hot path
+    never waits on the network. Every `sync_interval` seconds the tokens
+    taken locally are added to one Redis counter per bucket in a single
+    pipeline; the increase contributed by other workers is then deducted
+    from the local bucket, so the cluster as a whole converges on the
+    configured rate. If Redis is unreachable buckets simply stay local.
+    """
+
+    def __init__(self, sync_interval: float = 1.0, max_buckets: int = 100_000):
+        self.sync_interval = sync_interval
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[_Bucket, RateLimit]]" = OrderedDict()
+        self._last_sync = time.monotonic()
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def acquire(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token
+        :return: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        entry = self._buckets.get(key)
+        if entry is None:
+            bucket = _Bucket(limit.burst, now)
+            self._buckets[key] = (bucket, limit)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            bucket = entry[0]
+            self._buckets.move_to_end(key)
+
+        bucket.tokens = min(
+            limit.burst, bucket.tokens + (now - bucket.updated_at) * limit.rate
+        )
+        bucket.updated_at = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.pending += 1
+            retry_after = 0.0
+        else:
+            retry_after = (1 - bucket.tokens) / limit.rate
+
+        if now - self._last_sync >= self.sync_interval and self._sync_task is None:
+            self._last_sync = now
+            self._sync_task = asyncio.create_task(self.sync())
+        return retry_after
+
+    async def sync(self) -> None:
+        try:
+            await self._sync()
+        except Exception:
+            # Fail open: keep limiting locally until Redis is back
+            pass
+        finally:
+            self._sync_task = None
+
+    async def _sync(self) -> None:
+        now = time.monotonic()
+        batch = []
+        for key, (bucket, limit) in list(self._buckets.items()):
+            # Idle buckets have refilled and carry nothing worth sharing
+            if (
+                bucket.pending == 0
+                and now - bucket.updated_at > 2 * limit.burst / limit.rate
+            ):
+                del self._buckets[key]
+                continue
+            batch.append((key, bucket, limit, bucket.pending))
+            bucket.pending = 0
+        if not batch:
+            return
+
+        try:
+            async with RedisManager.pipeline() as pipe:
+                for key, _, limit, taken in batch:
+                    redis_key = BUCKET_KEY.format(key=key)
+                    pipe.incrby(redis_key, taken)
+                    # Long enough to outlive a full refill, so counters reset
+                    # only for buckets nobody uses
+                    pipe.expire(redis_key, max(60, math.ceil(limit.burst / limit.rate) * 2))
+                results = await pipe.execute()
+        except Exception:
+            for _, bucket, _, taken in batch:
+                bucket.pending += taken
+            raise
+
+        for (_, bucket, limit, taken), total in zip(batch, results[::2]):
+            previous = bucket.seen_global
+            bucket.seen_global = total
+            if previous is None:
+                continue
+            others = total - taken - previous
+            # A negative delta means the counter expired and started over
+            if others > 0:
+                bucket.tokens = max(bucket.tokens - others, -float(limit.burst))
+
+
+def client_ip(scope: Scope) -> str:
+    """
+    Peer address, or the client behind it when the peer is one of
+    TRUSTED_PROXIES: the rightmost X-Forwarded-For entry that isn't a proxy
+    itself (entries further left are whatever the client chose to send)
+    """
+    client = scope.get("client")
+    ip = client[0] if client else "unknown"
+    trusted = settings.TRUSTED_PROXIES
+    if ip not in trusted:
+        return ip
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            for hop in reversed(value.decode("latin-1").split(",")):
+                hop = hop.strip()
+                if hop and hop not in trusted:
+                    return hop
+    return ip
+
+
+@lru_cache(maxsize=4096)
+def _token_subject(token: str) -> Optional[Tuple[str, float]]:
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    sub, exp = payload.get("sub"), payload.get("exp")
+    return (str(sub), float(exp or math.inf)) if sub is not None else None
+
+
+def principal_of(scope: Scope) -> str:
+    """
+    User id of a bearer token with a valid signature, client IP otherwise;
+    an unverified header never picks the key, so made-up tokens can't mint
+    fresh buckets
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                subject = _token_subject(token.strip())
+                if subject is not None and subject[1] > time.time():
+                    return "u:" + subject[0]
+            break
+    return "ip:" + client_ip(scope)
+
+
+class RateLimitMiddleware:
+    """
+    Applies the longest matching path prefix limit per principal; paths
+    without a configured limit fall back to `default` (None disables it)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Dict[str, RateLimit],
+        default: Optional[RateLimit] = None,
+        limiter: Optional[TokenBucketLimiter] = None,
+    ):
+        self.app = app
+        # Longest prefix first
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+        self.default = default
+        self.limiter = limiter or TokenBucketLimiter()
+
+    def match(self, path: str) -> Tuple[str, Optional[RateLimit]]:
+        for prefix, limit in self.limits:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return prefix, limit
+        return "*", self.default
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        prefix, limit = self.match(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        principal = "ip:" + client_ip(scope) if limit.by_ip else principal_of(scope)
+        retry_after = self.limiter.acquire(f"{prefix}|{principal}", limit)
+        if retry_after:
+            response = JSONResponse(
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+                content=ResponseSchema(
+                    code=ErrorCode.TOO_MANY_REQUESTS,
+                    message="Too many requests, please slow down",
+                    result=None,
+                ).model_dump(),
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
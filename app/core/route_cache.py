@@ -0,0 +1,50 @@
+import json
+from typing import Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.redis import RedisManager
+
+ROUTE_TREE_KEY = "route_tree:{role_key}"
+# Bumped whenever menus or role-menu assignments change
+MENU_VERSION_KEY = "menu:version"
+
+SUPERUSER_ROLE_KEY = "superuser"
+
+
+def role_key(role_ids: Iterable[int], is_superuser: bool = False) -> str:
+    """
+    Cache key for a role set; users with the same roles share one tree
+    """
+    if is_superuser:
+        return SUPERUSER_ROLE_KEY
+    return ",".join(str(rid) for rid in sorted(set(role_ids))) or "none"
+
+
+async def get_routes(key: str) -> Tuple[Optional[List[dict]], str]:
+    """
+    Return (cached routes or None, current menu version) in one round-trip
+    """
+    raw, version = await RedisManager.mget(
+        ROUTE_TREE_KEY.format(role_key=key), MENU_VERSION_KEY
+    )
+    version = version or "0"
+    if raw:
+        cached = json.loads(raw)
+        if cached.get("version") == version:
+            return cached["routes"], version
+    return None, version
+
+
+async def save_routes(key: str, version: str, routes: List[dict]) -> None:
+    await RedisManager.set(
+        ROUTE_TREE_KEY.format(role_key=key),
+        json.dumps({"version": version, "routes": routes}),
+        expire=settings.ROUTE_TREE_EXPIRE_SECONDS,
+    )
+
+
+async def bump_menu_version() -> None:
+    """
+    Mark every cached route tree stale
+    """
+    await RedisManager.incr(MENU_VERSION_KEY)
@@ -1,10 +1,89 @@
+import time
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    """
+    Highest bcrypt cost whose hash time on this machine stays within target_ms
+
+    Each extra round doubles the work, so one timed hash at min_rounds is
+    enough to extrapolate.
+    """
+    from passlib.hash import bcrypt
+
+    start = time.perf_counter()
+    bcrypt.using(rounds=min_rounds).hash("calibration")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def configure_password_context() -> dict:
+    """
+    Rebuild pwd_context from settings, calibrating bcrypt rounds if needed
+
+    Hashes made with a weaker cost or a scheme other than
+    PASSWORD_HASH_SCHEME are reported by verify_and_update for rehashing.
+    :return: the applied policy
+    """
+    global pwd_context
+
+    rounds = settings.BCRYPT_ROUNDS or calibrate_bcrypt_rounds(
+        settings.PASSWORD_HASH_TARGET_MS,
+        settings.BCRYPT_MIN_ROUNDS,
+        settings.BCRYPT_MAX_ROUNDS,
+    )
+    policy = {"scheme": settings.PASSWORD_HASH_SCHEME, "bcrypt_rounds": rounds}
+    options = {"bcrypt__rounds": rounds, "bcrypt__min_rounds": rounds}
+
+    if settings.PASSWORD_HASH_SCHEME == "argon2":
+        from passlib.hash import argon2
+
+        if not argon2.has_backend():
+            raise RuntimeError(
+                "PASSWORD_HASH_SCHEME=argon2 requires the argon2-cffi package"
+            )
+        argon2_options = {
+            "time_cost": settings.ARGON2_TIME_COST,
+            "memory_cost": settings.ARGON2_MEMORY_COST,
+            "parallelism": settings.ARGON2_PARALLELISM,
+        }
+        options.update({f"argon2__{k}": v for k, v in argon2_options.items()})
+        policy.update(argon2_options)
+        schemes = ["argon2", "bcrypt"]
+    else:
+        schemes = ["bcrypt"]
+
+    pwd_context = CryptContext(
+        schemes=schemes, default=schemes[0], deprecated="auto", **options
+    )
+    return policy
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    # Hashes are made from the first 72 bytes, whatever the scheme
+    return pwd_context.verify(plain_password[:72], hashed_password)
+
+
+def verify_and_update(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a new hash if the stored one is outdated
+
+    :return: (valid, new hash or None)
+    """
+    return pwd_context.verify_and_update(plain_password[:72], hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -14,9 +93,9 @@ def get_password_hash(password: str) -> str:
 
 
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Union, Any
 from jose import jwt
-from app.core.config import settings
+from app.core.login_limiter import LoginAttempt, login_limiter
 from app.db.redis import RedisManager
 
 ALGORITHM = "HS256"
@@ -61,44 +140,27 @@ async def delete_login_token(token: str) -> None:
     await RedisManager.delete(f"login_token:{token}")
 
 
-async def save_login_attempt(username: str, attempts: int) -> None:
-    """
-    Save login attempts to Redis with expiration
-    """
-    await RedisManager.set(
-        f"login_attempts:{username}",
-        str(attempts),
-        expire=settings.LOGIN_LOCKOUT_MINUTES * 60,
-    )
-
-
-async def get_login_attempts(username: str) -> int:
-    """
-    Get login attempts from Redis
-    """
-    attempts_str = await RedisManager.get(f"login_attempts:{username}")
-    return int(attempts_str) if attempts_str else 0
-
-
-async def lock_user_account(username: str) -> None:
-    """
-    Lock user account in Redis with expiration
-    """
-    await RedisManager.set(
-        f"login_lockout:{username}", "1", expire=settings.LOGIN_LOCKOUT_MINUTES * 60
-    )
-
-
-async def is_user_locked(username: str) -> bool:
+async def reset_login_attempts(username: str) -> None:
     """
-    Check if user account is locked in Redis
+    Reset login attempts and lockout status for user
     """
-    return await RedisManager.get(f"login_lockout:{username}") is not None
+    await RedisManager.delete_many(login_limiter.user_keys(username))
 
 
-async def reset_login_attempts(username: str) -> None:
+async def complete_login(
+    username: str, token: str, user_id: int, attempt: Optional[LoginAttempt] = None
+) -> None:
     """
-    Reset login attempts and lockout status for user
+    Clear the failure state and store the new token in one round-trip;
+    the successful attempt is also taken back out of its IP counter
     """
-    await RedisManager.delete(f"login_attempts:{username}")
-    await RedisManager.delete(f"login_lockout:{username}")
+    async with RedisManager.pipeline() as pipe:
+        pipe.delete(*login_limiter.user_keys(username))
+        if attempt is not None:
+            login_limiter.forgive(pipe, attempt)
+        pipe.set(
+            f"login_token:{token}",
+            str(user_id),
+            ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+        await pipe.execute()
@@ -0,0 +1,173 @@
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.redis import RedisManager
+from app.models.sys.log import SysVisitDaily
+
+PV_KEY = "visit:pv:{day}"
+UV_KEY = "visit:uv:{day}"
+IP_KEY = "visit:ip:{day}"
+# All-time visitors, for the total UV figure
+UV_TOTAL_KEY = "visit:uv:total"
+
+
+class DailyVisits(NamedTuple):
+    pv: int = 0
+    uv: int = 0
+    ip: int = 0
+
+
+def _keys(day: date):
+    day = day.isoformat()
+    return PV_KEY.format(day=day), UV_KEY.format(day=day), IP_KEY.format(day=day)
+
+
+def visitor_of(row: Dict[str, Any]) -> Optional[str]:
+    user_id = row.get("user_id") or -1
+    if user_id > 0:
+        return f"u:{user_id}"
+    return f"ip:{row['ip']}" if row.get("ip") else None
+
+
+async def record_visits(rows: Iterable[Dict[str, Any]]) -> None:
+    """
+    Count a batch of access log rows into the per-day PV counters and the
+    UV / IP HyperLogLogs, in one round-trip
+    """
+    pv: Dict[date, int] = defaultdict(int)
+    visitors: Dict[date, set] = defaultdict(set)
+    ips: Dict[date, set] = defaultdict(set)
+    for row in rows:
+        day = row["create_time"].date()
+        pv[day] += 1
+        visitor = visitor_of(row)
+        if visitor:
+            visitors[day].add(visitor)
+        if row.get("ip"):
+            ips[day].add(row["ip"])
+    if not pv:
+        return
+
+    # Day keys only need to outlive the nightly rollup
+    expire = settings.VISIT_STATS_KEEP_DAYS * 86400
+    async with RedisManager.pipeline() as pipe:
+        for day, count in pv.items():
+            pv_key, uv_key, ip_key = _keys(day)
+            pipe.incrby(pv_key, count).expire(pv_key, expire)
+            if visitors[day]:
+                pipe.pfadd(uv_key, *visitors[day]).expire(uv_key, expire)
+                pipe.pfadd(UV_TOTAL_KEY, *visitors[day])
+            if ips[day]:
+                pipe.pfadd(ip_key, *ips[day]).expire(ip_key, expire)
+        await pipe.execute()
+
+
+async def live_visits(days: List[date]) -> Dict[date, DailyVisits]:
+    """
+    Counts still held in Redis; days whose keys are gone are left out
+    """
+    if not days:
+        return {}
+    async with RedisManager.pipeline() as pipe:
+        for day in days:
+            pv_key, uv_key, ip_key = _keys(day)
+            pipe.get(pv_key).pfcount(uv_key).pfcount(ip_key)
+        results = await pipe.execute()
+
+    visits = {}
+    for index, day in enumerate(days):
+        pv, uv, ip = results[index * 3 : index * 3 + 3]
+        if pv is not None:
+            visits[day] = DailyVisits(int(pv), uv, ip)
+    return visits
+
+
+async def daily_visits(db: AsyncSession, start: date, end: date) -> Dict[date, DailyVisits]:
+    """
+    Counts per day from start to end inclusive: rolled up days from
+    sys_visit_daily, the rest (today, or a day the rollup hasn't reached
+    yet) from Redis
+    """
+    result = await db.execute(
+        select(
+            SysVisitDaily.stat_date, SysVisitDaily.pv, SysVisitDaily.uv, SysVisitDaily.ip_count
+        ).where(SysVisitDaily.stat_date.between(start, end))
+    )
+    visits = {row.stat_date: DailyVisits(row.pv, row.uv, row.ip_count) for row in result}
+
+    oldest_live = date.today() - timedelta(days=settings.VISIT_STATS_KEEP_DAYS)
+    days = (start + timedelta(days=offset) for offset in range((end - start).days + 1))
+    pending = [day for day in days if day not in visits and day >= oldest_live]
+    visits.update(await live_visits(pending))
+    return visits
+
+
+async def total_pv(db: AsyncSession, today: date, today_pv: int) -> int:
+    rolled_up = await db.scalar(
+        select(func.coalesce(func.sum(SysVisitDaily.pv), 0)).where(
+            SysVisitDaily.stat_date < today
+        )
+    )
+    return int(rolled_up) + today_pv
+
+
+async def total_uv() -> int:
+    return await RedisManager.pfcount(UV_TOTAL_KEY)
+
+
+async def rollup(db: AsyncSession, days: List[date]) -> int:
+    """
+    Copy the Redis counts of the given days into sys_visit_daily; safe to
+    run again for the same days
+    :return: number of days written
+    """
+    visits = await live_visits(days)
+    for day, counts in visits.items():
+        stmt = mysql_insert(SysVisitDaily).values(
+            stat_date=day, pv=counts.pv, uv=counts.uv, ip_count=counts.ip
+        )
+        stmt = stmt.on_duplicate_key_update(
+            pv=stmt.inserted.pv,
+            uv=stmt.inserted.uv,
+            ip_count=stmt.inserted.ip_count,
+            update_time=func.now(),
+        )
+        await db.execute(stmt)
+    return len(visits)
+
+
+def rollup_days(today: date = None) -> List[date]:
+    """
+    Finished days still held in Redis, oldest first; rolling all of them up
+    covers nights the job didn't run
+    """
+    today = today or date.today()
+    return [
+        today - timedelta(days=offset)
+        for offset in range(settings.VISIT_STATS_KEEP_DAYS - 1, 0, -1)
+    ]
+
+
+async def run_nightly_rollup() -> None:
+    """
+    Roll up finished days shortly after every midnight
+    """
+    from app.db.session import SessionLocal
+
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        await asyncio.sleep((next_run - now).total_seconds() + settings.VISIT_ROLLUP_DELAY_SECONDS)
+        try:
+            async with SessionLocal() as db:
+                await rollup(db, rollup_days())
+                await db.commit()
+        except Exception as e:
+            print(f"visit rollup failed: {e}")
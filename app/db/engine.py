@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.core.config import settings
+
+# Engine defaults per DB_PROFILE; any DB_* setting that is not None wins.
+# prod recycles well below MySQL's wait_timeout and the usual proxy idle
+# limits, and pre-pings so a dropped connection costs a retry, not an error.
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "echo": False,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+        "query_cache_size": 500,
+    },
+    # Every test may run on its own event loop, so connections aren't pooled
+    "test": {
+        "echo": False,
+        "poolclass": NullPool,
+        "query_cache_size": 500,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "query_cache_size": 1200,
+    },
+}
+
+# Settings overriding the profile, by engine argument
+_OVERRIDES = {
+    "echo": "DB_ECHO",
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+    "pool_recycle": "DB_POOL_RECYCLE",
+    "pool_pre_ping": "DB_POOL_PRE_PING",
+    "query_cache_size": "DB_STATEMENT_CACHE_SIZE",
+}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts wait for a connection
+    (queueing, overflow connects and pre-ping included)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+def engine_options(profile: str = None) -> Dict[str, Any]:
+    profile = profile or settings.DB_PROFILE
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(
+            f"Unknown DB_PROFILE {profile!r}, expected one of {sorted(ENGINE_PROFILES)}"
+        )
+    options = dict(ENGINE_PROFILES[profile])
+    for argument, setting in _OVERRIDES.items():
+        value = getattr(settings, setting)
+        if value is not None:
+            options[argument] = value
+    if options.get("poolclass") is NullPool:
+        for argument in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            options.pop(argument, None)
+    else:
+        options.setdefault("poolclass", InstrumentedQueuePool)
+    return options
+
+
+def create_engine(url: str, profile: str = None) -> AsyncEngine:
+    return create_async_engine(url, **engine_options(profile))
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, Any]:
+    """
+    Live pool figures for sizing against MySQL max_connections
+    """
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return stats
+
+    stats.update(
+        {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        }
+    )
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            checkouts = pool.checkouts
+            stats.update(
+                {
+                    "checkouts": checkouts,
+                    "timeouts": pool.timeouts,
+                    "avg_wait_ms": round(pool.wait_seconds / checkouts * 1000, 3)
+                    if checkouts
+                    else 0.0,
+                    "max_wait_ms": round(pool.max_wait_seconds * 1000, 3),
+                }
+            )
+    return stats
@@ -0,0 +1,186 @@
+from typing import Dict, Iterable, List, Tuple, Type
+
+from sqlalchemy import delete, func, insert, literal, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.models.sys.dept import SysDept, SysDeptClosure
+from app.models.sys.menu import SysMenu, SysMenuClosure
+
+# Insert chunk size for rebuild()
+REBUILD_BATCH_SIZE = 1000
+
+
+class HierarchyIndex:
+    """
+    Closure table index over a parent_id/tree_path hierarchy.
+
+    The closure table holds one (ancestor_id, descendant_id, depth) row per
+    ancestor of every node, including the node itself at depth 0, so
+    "all descendants of X" and "move subtree X" are single set-based
+    statements instead of tree_path LIKE scans plus per-row updates.
+
+    Enabled by HIERARCHY_INDEX_ENABLED; run the backfill
+    (worker.database_worker.rebuild_hierarchy_index) before turning it on.
+    """
+
+    def __init__(self, node_model: Type, closure_model: Type):
+        self.node_model = node_model
+        self.closure_model = closure_model
+
+    @property
+    def enabled(self) -> bool:
+        return settings.HIERARCHY_INDEX_ENABLED
+
+    def descendant_ids(self, node_id: int, include_self: bool = False):
+        """
+        Select of descendant ids of node_id
+        """
+        closure = self.closure_model
+        stmt = select(closure.descendant_id).where(closure.ancestor_id == node_id)
+        if not include_self:
+            stmt = stmt.where(closure.depth > 0)
+        return stmt
+
+    def subtree_filter(self, node_id: int, tree_path_prefix: str):
+        """
+        Predicate matching the strict descendants of a node.
+
+        Uses the closure table when enabled, else the node's tree_path
+        prefix ("<parent tree_path>,<node id>").
+        """
+        node = self.node_model
+        if self.enabled:
+            return node.id.in_(self.descendant_ids(node_id))
+        return or_(
+            node.tree_path == tree_path_prefix,
+            node.tree_path.like(f"{tree_path_prefix},%"),
+        )
+
+    async def rewrite_tree_paths(
+        self, db: AsyncSession, node_id: int, old_prefix: str, new_prefix: str
+    ) -> None:
+        """
+        Swap the tree_path prefix of every descendant in one UPDATE
+        """
+        node = self.node_model
+        await db.execute(
+            update(node)
+            .where(self.subtree_filter(node_id, old_prefix))
+            .values(
+                tree_path=func.concat(
+                    new_prefix, func.substr(node.tree_path, len(old_prefix) + 1)
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def insert_node(self, db: AsyncSession, node_id: int, parent_id: int) -> None:
+        """
+        Add the closure rows of a new leaf node
+        """
+        if not self.enabled:
+            return
+        closure = self.closure_model
+        await db.execute(
+            insert(closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    closure.ancestor_id, literal(node_id), closure.depth + 1
+                ).where(closure.descendant_id == parent_id),
+            )
+        )
+        await db.execute(
+            insert(closure).values(ancestor_id=node_id, descendant_id=node_id, depth=0)
+        )
+
+    async def move_subtree(
+        self, db: AsyncSession, node_id: int, new_parent_id: int
+    ) -> None:
+        """
+        Re-link the subtree rooted at node_id under new_parent_id
+        """
+        if not self.enabled:
+            return
+        table = self.closure_model.__tablename__
+        # Drop links from the old ancestors to every node of the subtree
+        await db.execute(
+            text(
+                f"DELETE link FROM {table} AS link "
+                f"JOIN {table} AS anc ON anc.descendant_id = :node_id "
+                f"AND anc.depth > 0 AND link.ancestor_id = anc.ancestor_id "
+                f"JOIN {table} AS sub ON sub.ancestor_id = :node_id "
+                f"AND link.descendant_id = sub.descendant_id"
+            ),
+            {"node_id": node_id},
+        )
+        # Link the new parent's ancestors (and itself) to the subtree
+        closure = self.closure_model
+        above = aliased(closure)
+        below = aliased(closure)
+        await db.execute(
+            insert(closure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(
+                    above.ancestor_id,
+                    below.descendant_id,
+                    above.depth + below.depth + 1,
+                ).where(
+                    above.descendant_id == new_parent_id,
+                    below.ancestor_id == node_id,
+                ),
+            )
+        )
+
+    async def delete_nodes(self, db: AsyncSession, node_ids: Iterable[int]) -> None:
+        if not self.enabled:
+            return
+        closure = self.closure_model
+        await db.execute(delete(closure).where(closure.descendant_id.in_(list(node_ids))))
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Recompute the whole closure table from parent_id, returns the row count
+        """
+        node = self.node_model
+        closure = self.closure_model
+        result = await db.execute(select(node.id, node.parent_id))
+        parents: Dict[int, int] = dict(result.all())
+
+        await db.execute(delete(closure))
+        rows: List[dict] = []
+        total = 0
+        for node_id in parents:
+            for ancestor_id, depth in _ancestors(node_id, parents):
+                rows.append(
+                    {"ancestor_id": ancestor_id, "descendant_id": node_id, "depth": depth}
+                )
+            if len(rows) >= REBUILD_BATCH_SIZE:
+                await db.execute(insert(closure), rows)
+                total += len(rows)
+                rows = []
+        if rows:
+            await db.execute(insert(closure), rows)
+            total += len(rows)
+        return total
+
+
+def _ancestors(node_id: int, parents: Dict[int, int]) -> List[Tuple[int, int]]:
+    """
+    (ancestor_id, depth) pairs of a node, itself included, stopping on cycles
+    """
+    chain = [(node_id, 0)]
+    seen = {node_id}
+    current = parents.get(node_id)
+    depth = 1
+    while current in parents and current not in seen:
+        chain.append((current, depth))
+        seen.add(current)
+        current = parents.get(current)
+        depth += 1
+    return chain
+
+
+dept_hierarchy = HierarchyIndex(SysDept, SysDeptClosure)
+menu_hierarchy = HierarchyIndex(SysMenu, SysMenuClosure)
@@ -0,0 +1,104 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import MetaData, Table, exc, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models.sys.log import SysLog
+
+# Request logs are stored in one table per month, sys_log_YYYYMM, each a
+# copy of sys_log with the same indexes. InnoDB can't combine FULLTEXT
+# indexes with partitioning, so months are separate tables: a date range
+# only touches the months it covers, and retention drops whole tables.
+LOG_TABLE_PREFIX = "sys_log_"
+_MONTH_RE = re.compile(r"^sys_log_(\d{6})$")
+ER_TABLE_EXISTS = 1050
+
+_metadata = MetaData()
+_tables: Dict[str, Table] = {}
+# Months whose table this process has already created
+_created: Set[str] = set()
+
+
+def month_of(value: date) -> str:
+    return value.strftime("%Y%m")
+
+
+def log_table(month: str) -> Table:
+    table = _tables.get(month)
+    if table is None:
+        table = SysLog.__table__.to_metadata(_metadata, name=LOG_TABLE_PREFIX + month)
+        _tables[month] = table
+    return table
+
+
+def month_of_table(name: str) -> Optional[str]:
+    """
+    YYYYMM of a month table name, None for any other table
+    """
+    match = _MONTH_RE.match(name)
+    return match.group(1) if match else None
+
+
+def months_between(start: date, end: date) -> List[str]:
+    """
+    Months overlapping [start, end], newest first
+    """
+    months = []
+    year, month = end.year, end.month
+    while (year, month) >= (start.year, start.month):
+        months.append(f"{year:04d}{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+def month_start(month: str) -> datetime:
+    return datetime(int(month[:4]), int(month[4:]), 1)
+
+
+def month_end(month: str) -> datetime:
+    """
+    First instant of the following month
+    """
+    return (month_start(month) + timedelta(days=32)).replace(day=1)
+
+
+async def ensure_log_table(conn: AsyncConnection, month: str) -> Table:
+    table = log_table(month)
+    if month not in _created:
+        try:
+            await conn.run_sync(lambda sync_conn: table.create(sync_conn, checkfirst=True))
+        except exc.OperationalError as e:
+            # Another worker created it between the check and the CREATE
+            if e.orig.args[0] != ER_TABLE_EXISTS:
+                raise
+        _created.add(month)
+    return table
+
+
+def forget_log_table(month: str) -> None:
+    """
+    Called after a month table was dropped, so the next write recreates it
+    """
+    _created.discard(month)
+
+
+async def existing_log_months(db: AsyncSession, months: Iterable[str] = None) -> List[str]:
+    """
+    Months that have a table, newest first; limited to `months` if given
+    """
+    stmt = text(
+        "SELECT table_name FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name LIKE 'sys\\\\_log\\\\_%'"
+    )
+    result = await db.execute(stmt)
+    found = set()
+    for (name,) in result.all():
+        month = month_of_table(name)
+        if month:
+            found.add(month)
+    if months is not None:
+        found &= set(months)
+    return sorted(found, reverse=True)
+
@@ -1,34 +1,112 @@
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 import redis.asyncio as redis
+from redis.commands.core import AsyncScript
 from app.core.config import settings
 
+# INCRBY only on keys that already exist, floored at 0; missing counters
+# are left for the owner to recompute instead of starting from a wrong base
+INCRBY_EXISTING = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        if redis.call('INCRBY', key, ARGV[1]) < 0 then
+            redis.call('SET', key, 0, 'KEEPTTL')
+        end
+    end
+end
+return #KEYS
+"""
+
+GETDEL = """
+local value = redis.call('GET', KEYS[1])
+redis.call('DEL', KEYS[1])
+return value
+"""
+
+# DEL only while the key still holds the caller's value, so a lock that
+# expired and was taken by someone else is left alone
+DELETE_IF_EQUAL = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+CAPTCHA_KEY = "captcha:{key}"
+
+
 class RedisManager:
     _client: Optional[redis.Redis] = None
+    _scripts: Dict[str, AsyncScript] = {}
 
     @classmethod
     def get_client(cls) -> redis.Redis:
         if cls._client is None:
-            cls._client = redis.Redis(
+            pool = redis.ConnectionPool(
                 host=settings.REDIS_HOST,
                 port=settings.REDIS_PORT,
                 db=settings.REDIS_DB,
                 password=settings.REDIS_PASSWORD,
                 decode_responses=True,
                 encoding="utf-8",
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+                health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
             )
+            cls._client = redis.Redis(connection_pool=pool)
         return cls._client
 
+    @classmethod
+    def pipeline(cls, transaction: bool = False):
+        """
+        Queue several commands and send them in one round-trip:
+
+            async with RedisManager.pipeline() as pipe:
+                pipe.delete(a).set(b, "1")
+                await pipe.execute()
+        """
+        return cls.get_client().pipeline(transaction=transaction)
+
+    @classmethod
+    async def eval_script(
+        cls, source: str, keys: Sequence[str] = (), args: Sequence[Any] = ()
+    ) -> Any:
+        """
+        Run a Lua script atomically; it is loaded once and called by SHA
+        afterwards (EVALSHA, reloaded automatically after a SCRIPT FLUSH)
+        """
+        script = cls._scripts.get(source)
+        if script is None:
+            script = cls.get_client().register_script(source)
+            cls._scripts[source] = script
+        return await script(keys=list(keys), args=list(args))
+
     @classmethod
     async def close(cls):
         if cls._client:
-            await cls._client.close()
+            await cls._client.aclose()
+            # The pool was passed in explicitly, so the client won't close it
+            await cls._client.connection_pool.disconnect()
             cls._client = None
+            cls._scripts = {}
 
     @classmethod
     async def set(cls, key: str, value: str, expire: int = None):
         client = cls.get_client()
         await client.set(key, value, ex=expire)
 
+    @classmethod
+    async def set_nx(cls, key: str, value: str, expire: int = None) -> bool:
+        """
+        SET only if the key doesn't exist yet; True when it was set
+        """
+        client = cls.get_client()
+        return bool(await client.set(key, value, ex=expire, nx=True))
+
+    @classmethod
+    async def delete_if_equal(cls, key: str, value: str) -> bool:
+        return bool(await cls.eval_script(DELETE_IF_EQUAL, [key], [value]))
+
     @classmethod
     async def get(cls, key: str) -> Optional[str]:
         client = cls.get_client()
@@ -39,16 +117,98 @@ class RedisManager:
         client = cls.get_client()
         await client.delete(key)
 
+    @classmethod
+    async def mget(cls, *keys: str) -> List[Optional[str]]:
+        client = cls.get_client()
+        return await client.mget(keys)
+
+    @classmethod
+    async def delete_many(cls, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        client = cls.get_client()
+        await client.delete(*keys)
+
+    @classmethod
+    async def delete_matching(cls, pattern: str, batch_size: int = 1000) -> int:
+        """
+        Delete every key matching a glob pattern; SCAN walks the keyspace
+        in steps instead of blocking Redis the way KEYS would
+        """
+        client = cls.get_client()
+        deleted = 0
+        batch: List[str] = []
+        async for key in client.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += await client.delete(*batch)
+        return deleted
+
+    @classmethod
+    async def incr(cls, key: str) -> int:
+        client = cls.get_client()
+        return await client.incr(key)
+
+    @classmethod
+    async def pfcount(cls, *keys: str) -> int:
+        """
+        Estimated distinct members across the HyperLogLogs
+        """
+        client = cls.get_client()
+        return await client.pfcount(*keys)
+
+    @classmethod
+    async def incrby_existing(cls, keys: Iterable[str], amount: int):
+        keys = list(keys)
+        if not keys:
+            return
+        await cls.eval_script(INCRBY_EXISTING, keys, [amount])
+
+    @classmethod
+    async def mset(cls, mapping: Dict[str, str], expire: int = None):
+        """
+        Set several keys in one round-trip (MSET has no expiry, so a
+        pipeline of SET ... EX is used)
+        """
+        if not mapping:
+            return
+        async with cls.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=expire)
+            await pipe.execute()
+
+    @classmethod
+    async def getdel(cls, key: str) -> Optional[str]:
+        """
+        GET and DELETE in one atomic round-trip; Lua on Redis < 6.2
+        """
+        client = cls.get_client()
+        try:
+            return await client.getdel(key)
+        except redis.ResponseError:
+            return await cls.eval_script(GETDEL, [key])
+
     @classmethod
     async def save_captcha(cls, code: str, expire: int = 300) -> str:
         """
-        save captcha code
+        save captcha code under captcha:{uuid}
         :param code:
         :param expire:
-        :return:
+        :return: the uuid part of the key
         """
         import uuid
         key = str(uuid.uuid4())
         client = cls.get_client()
-        await client.set(key, code, ex=expire)
+        await client.set(CAPTCHA_KEY.format(key=key), code, ex=expire)
         return key
+
+    @classmethod
+    async def pop_captcha(cls, key: str) -> Optional[str]:
+        """
+        Fetch a captcha answer and invalidate it, so it can be tried once
+        """
+        return await cls.getdel(CAPTCHA_KEY.format(key=key))
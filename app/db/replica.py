@@ -0,0 +1,71 @@
+import itertools
+import time
+from collections import OrderedDict
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.engine import create_engine
+from app.db.redis import RedisManager
+from app.db.request_session import LazySession, track_request_session
+
+RECENT_WRITE_KEY = "ryw:{principal}"
+
+
+class ReplicaRouter:
+    """
+    Round-robin over read replica session factories, with a
+    read-your-writes window.
+
+    A principal that wrote within the last `window` seconds reads from the
+    primary, so it never sees a replica that hasn't caught up with its own
+    change. Writes are recorded in Redis (shared by all workers) and in a
+    local map that answers repeat reads on the same worker without a hop.
+    """
+
+    def __init__(self, sessionmakers: List[async_sessionmaker], window: int):
+        self.sessionmakers = sessionmakers
+        self.window = window
+        self._cycle = itertools.cycle(sessionmakers) if sessionmakers else None
+        self._local: "OrderedDict[str, float]" = OrderedDict()
+        self._local_max_size = settings.PRINCIPAL_CACHE_MAX_SIZE
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.sessionmakers)
+
+    def replica_session(self) -> AsyncSession:
+        session = next(self._cycle)()
+        track_request_session(session)
+        return session
+
+    async def mark_write(self, principal: str) -> None:
+        self._local.pop(principal, None)
+        self._local[principal] = time.monotonic() + self.window
+        while len(self._local) > self._local_max_size:
+            self._local.popitem(last=False)
+        await RedisManager.set(
+            RECENT_WRITE_KEY.format(principal=principal), "1", expire=self.window
+        )
+
+    async def wrote_recently(self, principal: str) -> bool:
+        expires_at = self._local.get(principal)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                return True
+            del self._local[principal]
+        return await RedisManager.get(RECENT_WRITE_KEY.format(principal=principal)) is not None
+
+
+replica_engines = [create_engine(uri) for uri in settings.SQLALCHEMY_REPLICA_URIS]
+
+replica_router = ReplicaRouter(
+    [
+        async_sessionmaker(
+            autocommit=False, autoflush=False, bind=engine, class_=LazySession
+        )
+        for engine in replica_engines
+    ],
+    window=settings.READ_YOUR_WRITES_SECONDS,
+)
@@ -0,0 +1,162 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds (ms) of the hold time histogram buckets
+HOLD_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class HoldTimeStats:
+    """
+    How long each request kept a pooled connection checked out
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        # Requests that never touched the database
+        self.without_connection = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(HOLD_BUCKETS_MS) + 1)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            if seconds == 0:
+                self.without_connection += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.buckets[bisect.bisect_left(HOLD_BUCKETS_MS, seconds * 1000)] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            labels = [f"<={ms}ms" for ms in HOLD_BUCKETS_MS] + [f">{HOLD_BUCKETS_MS[-1]}ms"]
+            return {
+                "requests": self.requests,
+                "without_connection": self.without_connection,
+                "avg_hold_ms": round(self.total_seconds / self.requests * 1000, 3)
+                if self.requests
+                else 0.0,
+                "max_hold_ms": round(self.max_seconds * 1000, 3),
+                "histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+hold_time_stats = HoldTimeStats()
+
+
+class TrackedSession(Session):
+    """
+    Sync session that accumulates the time a connection is held; the
+    connection is checked out when a transaction begins and returned when
+    the root transaction ends
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.held_since: Optional[float] = None
+        self.hold_seconds = 0.0
+        self.has_flushed = False
+
+
+@event.listens_for(TrackedSession, "after_begin")
+def _connection_acquired(session, transaction, connection):
+    if session.held_since is None:
+        session.held_since = time.perf_counter()
+
+
+@event.listens_for(TrackedSession, "after_transaction_end")
+def _connection_released(session, transaction):
+    if transaction.parent is None and session.held_since is not None:
+        session.hold_seconds += time.perf_counter() - session.held_since
+        session.held_since = None
+        session.has_flushed = False
+
+
+@event.listens_for(TrackedSession, "after_flush")
+def _flushed(session, flush_context):
+    session.has_flushed = True
+
+
+class LazySession(AsyncSession):
+    """
+    Request session that holds a pooled connection only while queries run.
+
+    Like any AsyncSession it checks a connection out on the first execute;
+    release() hands it back as soon as the caller is done reading, instead
+    of keeping it until the request ends. Loaded objects stay usable
+    (detached, attributes kept) and the next query checks out again.
+    """
+
+    sync_session_class = TrackedSession
+
+    async def release(self) -> None:
+        sync = self.sync_session
+        # Never drop pending or flushed-but-uncommitted changes
+        if sync.new or sync.dirty or sync.deleted or sync.has_flushed:
+            return
+        if self.in_transaction():
+            await self.close()
+
+    @property
+    def hold_seconds(self) -> float:
+        sync = self.sync_session
+        held = sync.hold_seconds
+        if sync.held_since is not None:
+            held += time.perf_counter() - sync.held_since
+        return held
+
+
+# Sessions opened for the current request, filled by get_db
+_request_sessions: ContextVar[Optional[List[LazySession]]] = ContextVar(
+    "request_sessions", default=None
+)
+
+
+def track_request_session(session: LazySession) -> None:
+    sessions = _request_sessions.get()
+    if sessions is not None:
+        sessions.append(session)
+
+
+class SessionReleaseMiddleware:
+    """
+    Releases request sessions once the handler has produced its response,
+    so the connection isn't held while the body is sent, and records the
+    request's connection hold time
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sessions: List[LazySession] = []
+        token = _request_sessions.set(sessions)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                for session in sessions:
+                    await session.release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sessions.reset(token)
+            if sessions:
+                hold_time_stats.record(sum(s.hold_seconds for s in sessions))
@@ -1,12 +1,15 @@
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from app.core.config import settings
+from app.db.engine import create_engine
+from app.db.request_session import LazySession
 
-engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, echo=True)
+# Pool sizing, recycle, pre-ping and echo come from the DB_PROFILE profile
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
 
 SessionLocal = async_sessionmaker(
     autocommit=False, 
     autoflush=False, 
     bind=engine,
-    class_=AsyncSession
+    class_=LazySession
 )
@@ -1,9 +1,17 @@
+import asyncio
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from app.core.config import settings
-from app.api.v1.api import api_router
+from app.api.v1.api import api_router, rate_limits
+from app.core.access_log import AccessLogMiddleware, access_log_writer
 from app.core.codes import ErrorCode
+from app.core.captcha import captcha_pool
+from app.core.hashing import PasswordHasherBusy, password_hasher
+from app.core.rate_limit import RateLimit, RateLimitMiddleware, TokenBucketLimiter
+from app.core.visit_stats import run_nightly_rollup
+from app.db.request_session import SessionReleaseMiddleware
+from app.schemas.response import ResponseSchema
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -35,8 +43,84 @@ app = FastAPI(
 #         )
 
 
+@app.on_event("startup")
+async def configure_password_hashing():
+    """按配置的目标耗时校准bcrypt轮数"""
+    await password_hasher.configure()
+
+
+@app.on_event("startup")
+async def start_captcha_pool():
+    """加载验证码字体并预生成验证码"""
+    await captcha_pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_captcha_pool():
+    captcha_pool.stop()
+
+
+@app.on_event("startup")
+async def start_access_log_writer():
+    """启动访问日志批量写入任务"""
+    if settings.ACCESS_LOG_ENABLED:
+        await access_log_writer.start()
+
+
+@app.on_event("shutdown")
+async def stop_access_log_writer():
+    """写入队列中剩余的访问日志"""
+    if settings.ACCESS_LOG_ENABLED:
+        await access_log_writer.stop()
+
+
+@app.on_event("startup")
+async def start_visit_rollup():
+    """每晚把前一天的访问计数从 Redis 汇总到 sys_visit_daily"""
+    if settings.ACCESS_LOG_ENABLED:
+        app.state.visit_rollup_task = asyncio.create_task(run_nightly_rollup())
+
+
+@app.on_event("shutdown")
+async def stop_visit_rollup():
+    task = getattr(app.state, "visit_rollup_task", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """密码哈希线程池已满时快速返回503, 而不是继续排队"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+        content=ResponseSchema(
+            code=ErrorCode.SERVICE_BUSY,
+            message="Server is busy, please try again later",
+            result=None,
+        ).model_dump(),
+    )
+
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+app.add_middleware(SessionReleaseMiddleware)
+
+if settings.ACCESS_LOG_ENABLED:
+    app.add_middleware(
+        AccessLogMiddleware, writer=access_log_writer, prefix=settings.API_V1_STR
+    )
+
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits={settings.API_V1_STR + prefix: limit for prefix, limit in rate_limits.items()},
+        default=RateLimit(
+            rate=settings.RATE_LIMIT_DEFAULT_RATE, burst=settings.RATE_LIMIT_DEFAULT_BURST
+        ),
+        limiter=TokenBucketLimiter(sync_interval=settings.RATE_LIMIT_SYNC_SECONDS),
+    )
+
 
 @app.get("/")
 async def root():
@@ -1,6 +1,7 @@
-from .notice import SysNotice, SysUserNotice
-from .dept import SysDept
+from .notice import SysNotice, SysNoticeTarget, SysUserNotice
+from .dept import SysDept, SysDeptClosure
+from .log import SysLog, SysVisitDaily
 from .dictionary import SysDict, SysDictItem
-from .menu import SysMenu, SysRoleMenu
+from .menu import SysMenu, SysMenuClosure, SysRoleMenu
 from .role import SysRole
 from .user import SysUser, SysUserRoleRef
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Index, SmallInteger, String, Integer
+from app.db.base import Base
 from app.models.base import BaseModel
 
 
@@ -15,3 +16,15 @@ class SysDept(BaseModel):
     status: int = Column(SmallInteger, default=1, comment="状态(1-正常 0-禁用)")
 
     __table_args__ = (Index("uk_code", "code", unique=True, mysql_length=100),)
+
+
+class SysDeptClosure(Base):
+    """部门层级闭包表(祖先-后代关系, 含自身 depth=0)"""
+
+    __tablename__ = "sys_dept_closure"
+
+    ancestor_id: int = Column(Integer, primary_key=True, comment="祖先部门id")
+    descendant_id: int = Column(Integer, primary_key=True, comment="后代部门id")
+    depth: int = Column(Integer, nullable=False, default=0, comment="层级距离")
+
+    __table_args__ = (Index("idx_descendant", "descendant_id", "ancestor_id"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, SmallInteger, String
+from sqlalchemy import Column, Index, Integer, SmallInteger, String
 from app.models.base import BaseModel
 
 class SysDict(BaseModel):
@@ -11,6 +11,9 @@ class SysDict(BaseModel):
     status: int = Column(SmallInteger, default=1, comment="状态(0:正常;1:禁用)")
     sort: int = Column(Integer, default=0, comment="排序")
 
+    # keyset分页按(sort, id)排序
+    __table_args__ = (Index("idx_sort_id", "sort", "id"),)
+
 
 class SysDictItem(BaseModel):
     """字典项表"""
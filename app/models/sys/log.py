@@ -1,7 +1,10 @@
+from datetime import date
 from sqlalchemy import (
     BigInteger,
+    Date,
     SmallInteger,
     Column,
+    Index,
     String,
     Text,
     Integer
@@ -9,6 +12,8 @@ from sqlalchemy import (
 from app.models.base import BaseModel
 
 class SysLog(BaseModel):
+    """请求日志表结构; 数据按月写入 sys_log_YYYYMM (见 app/db/log_tables.py)"""
+
     __tablename__ = "sys_log"
 
     user_id: int = Column(Integer, nullable=True, default=-1, comment="用户id")
@@ -27,3 +32,21 @@ class SysLog(BaseModel):
     browser_version: str | None = Column(String(100))
     os: str | None = Column(String(100))
     status_code: int | None = Column(SmallInteger)
+
+    __table_args__ = (
+        Index("idx_create_user", "create_time", "user_id"),
+        Index("idx_uri_create", "request_uri", "create_time"),
+        # ngram so Chinese log content is searchable too
+        Index("ft_content", "content", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
+
+class SysVisitDaily(BaseModel):
+    """访问统计日汇总表(由 Redis 计数每晚汇总)"""
+
+    __tablename__ = "sys_visit_daily"
+
+    stat_date: date = Column(Date, nullable=False, unique=True, comment="统计日期")
+    pv: int = Column(BigInteger, nullable=False, default=0, comment="访问量")
+    uv: int = Column(Integer, nullable=False, default=0, comment="独立访客数")
+    ip_count: int = Column(Integer, nullable=False, default=0, comment="独立IP数")
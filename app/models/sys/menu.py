@@ -9,7 +9,9 @@ from sqlalchemy import (
     String,
     UniqueConstraint,
     Enum,
+    Index,
 )
+from app.db.base import Base
 from app.models.base import BaseModel
 from app.globals.enum import MenuType
 
@@ -47,3 +49,15 @@ class SysRoleMenu(BaseModel):
     menu_id: int = Column(Integer, nullable=False)
 
     __table_args__ = (UniqueConstraint("role_id", "menu_id"),)
+
+
+class SysMenuClosure(Base):
+    """菜单层级闭包表(祖先-后代关系, 含自身 depth=0)"""
+
+    __tablename__ = "sys_menu_closure"
+
+    ancestor_id: int = Column(Integer, primary_key=True, comment="祖先菜单id")
+    descendant_id: int = Column(Integer, primary_key=True, comment="后代菜单id")
+    depth: int = Column(Integer, nullable=False, default=0, comment="层级距离")
+
+    __table_args__ = (Index("idx_descendant", "descendant_id", "ancestor_id"),)
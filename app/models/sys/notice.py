@@ -6,6 +6,7 @@ from sqlalchemy import (
     SmallInteger,
     String,
     Text,
+    Index,
     Integer,
     UniqueConstraint,
 )
@@ -23,11 +24,27 @@ class SysNotice(BaseModel):
     level: str = Column(String(50), nullable=False)
     target_type: int = Column(SmallInteger, nullable=False)
     target_user_ids_str: str | None = Column(Text)
-    publisher_id: int | None = Column(Integer)
+    publisher_id: int | None = Column(Integer, index=True)
     publish_status: int = Column(SmallInteger, default=0)
     publish_time: datetime | None = Column(DateTime)
     revoke_time: datetime | None = Column(DateTime)
 
+    __table_args__ = (Index("idx_publish", "publish_status", "publish_time"),)
+
+
+class SysNoticeTarget(BaseModel):
+    """通知公告指定接收人表(target_type=1时, 由target_user_ids_str同步)"""
+
+    __tablename__ = "sys_notice_target"
+
+    notice_id: int = Column(Integer, nullable=False)
+    user_id: int = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("notice_id", "user_id"),
+        Index("idx_user_notice", "user_id", "notice_id"),
+    )
+
 
 class SysUserNotice(BaseModel):
     """用户通知公告表"""
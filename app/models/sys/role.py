@@ -7,6 +7,7 @@ from sqlalchemy import (
     SmallInteger,
     String,
     Enum,
+    Index,
 )
 from app.models.base import BaseModel
 from app.globals.enum import RoleDataScope
@@ -24,3 +25,6 @@ class SysRole(BaseModel):
     data_scope: RoleDataScope = Column[Enum](
         Enum(RoleDataScope), default=RoleDataScope.ALL, comment="数据范围"
     )
+
+    # keyset分页按(create_time, id)倒序
+    __table_args__ = (Index("idx_create_time_id", "create_time", "id"),)
@@ -11,7 +11,7 @@ class SysUser(BaseModel):
     nickname: str | None = Column(String(64))
     gender: int = Column(SmallInteger, default=1, comment="性别")
     hashed_password: str | None = Column(String(100))
-    dept_id: int | None = Column(Integer)
+    dept_id: int | None = Column(Integer, index=True)
     avatar: str | None = Column(String(255))
     phone_number: str | None = Column(String(20))
     status: int = Column(SmallInteger, default=1)
@@ -1,5 +1,9 @@
-from typing import Generic, TypeVar, Optional, Any, Union
+import base64
+import json
+from datetime import date, datetime
+from typing import Callable, Generic, List, Sequence, Tuple, TypeVar, Optional, Any, Union
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
 from app.core.codes import ErrorCode
 
 T = TypeVar("T")
@@ -34,6 +38,125 @@ class PageSchema(BaseModel, Generic[T]):
     """总记录数"""
 
 
+class CursorPageSchema(BaseModel, Generic[T]):
+    """游标分页响应Schema
+
+    keyset分页的响应数据格式, 翻页代价与页码无关。next_cursor为空表示没有下一页。
+    """
+
+    list: list[T]
+    """分页数据列表"""
+    next_cursor: Optional[str] = None
+    """下一页游标"""
+    total: Optional[int] = None
+    """总记录数, 仅在请求with_total时返回"""
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """把(排序键, id)编码为不透明游标"""
+    if isinstance(sort_value, datetime):
+        payload = {"t": "dt", "v": sort_value.isoformat()}
+    elif isinstance(sort_value, date):
+        payload = {"t": "d", "v": sort_value.isoformat()}
+    else:
+        payload = {"v": sort_value}
+    payload["id"] = row_id
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[Any, int]]:
+    """解码游标, 空游标表示第一页; 非法游标抛出ValueError"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        elif payload.get("t") == "d":
+            value = date.fromisoformat(value)
+        return value, int(payload["id"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset_paginate(
+    stmt,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    size: int,
+    descending: bool = False,
+    nullable: bool = False,
+):
+    """给查询加上keyset分页条件
+
+    按(sort_column, id_column)排序(sort_column为None时只按id排序),
+    从游标位置之后取size+1条, 多取的一条用于判断是否还有下一页,
+    交给cursor_page处理。cursor为空字符串时表示第一页。
+    sort_column可为空时传入nullable=True: NULL按MySQL的规则排在升序最前、
+    降序最后, 游标条件对NULL单独分支, 仍直接比较原列, 可以走(sort, id)索引。
+    """
+    position = decode_cursor(cursor)
+    if sort_column is None:
+        # 仅按id排序
+        if position is not None:
+            last_id = position[1]
+            stmt = stmt.where(id_column < last_id if descending else id_column > last_id)
+        order = (id_column.desc() if descending else id_column.asc(),)
+        return stmt.order_by(None).order_by(*order).limit(size + 1)
+
+    if position is not None:
+        value, last_id = position
+        if value is None:
+            if not nullable:
+                raise ValueError("Invalid cursor")
+            # 游标停在NULL段内: 升序时其后还有全部非NULL行, 降序时NULL段在最后
+            after_id = id_column < last_id if descending else id_column > last_id
+            condition = and_(sort_column.is_(None), after_id)
+            if not descending:
+                condition = or_(condition, sort_column.is_not(None))
+        elif descending:
+            condition = or_(
+                sort_column < value,
+                and_(sort_column == value, id_column < last_id),
+            )
+            if nullable:
+                condition = or_(condition, sort_column.is_(None))
+        else:
+            condition = or_(
+                sort_column > value,
+                and_(sort_column == value, id_column > last_id),
+            )
+        stmt = stmt.where(condition)
+    if descending:
+        order = (sort_column.desc(), id_column.desc())
+    else:
+        order = (sort_column.asc(), id_column.asc())
+    return stmt.order_by(None).order_by(*order).limit(size + 1)
+
+
+def cursor_page(
+    rows: Sequence[Any], size: int, key: Callable[[Any], Tuple[Any, int]]
+) -> Tuple[List[Any], Optional[str]]:
+    """截取当前页并生成下一页游标
+
+    Args:
+        rows: keyset_paginate查询结果(最多size+1条)
+        size: 每页条数
+        key: 从一行中取出(排序键, id)
+
+    Returns:
+        (当前页数据, 下一页游标)
+    """
+    page = list(rows[:size])
+    if len(rows) <= size or not page:
+        return page, None
+    return page, encode_cursor(*key(page[-1]))
+
+
 def response(
     code: str = ErrorCode.SUCCESS, message: str = "Success", data: Optional[T] = None
 ) -> ResponseSchema[T]:
@@ -14,6 +14,8 @@ class TokenPayload(BaseModel):
 class Login(BaseModel):
     username: str
     password: str
+    captcha_key: Optional[str] = None
+    captcha_code: Optional[str] = None
 
 class Captcha(BaseModel):
     captcha_key: str
@@ -1,15 +1,39 @@
 import base64
 import io
 import random
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
 
-def generate_captcha(
+# Common system fonts, the first one that loads is used
+FONT_PATHS = [
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/Helvetica.ttc",
+    "arial.ttf",
+    "Arial.ttf",
+]
+
+
+@lru_cache(maxsize=None)
+def load_font(font_size: int = 28):
+    """
+    Load the captcha font once per size; lookup and parsing are too slow
+    to repeat for every image
+    """
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, font_size)
+        except IOError:
+            continue
+    return ImageFont.load_default()
+
+
+def render_captcha(
     width=120, height=40, line_count=5, dot_count=30, font_size=28
 ):
     """
-    Generate captcha image
-    return: (base64_str, result_str)
+    Render a captcha image
+    return: (png_bytes, result_str)
     """
     # 1. Random numbers and operator
     a = random.randint(1, 20)
@@ -35,26 +59,7 @@ def generate_captcha(
     draw = ImageDraw.Draw(img)
 
     # 3. Load font
-    try:
-        # Try common system fonts
-        font_paths = [
-            "/System/Library/Fonts/PingFang.ttc",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "arial.ttf",
-            "Arial.ttf"
-        ]
-        font = None
-        for path in font_paths:
-            try:
-                font = ImageFont.truetype(path, font_size)
-                break
-            except IOError:
-                continue
-        
-        if font is None:
-             font = ImageFont.load_default()
-    except Exception:
-        font = ImageFont.load_default()
+    font = load_font(font_size)
 
     # 4. Draw text
     # text_bbox is safer than text_size in newer Pillow
@@ -85,10 +90,19 @@ def generate_captcha(
     # 7. Save to BytesIO
     buffer = io.BytesIO()
     img.save(buffer, format="PNG")
-    img_bytes = buffer.getvalue()
-    
+    return buffer.getvalue(), str(result)
+
+
+def generate_captcha(
+    width=120, height=40, line_count=5, dot_count=30, font_size=28
+):
+    """
+    Generate captcha image
+    return: (base64_str, result_str)
+    """
+    img_bytes, result = render_captcha(width, height, line_count, dot_count, font_size)
     b64_str = base64.b64encode(img_bytes).decode("ascii")
-    return b64_str, str(result)
+    return b64_str, result
 
 
 def random_color():
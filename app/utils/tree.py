@@ -0,0 +1,71 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+N = TypeVar("N")
+T = TypeVar("T")
+
+
+def set_children_key(node: dict, children: List[dict]) -> None:
+    node["children"] = children
+
+
+def set_children_attr(node: Any, children: List[Any]) -> None:
+    node.children = children
+
+
+def build_tree(
+    nodes: Iterable[N],
+    root_id: Any,
+    project: Callable[[N], T],
+    attach: Callable[[T, List[T]], None] = set_children_key,
+    include: Optional[Callable[[N], bool]] = None,
+    sort_key: Optional[Callable[[N], Any]] = None,
+    id_of: Callable[[N], Any] = lambda n: n.id,
+    parent_of: Callable[[N], Any] = lambda n: n.parent_id,
+) -> List[T]:
+    """
+    Assemble a flat parent_id list into a tree in O(n)
+
+    Siblings keep the input order (or sort_key order if given), children are
+    only attached to nodes that have any, and nodes not reachable from
+    root_id are left out. Excluded nodes drop their whole subtree.
+
+    :param nodes: flat node list
+    :param root_id: parent id of the top level nodes; None makes every node
+        whose parent is not in the list a top level node
+    :param project: turns a source node into an output node (dict, schema...)
+    :param attach: sets the children list on an output node
+    :param include: optional filter on source nodes
+    :param sort_key: optional sibling ordering
+    :return: list of top level output nodes
+    """
+    included = [node for node in nodes if include is None or include(node)]
+    children_of: Dict[Any, List[N]] = defaultdict(list)
+    for node in included:
+        children_of[parent_of(node)].append(node)
+
+    if root_id is None:
+        ids = {id_of(node) for node in included}
+        children_of[None] = [node for node in included if parent_of(node) not in ids]
+
+    if sort_key is not None:
+        for siblings in children_of.values():
+            siblings.sort(key=sort_key)
+
+    roots = [project(node) for node in children_of.get(root_id, [])]
+    # Iterative walk so deep hierarchies can't hit the recursion limit
+    stack = list(zip(children_of.get(root_id, []), roots))
+    visited = set()
+    while stack:
+        node, projected = stack.pop()
+        node_id = id_of(node)
+        if node_id in visited:
+            continue
+        visited.add(node_id)
+        child_nodes = children_of.get(node_id)
+        if not child_nodes:
+            continue
+        children = [project(child) for child in child_nodes]
+        attach(projected, children)
+        stack.extend(zip(child_nodes, children))
+    return roots
@@ -0,0 +1,118 @@
+"""
+Benchmark: per-notice "mark all read" loop vs. the single INSERT ... SELECT
+... ON DUPLICATE KEY UPDATE in app.api.v1.admin.sys.notice.mark_all_read
+
+Needs the MySQL database from .env with the notice tables created. Seed
+rows are written inside a transaction that is rolled back after each run.
+
+usage: python benchmarks/notice_read_all.py
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.api.v1.admin.sys.notice import mark_all_read
+from app.core.config import settings
+from app.models.sys.notice import SysNotice, SysUserNotice
+
+SIZES = [100, 1_000, 5_000]
+# Benchmark user, far away from real ids
+USER_ID = 9_000_000
+# Share of notices the user has already seen (unread rows exist)
+SEEN_RATIO = 0.3
+
+
+async def seed(db: AsyncSession, size: int) -> None:
+    now = datetime.now()
+    await db.execute(
+        insert(SysNotice),
+        [
+            {
+                "title": f"bench {i}",
+                "type": "1",
+                "level": "L",
+                "target_type": 0,
+                "publish_status": 1,
+                "publish_time": now,
+            }
+            for i in range(size)
+        ],
+    )
+    notice_ids = (
+        await db.scalars(select(SysNotice.id).where(SysNotice.title.like("bench %")))
+    ).all()
+    seen = notice_ids[: int(len(notice_ids) * SEEN_RATIO)]
+    if seen:
+        await db.execute(
+            insert(SysUserNotice),
+            [{"notice_id": nid, "user_id": USER_ID, "is_read": False} for nid in seen],
+        )
+
+
+async def legacy_mark_all_read(db: AsyncSession, user_id: int) -> None:
+    # The previous implementation: one SELECT per notice, one INSERT per miss
+    notices = (
+        await db.scalars(select(SysNotice).where(SysNotice.publish_status == 1))
+    ).all()
+    for notice in notices:
+        is_target = notice.target_type == 0 or (
+            notice.target_user_ids_str
+            and str(user_id) in notice.target_user_ids_str.split(",")
+        )
+        if not is_target:
+            continue
+        un = await db.scalar(
+            select(SysUserNotice).where(
+                and_(
+                    SysUserNotice.notice_id == notice.id,
+                    SysUserNotice.user_id == user_id,
+                )
+            )
+        )
+        if not un:
+            db.add(
+                SysUserNotice(
+                    notice_id=notice.id,
+                    user_id=user_id,
+                    is_read=True,
+                    read_time=datetime.now(),
+                )
+            )
+        elif not un.is_read:
+            un.is_read = True
+            un.read_time = datetime.now()
+    await db.flush()
+
+
+async def timed(engine, size: int, fn) -> float:
+    async with AsyncSession(engine) as db:
+        async with db.begin():
+            await seed(db, size)
+            start = time.perf_counter()
+            await fn(db, USER_ID)
+            elapsed = (time.perf_counter() - start) * 1000
+            await db.rollback()
+    return elapsed
+
+
+async def main():
+    engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI)
+    print(f"{'notices':>8} {'per-notice (ms)':>16} {'upsert (ms)':>16}")
+    try:
+        for size in SIZES:
+            legacy = await timed(engine, size, legacy_mark_all_read)
+            upsert = await timed(engine, size, mark_all_read)
+            print(f"{size:>8} {legacy:16.1f} {upsert:16.1f}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Micro benchmark: recursive tree builder vs. app.utils.tree.build_tree
+
+usage: python benchmarks/tree_build.py
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.tree import build_tree
+
+SIZES = [1_000, 10_000, 100_000]
+# The recursive builder is O(n^2), don't wait on it for the large sizes
+LEGACY_MAX_SIZE = 10_000
+
+
+def make_nodes(n: int):
+    nodes = []
+    for i in range(1, n + 1):
+        parent_id = 0 if i <= 10 else random.randint(1, i - 1)
+        nodes.append(SimpleNamespace(id=i, parent_id=parent_id, sort=i % 7))
+    nodes.sort(key=lambda node: node.sort)
+    return nodes
+
+
+def project(node) -> dict:
+    return {"id": node.id, "sort": node.sort}
+
+
+def legacy_build(nodes, parent_id):
+    tree = []
+    for node in nodes:
+        if node.parent_id == parent_id:
+            item = project(node)
+            children = legacy_build(nodes, node.id)
+            if children:
+                item["children"] = children
+            tree.append(item)
+    return tree
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 200_000))
+    random.seed(42)
+    print(f"{'nodes':>8} {'recursive (ms)':>16} {'build_tree (ms)':>16}")
+    for size in SIZES:
+        nodes = make_nodes(size)
+        linear = timed(build_tree, nodes, 0, project)
+        if size <= LEGACY_MAX_SIZE:
+            legacy = f"{timed(legacy_build, nodes, 0):16.1f}"
+        else:
+            legacy = f"{'skipped':>16}"
+        print(f"{size:>8} {legacy} {linear:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
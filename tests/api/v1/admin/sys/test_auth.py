@@ -6,6 +6,7 @@ from app.api import deps
 from app.models.sys.user import SysUser
 from app.core import security
 from app.core.config import settings
+from app.core.login_limiter import LoginAttempt
 
 # Mock User Data
 MOCK_PASSWORD = "password"
@@ -151,10 +152,11 @@ async def test_login_locked_user(
     client: AsyncClient, override_get_db, mock_redis_manager, mocker
 ):
     """Test login when user is locked"""
-    # Mock security.is_user_locked to return True
-    # We can mock the function directly
+    # The limiter script reports an active lock: (allowed, attempts, lock seconds)
     mocker.patch(
-        "app.core.security.is_user_locked", new_callable=AsyncMock, return_value=True
+        "app.db.redis.RedisManager.eval_script",
+        new_callable=AsyncMock,
+        return_value=[0, 0, 900],
     )
 
     response = await client.post(
@@ -163,3 +165,24 @@ async def test_login_locked_user(
     )
     assert response.status_code == 400
     assert "User account is locked" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_login_counts_the_client_behind_a_trusted_proxy(
+    client: AsyncClient, override_get_db, mock_redis_manager, mocker
+):
+    """The per-IP login counter uses the forwarded client, not the proxy"""
+    mocker.patch.object(settings, "TRUSTED_PROXIES", ["127.0.0.1"])
+    hit = mocker.patch(
+        "app.api.v1.admin.sys.auth.login_limiter.hit",
+        new_callable=AsyncMock,
+        return_value=LoginAttempt(allowed=False, attempts=0, locked_for=900),
+    )
+
+    response = await client.post(
+        f"{settings.API_V1_STR}/admin/auth/login",
+        json={"username": "testadmin", "password": MOCK_PASSWORD},
+        headers={"X-Forwarded-For": "203.0.113.9"},
+    )
+    assert response.status_code == 400
+    hit.assert_awaited_once_with("testadmin", "203.0.113.9")
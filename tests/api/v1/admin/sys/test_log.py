@@ -0,0 +1,126 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.api import deps
+from app.api.v1.admin.sys.log import fulltext_query
+from app.db.log_tables import months_between
+from app.main import app
+from app.models.sys.user import SysUser
+from app.schemas.response import decode_cursor, encode_cursor
+
+mock_user = SysUser(id=1, username="admin", is_active=True, is_superuser=True)
+
+
+def _row(row_id, create_time):
+    return {"id": row_id, "create_time": create_time, "content": f"GET /{row_id}"}
+
+
+@pytest.fixture
+def mock_db_session():
+    session = AsyncMock()
+    return session
+
+
+@pytest.fixture
+def override_deps(mock_db_session):
+    async def override_get_db():
+        yield mock_db_session
+
+    async def override_get_current_user():
+        return mock_user
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_current_user] = override_get_current_user
+    yield
+    app.dependency_overrides = {}
+
+
+def _result(rows):
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    return result
+
+
+def test_months_between_newest_first():
+    assert months_between(date(2024, 11, 5), date(2025, 2, 1)) == [
+        "202502",
+        "202501",
+        "202412",
+        "202411",
+    ]
+
+
+def test_fulltext_query_strips_operators():
+    assert fulltext_query('login -"admin" (x)') == '+"login" +"admin"'
+    assert fulltext_query("+-*") is None
+
+
+@pytest.mark.anyio
+async def test_log_list_walks_months_until_page_is_full(
+    client, override_deps, mock_db_session, mocker
+):
+    existing = mocker.patch(
+        "app.db.log_tables.existing_log_months",
+        AsyncMock(return_value=["202508", "202507"]),
+    )
+    mock_db_session.execute.side_effect = [
+        _result([_row(9, datetime(2025, 8, 2))]),
+        _result([_row(5, datetime(2025, 7, 30)), _row(4, datetime(2025, 7, 29))]),
+    ]
+    response = await client.get(
+        "/api/v1/admin/sys/log/list",
+        params={
+            "keywords": "login",
+            "date_range": ["2025-07-01", "2025-08-15"],
+            "page_size": 2,
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()["result"]
+    assert [row["id"] for row in data["list"]] == [9, 5]
+    assert decode_cursor(data["next_cursor"]) == (datetime(2025, 7, 30), 5)
+    assert existing.await_args.args[1] == ["202508", "202507"]
+
+    first, second = (call.args[0] for call in mock_db_session.execute.await_args_list)
+    sql = str(first.compile(dialect=mysql.dialect()))
+    assert "FROM sys_log_202508" in sql
+    assert "MATCH (sys_log_202508.content) AGAINST" in sql
+    assert "IN BOOLEAN MODE" in sql
+    assert "ORDER BY sys_log_202508.create_time DESC, sys_log_202508.id DESC" in sql
+    # The second month only needs what the first one didn't fill, plus one
+    assert second._limit == 2
+
+
+@pytest.mark.anyio
+async def test_log_list_rejects_bad_cursor(client, override_deps):
+    response = await client.get("/api/v1/admin/sys/log/list?cursor=bogus")
+    assert response.json()["code"] == "INVALID_ARGUMENT"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("value", [5, None])
+async def test_log_list_rejects_cursor_without_a_time(client, override_deps, value):
+    cursor = encode_cursor(value, 1)
+    response = await client.get(f"/api/v1/admin/sys/log/list?cursor={cursor}")
+    assert response.json()["code"] == "INVALID_ARGUMENT"
+
+
+@pytest.mark.anyio
+async def test_log_list_requires_superuser(client, mock_db_session):
+    async def override_get_db():
+        yield mock_db_session
+
+    async def override_get_current_user():
+        return SysUser(id=2, username="user", is_active=True, is_superuser=False)
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_current_user] = override_get_current_user
+    try:
+        response = await client.get("/api/v1/admin/sys/log/list")
+    finally:
+        app.dependency_overrides = {}
+    assert response.json()["code"] == "PERMISSION_DENIED"
+    mock_db_session.execute.assert_not_awaited()
@@ -236,3 +236,42 @@ async def test_get_routes_normal_user(client, mock_db_session):
     # since we mocked the execute result directly.
     # To test logic better, we should inspect the query, but that's complex with async SQLA mocks.
     # Validation that logic path was taken: `current_user.is_superuser` is False.
+
+@pytest.mark.anyio
+async def test_get_routes_served_from_cache(client, override_deps, mock_db_session, mocker):
+    import json
+
+    cached = {"version": "5", "routes": [{"name": "Cached", "path": "/cached"}]}
+    mocker.patch(
+        "app.db.redis.RedisManager.mget",
+        new_callable=AsyncMock,
+        return_value=[json.dumps(cached), "5"],
+    )
+
+    response = await client.get("/api/v1/admin/sys/menu/routes")
+    assert response.status_code == 200
+    assert response.json()["result"][0]["name"] == "Cached"
+    mock_db_session.execute.assert_not_awaited()
+
+@pytest.mark.anyio
+async def test_get_routes_stale_cache_rebuilds(client, override_deps, mock_db_session, mocker):
+    import json
+
+    cached = {"version": "4", "routes": [{"name": "Old"}]}
+    mocker.patch(
+        "app.db.redis.RedisManager.mget",
+        new_callable=AsyncMock,
+        return_value=[json.dumps(cached), "5"],
+    )
+    set_mock = mocker.patch("app.db.redis.RedisManager.set", new_callable=AsyncMock)
+    mock_result = MagicMock()
+    mock_result.scalars.return_value.all.return_value = [
+        SysMenu(id=1, type="menu", name="Fresh", parent_id=0)
+    ]
+    mock_db_session.execute.return_value = mock_result
+
+    response = await client.get("/api/v1/admin/sys/menu/routes")
+    assert response.json()["result"][0]["name"] == "Fresh"
+    key, value = set_mock.await_args.args[:2]
+    assert key == "route_tree:superuser"
+    assert json.loads(value)["version"] == "5"
@@ -0,0 +1,29 @@
+import pytest
+
+from app.api import deps
+from app.main import app
+from app.models.sys.user import SysUser
+
+
+@pytest.fixture
+def as_user():
+    def login(user):
+        async def override_get_current_user():
+            return user
+
+        app.dependency_overrides[deps.get_current_user] = override_get_current_user
+
+    yield login
+    app.dependency_overrides = {}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["password-hasher", "db-pool", "access-log"])
+async def test_monitor_requires_superuser(client, as_user, path):
+    as_user(SysUser(id=2, username="user", is_active=True, is_superuser=False))
+    response = await client.get(f"/api/v1/admin/sys/monitor/{path}")
+    assert response.json()["code"] == "PERMISSION_DENIED"
+
+    as_user(SysUser(id=1, username="admin", is_active=True, is_superuser=True))
+    response = await client.get(f"/api/v1/admin/sys/monitor/{path}")
+    assert response.json()["code"] == "SUCCESS"
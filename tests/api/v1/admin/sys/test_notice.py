@@ -0,0 +1,142 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from sqlalchemy.dialects import mysql
+from app.main import app
+from app.api import deps
+from app.api.v1.admin.sys.notice import parse_target_user_ids
+from app.core.config import settings
+from app.db.redis import RedisManager
+from app.models.sys.notice import SysNotice
+from app.models.sys.user import SysUser
+
+mock_user = SysUser(id=3, username="user", is_active=True, is_superuser=True)
+
+
+@pytest.fixture
+def mock_db_session():
+    session = AsyncMock()
+    mock_result = MagicMock()
+    mock_result.mappings.return_value.all.return_value = [
+        {"id": 1, "title": "Hello", "type": "1", "level": "L", "target_type": 0}
+    ]
+    session.execute.return_value = mock_result
+    session.scalar.return_value = 1
+    session.add = MagicMock()
+    return session
+
+
+@pytest.fixture
+def override_deps(mock_db_session):
+    async def override_get_db():
+        yield mock_db_session
+
+    async def override_get_current_user():
+        return mock_user
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_current_user] = override_get_current_user
+    yield
+    app.dependency_overrides = {}
+
+
+def test_parse_target_user_ids():
+    assert parse_target_user_ids("3, 1,x,,3") == [1, 3]
+    assert parse_target_user_ids(None) == []
+
+
+@pytest.mark.anyio
+async def test_my_notice_list_pages_in_sql(client, override_deps, mock_db_session):
+    response = await client.get("/api/v1/admin/sys/notice/my-list?page=2&size=5")
+    assert response.status_code == 200
+    data = response.json()["result"]
+    assert data["total"] == 1
+    assert data["list"][0]["title"] == "Hello"
+    assert data["list"][0]["content"] is None
+
+    stmt = mock_db_session.execute.await_args.args[0]
+    sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+    assert "sys_notice.content" not in sql
+    assert "sys_notice_target" in sql
+    assert "LIMIT 5 OFFSET 5" in sql
+
+
+@pytest.mark.anyio
+async def test_read_all_is_a_single_upsert(client, override_deps, mock_db_session):
+    response = await client.post("/api/v1/admin/sys/notice/allRead")
+    assert response.status_code == 200
+
+    mock_db_session.execute.assert_awaited_once()
+    mock_db_session.scalar.assert_not_awaited()
+    stmt = mock_db_session.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=mysql.dialect()))
+    assert sql.startswith("INSERT INTO sys_user_notice")
+    assert "SELECT sys_notice.id" in sql
+    assert "ON DUPLICATE KEY UPDATE read_time = if(sys_user_notice.is_read" in sql
+
+
+@pytest.mark.anyio
+async def test_unread_count_served_from_counter(client, override_deps, mock_db_session, mocker):
+    mocker.patch("app.db.redis.RedisManager.get", new_callable=AsyncMock, return_value="4")
+    response = await client.get("/api/v1/admin/sys/notice/unread-count")
+    assert response.json()["result"] == {"count": 4}
+    mock_db_session.scalar.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_unread_count_recomputed_on_miss(client, override_deps, mock_db_session):
+    mock_db_session.scalar.return_value = 7
+    response = await client.get("/api/v1/admin/sys/notice/unread-count")
+    assert response.json()["result"] == {"count": 7}
+
+    RedisManager.set.assert_awaited_with(
+        "notice:unread:3", "7", expire=settings.NOTICE_UNREAD_EXPIRE_SECONDS
+    )
+
+
+@pytest.mark.anyio
+async def test_publish_fans_out_to_targets(client, override_deps, mock_db_session):
+    mock_db_session.get.return_value = SysNotice(
+        id=1, target_type=1, target_user_ids_str="5,6", publish_status=0
+    )
+    response = await client.post("/api/v1/admin/sys/notice/publish/1")
+    assert response.status_code == 200
+    RedisManager.incrby_existing.assert_awaited_once_with(
+        ["notice:unread:5", "notice:unread:6"], 1
+    )
+
+
+@pytest.mark.anyio
+async def test_add_published_notice_fans_out(client, override_deps, mock_db_session):
+    async def flush():
+        mock_db_session.add.call_args.args[0].id = 9
+
+    mock_db_session.flush.side_effect = flush
+    response = await client.post(
+        "/api/v1/admin/sys/notice/add",
+        json={
+            "title": "Hello",
+            "type": "1",
+            "level": "L",
+            "target_type": 1,
+            "target_user_ids_str": "5,6",
+            "publish_status": 1,
+        },
+    )
+    assert response.status_code == 200
+    assert mock_db_session.add.call_args.args[0].publish_time is not None
+    args = RedisManager.incrby_existing.await_args.args
+    assert sorted(args[0]) == ["notice:unread:5", "notice:unread:6"] and args[1] == 1
+
+
+@pytest.mark.anyio
+async def test_add_draft_notice_leaves_counters(client, override_deps, mock_db_session):
+    async def flush():
+        mock_db_session.add.call_args.args[0].id = 9
+
+    mock_db_session.flush.side_effect = flush
+    response = await client.post(
+        "/api/v1/admin/sys/notice/add",
+        json={"title": "Hello", "type": "1", "level": "L", "target_type": 1, "target_user_ids_str": "5"},
+    )
+    assert response.status_code == 200
+    RedisManager.incrby_existing.assert_not_awaited()
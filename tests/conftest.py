@@ -71,7 +71,31 @@ def mock_redis_manager(mocker):
     # Mock the RedisManager class methods
     mocker.patch("app.db.redis.RedisManager.get", new_callable=AsyncMock, return_value=None)
     mocker.patch("app.db.redis.RedisManager.set", new_callable=AsyncMock)
+    mocker.patch("app.db.redis.RedisManager.set_nx", new_callable=AsyncMock, return_value=True)
+    mocker.patch(
+        "app.db.redis.RedisManager.delete_if_equal", new_callable=AsyncMock, return_value=True
+    )
     mocker.patch("app.db.redis.RedisManager.delete", new_callable=AsyncMock)
+    mocker.patch("app.db.redis.RedisManager.delete_many", new_callable=AsyncMock)
+    mocker.patch("app.db.redis.RedisManager.delete_matching", new_callable=AsyncMock, return_value=0)
+    mocker.patch("app.db.redis.RedisManager.incr", new_callable=AsyncMock, return_value=1)
+    mocker.patch("app.db.redis.RedisManager.incrby_existing", new_callable=AsyncMock)
+    mocker.patch("app.db.redis.RedisManager.mset", new_callable=AsyncMock)
+    mocker.patch("app.db.redis.RedisManager.pfcount", new_callable=AsyncMock, return_value=0)
+    mocker.patch(
+        "app.db.redis.RedisManager.eval_script", new_callable=AsyncMock, return_value=[1, 1, 0]
+    )
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[])
+    pipeline = MagicMock()
+    pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    mocker.patch("app.db.redis.RedisManager.pipeline", pipeline)
+    mocker.patch(
+        "app.db.redis.RedisManager.mget",
+        new_callable=AsyncMock,
+        side_effect=lambda *keys: [None] * len(keys),
+    )
 
 
 
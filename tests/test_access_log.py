@@ -0,0 +1,106 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.access_log import (
+    AccessLogMiddleware,
+    AccessLogWriter,
+    parse_user_agent,
+    set_access_log_user,
+)
+from app.core.config import settings
+
+CHROME = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+)
+EDGE = CHROME + " Edg/126.0.2592.68"
+
+
+def test_parse_user_agent():
+    assert parse_user_agent(CHROME) == ("Chrome", "126.0.0.0", "Windows")
+    assert parse_user_agent(EDGE) == ("Edge", "126.0.2592.68", "Windows")
+    assert parse_user_agent("") == (None, None, None)
+
+
+def test_full_queue_drops():
+    writer = AccessLogWriter(max_queue=2, batch_size=10, flush_interval=1)
+    assert writer.put({})
+    assert writer.put({})
+    assert not writer.put({})
+    assert writer.stats()["dropped"] == 1
+    assert writer.stats()["queued"] == 2
+
+
+@pytest.mark.anyio
+async def test_flush_writes_in_batches(mocker):
+    writer = AccessLogWriter(max_queue=100, batch_size=2, flush_interval=1)
+    write = mocker.patch.object(writer, "_write", AsyncMock())
+    for i in range(5):
+        writer.put({"id": i})
+    await writer.flush()
+    assert [len(call.args[0]) for call in write.await_args_list] == [2, 2, 1]
+    assert writer.stats()["written"] == 5
+
+
+@pytest.mark.anyio
+async def test_failed_batch_is_counted(mocker):
+    writer = AccessLogWriter(max_queue=100, batch_size=10, flush_interval=1)
+    mocker.patch.object(writer, "_write", AsyncMock(side_effect=RuntimeError("down")))
+    writer.put({})
+    await writer.flush()
+    assert writer.stats()["failed"] == 1
+    assert writer.stats()["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_middleware_queues_row():
+    writer = AccessLogWriter(max_queue=100, batch_size=10, flush_interval=1)
+
+    async def list_users(scope, receive, send):
+        scope["endpoint"] = list_users
+        set_access_log_user(7)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/admin/sys/user/list",
+        "query_string": b"page_number=2",
+        "headers": [(b"user-agent", CHROME.encode())],
+        "client": ("10.0.0.1", 5000),
+    }
+    middleware = AccessLogMiddleware(list_users, writer=writer, prefix="/api/v1")
+    await middleware(scope, AsyncMock(), AsyncMock())
+
+    row = writer._queue[0]
+    assert row["user_id"] == 7
+    assert row["module"] == "user"
+    assert row["method"] == "list_users"
+    assert row["request_params"] == "page_number=2"
+    assert row["status_code"] == 201
+    assert row["ip"] == "10.0.0.1"
+    assert row["browser"] == "Chrome"
+
+
+@pytest.mark.anyio
+async def test_middleware_logs_client_behind_trusted_proxy(mocker):
+    mocker.patch.object(settings, "TRUSTED_PROXIES", ["10.0.0.1"])
+    writer = AccessLogWriter(max_queue=100, batch_size=10, flush_interval=1)
+
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/admin/sys/user/list",
+        "headers": [(b"x-forwarded-for", b"203.0.113.9")],
+        "client": ("10.0.0.1", 5000),
+    }
+    await AccessLogMiddleware(endpoint, writer=writer, prefix="/api/v1")(
+        scope, AsyncMock(), AsyncMock()
+    )
+    assert writer._queue[0]["ip"] == "203.0.113.9"
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import zipfile
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api import deps
+from app.core import backup
+from app.core.config import settings
+from app.db.base import Base
+from app.main import app
+from app.models.sys.user import SysUser
+
+admin = SysUser(id=1, username="admin", is_active=True, is_superuser=True)
+NAME = "backup-20250701-120000.zip"
+
+
+class _Row(tuple):
+    def __new__(cls, mapping):
+        row = super().__new__(cls, mapping.values())
+        row._mapping = mapping
+        return row
+
+
+class _Stream:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for row in self.rows:
+            yield row
+
+
+@pytest.fixture
+def backup_dir(tmp_path, mocker):
+    mocker.patch.object(settings, "BACKUP_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def override_deps():
+    async def override_get_current_user():
+        return admin
+
+    app.dependency_overrides[deps.get_current_user] = override_get_current_user
+    yield
+    app.dependency_overrides = {}
+
+
+@pytest.mark.anyio
+async def test_table_chunks_pages_by_composite_key():
+    table = Base.metadata.tables["sys_dept_closure"]
+    rows = [_Row({"ancestor_id": 1, "descendant_id": i, "depth": 0}) for i in (1, 2, 3)]
+    conn = MagicMock()
+    conn.stream = AsyncMock(side_effect=[_Stream(rows[:2]), _Stream(rows[2:])])
+
+    chunks = [chunk async for chunk in backup.table_chunks(conn, table, chunk_size=2)]
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+
+    second = conn.stream.await_args_list[1].args[0]
+    sql = str(second.compile(compile_kwargs={"literal_binds": True}))
+    assert "(sys_dept_closure.ancestor_id, sys_dept_closure.descendant_id) > (1, 2)" in sql
+    assert second.get_execution_options()["yield_per"] == 2
+
+
+@pytest.mark.anyio
+async def test_exported_rows_decode_back(tmp_path, mocker):
+    table = Base.metadata.tables["sys_notice"]
+    columns = [column.name for column in table.columns]
+    published = datetime(2025, 7, 1, 8, 30)
+    row = _Row({name: None for name in columns} | {"id": 7, "title": "停机", "publish_time": published})
+    mocker.patch.object(
+        backup, "table_chunks", lambda conn, table, size: _Stream([[row]])
+    )
+    job = MagicMock(add_rows=AsyncMock())
+
+    path = tmp_path / "t.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        entry = await backup.BackupService()._export_table(MagicMock(), archive, table, job)
+    assert entry["rows"] == 1
+
+    with zipfile.ZipFile(path) as archive:
+        lines = archive.read("tables/sys_notice.jsonl").decode("utf-8").splitlines()
+    header = json.loads(lines[0])["columns"]
+    keep = [(i, name) for i, name in enumerate(header) if name in table.c]
+    decoded = backup._decode_row(json.loads(lines[1]), keep, backup._decoders(table))
+    assert decoded["id"] == 7
+    assert decoded["title"] == "停机"
+    assert decoded["publish_time"] == published
+
+
+def test_backup_path_rejects_other_files(backup_dir):
+    with pytest.raises(backup.BackupError) as error:
+        backup.backup_path("../.env")
+    assert error.value.code == "INVALID_ARGUMENT"
+    with pytest.raises(backup.BackupError) as error:
+        backup.backup_path(NAME)
+    assert error.value.code == "BACKUP_NOT_FOUND"
+
+
+@pytest.mark.anyio
+async def test_restore_refuses_checksum_mismatch(backup_dir):
+    (backup_dir / NAME).write_bytes(b"archive")
+    (backup_dir / (NAME + ".sha256")).write_text("0" * 64 + "  " + NAME + "\n")
+    job = MagicMock(state={"name": NAME})
+    with pytest.raises(backup.BackupError) as error:
+        await backup.BackupService()._restore(job)
+    assert error.value.code == "BACKUP_CHECKSUM_MISMATCH"
+
+
+@pytest.mark.anyio
+async def test_failed_table_cancels_other_loads(backup_dir, mocker):
+    manifest = {"tables": [{"name": "sys_dict"}, {"name": "sys_role"}]}
+    with zipfile.ZipFile(backup_dir / NAME, "w") as archive:
+        archive.writestr(backup.MANIFEST, json.dumps(manifest))
+    checksum = backup.file_sha256(str(backup_dir / NAME))
+    (backup_dir / (NAME + ".sha256")).write_text(f"{checksum}  {NAME}\n")
+    cancelled = asyncio.Event()
+
+    async def load_table(path, table, job):
+        if table.name == "sys_dict":
+            raise RuntimeError("duplicate key")
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    service = backup.BackupService()
+    mocker.patch.object(service, "_load_table", load_table)
+    job = MagicMock(state={"name": NAME, "tables_done": 0}, save=AsyncMock())
+    with pytest.raises(RuntimeError, match="duplicate key"):
+        await service._restore(job)
+    assert cancelled.is_set()
+
+
+@pytest.mark.anyio
+async def test_restore_invalidates_caches(backup_dir, mocker):
+    with zipfile.ZipFile(backup_dir / NAME, "w") as archive:
+        archive.writestr(backup.MANIFEST, json.dumps({"tables": [{"name": "sys_menu"}]}))
+    checksum = backup.file_sha256(str(backup_dir / NAME))
+    (backup_dir / (NAME + ".sha256")).write_text(f"{checksum}  {NAME}\n")
+    service = backup.BackupService()
+    mocker.patch.object(service, "_load_table", AsyncMock())
+    clear = mocker.patch.object(backup.principal_cache, "clear")
+
+    job = MagicMock(state={"name": NAME, "tables_done": 0}, save=AsyncMock())
+    await service._restore(job)
+
+    bumped = [call.args[0] for call in backup.RedisManager.incr.await_args_list]
+    assert bumped == ["perm_bundle:version", "menu:version"]
+    backup.RedisManager.delete_matching.assert_awaited_once_with("notice:unread:*", batch_size=1000)
+    clear.assert_called_once()
+
+
+@pytest.mark.anyio
+async def test_restore_recreates_month_log_tables(backup_dir, mocker):
+    manifest = {"tables": [{"name": "sys_dict"}, {"name": "sys_log_202506"}, {"name": "tmp"}]}
+    with zipfile.ZipFile(backup_dir / NAME, "w") as archive:
+        archive.writestr(backup.MANIFEST, json.dumps(manifest))
+    checksum = backup.file_sha256(str(backup_dir / NAME))
+    (backup_dir / (NAME + ".sha256")).write_text(f"{checksum}  {NAME}\n")
+    engine = mocker.patch.object(backup, "engine")
+    engine.begin.return_value.__aenter__ = AsyncMock()
+    engine.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+    ensure = mocker.patch.object(
+        backup.log_tables,
+        "ensure_log_table",
+        AsyncMock(side_effect=lambda conn, month: backup.log_tables.log_table(month)),
+    )
+    service = backup.BackupService()
+    load_table = mocker.patch.object(service, "_load_table", AsyncMock())
+
+    job = MagicMock(state={"name": NAME, "tables_done": 0}, save=AsyncMock())
+    await service._restore(job)
+
+    assert ensure.await_args.args[1] == "202506"
+    loaded = sorted(call.args[1].name for call in load_table.await_args_list)
+    assert loaded == ["sys_dict", "sys_log_202506"]
+
+
+@pytest.mark.anyio
+async def test_second_job_is_rejected_while_running(mocker):
+    # Two services stand in for two workers sharing one Redis
+    keys = {}
+
+    async def set_nx(key, value, expire=None):
+        return keys.setdefault(key, value) == value
+
+    async def delete_if_equal(key, value):
+        return keys.get(key) == value and keys.pop(key) == value
+
+    mocker.patch.object(backup.RedisManager, "set_nx", side_effect=set_nx)
+    mocker.patch.object(backup.RedisManager, "delete_if_equal", side_effect=delete_if_equal)
+    service, other = backup.BackupService(), backup.BackupService()
+    done = asyncio.Event()
+
+    async def slow_backup(job):
+        await done.wait()
+
+    mocker.patch.object(service, "_backup", slow_backup)
+    job = await service.start_backup()
+    assert job["status"] == "running"
+    assert keys[backup.RUNNING_KEY] == job["id"]
+    with pytest.raises(backup.BackupError) as error:
+        await other.start_backup()
+    assert error.value.code == "BACKUP_BUSY"
+
+    done.set()
+    await asyncio.gather(*service._tasks)
+    assert job["status"] == "succeeded"
+    assert backup.RUNNING_KEY not in keys
+    mocker.patch.object(other, "_backup", slow_backup)
+    assert (await other.start_backup())["status"] == "running"
+    await asyncio.gather(*other._tasks)
+
+
+@pytest.mark.anyio
+async def test_download_supports_range(client, override_deps, backup_dir):
+    (backup_dir / NAME).write_bytes(b"0123456789")
+    response = await client.get(
+        f"/api/v1/admin/sys/backup/download/{NAME}", headers={"Range": "bytes=2-5"}
+    )
+    assert response.status_code == 206
+    assert response.content == b"2345"
+
+    listed = await client.get("/api/v1/admin/sys/backup/list")
+    assert listed.json()["result"]["list"][0]["name"] == NAME
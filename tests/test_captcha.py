@@ -0,0 +1,91 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.captcha import CaptchaPool
+from app.db.redis import RedisManager
+from app.utils.captcha import load_font
+
+PNG_MAGIC = b"\x89PNG"
+
+
+@pytest.mark.anyio
+async def test_pool_refills_between_watermarks():
+    pool = CaptchaPool(low_watermark=2, high_watermark=4)
+    await pool.start()
+    while pool._refill_task is not None:
+        await asyncio.sleep(0.01)
+    assert len(pool) == 4
+
+    png_bytes, answer = await pool.pop()
+    assert png_bytes.startswith(PNG_MAGIC)
+    assert answer.lstrip("-").isdigit()
+    # Still above the low watermark, nothing scheduled
+    assert pool._refill_task is None
+
+    await pool.pop()
+    await pool.pop()
+    assert pool._refill_task is not None
+    pool.stop()
+
+
+@pytest.mark.anyio
+async def test_empty_pool_renders_on_demand():
+    pool = CaptchaPool(low_watermark=0, high_watermark=1)
+    png_bytes, _ = await pool.pop()
+    assert png_bytes.startswith(PNG_MAGIC)
+    pool.stop()
+
+
+def test_font_is_loaded_once():
+    assert load_font(28) is load_font(28)
+
+
+@pytest.mark.anyio
+async def test_raw_png_endpoint(client, mocker):
+    mocker.patch(
+        "app.db.redis.RedisManager.save_captcha", new_callable=AsyncMock, return_value="k1"
+    )
+    response = await client.get("/api/v1/admin/auth/captcha/image")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["x-captcha-key"] == "k1"
+    assert response.content.startswith(PNG_MAGIC)
+
+
+@pytest.mark.anyio
+async def test_login_requires_captcha_after_failures(client, mocker):
+    # Limiter reports this is the third attempt: two earlier failures
+    mocker.patch(
+        "app.db.redis.RedisManager.eval_script",
+        new_callable=AsyncMock,
+        return_value=[1, 3, 0],
+    )
+    pop = mocker.patch(
+        "app.db.redis.RedisManager.pop_captcha", new_callable=AsyncMock, return_value="12"
+    )
+    url = "/api/v1/admin/auth/login"
+
+    response = await client.post(url, json={"username": "a", "password": "x"})
+    assert response.status_code == 400
+    assert response.json()["code"] == "CAPTCHA_REQUIRED"
+    pop.assert_not_awaited()
+
+    response = await client.post(
+        url,
+        json={"username": "a", "password": "x", "captcha_key": "k", "captcha_code": "13"},
+    )
+    assert response.json()["code"] == "CAPTCHA_INVALID"
+    pop.assert_awaited_once_with("k")
+
+
+@pytest.mark.anyio
+async def test_pop_captcha_is_one_getdel(mocker):
+    mocker.stopall()
+    client = mocker.MagicMock()
+    client.getdel = AsyncMock(return_value="7")
+    mocker.patch.object(RedisManager, "get_client", return_value=client)
+
+    assert await RedisManager.pop_captcha("abc") == "7"
+    client.getdel.assert_awaited_once_with("captcha:abc")
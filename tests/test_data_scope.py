@@ -0,0 +1,62 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from sqlalchemy import select
+
+from app.core.data_scope import DataScope, data_scope_cache, resolve_data_scope
+from app.globals.enum import RoleDataScope
+from app.models.sys.notice import SysNotice
+from app.models.sys.user import SysUser
+
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_all_scope_leaves_query_untouched():
+    stmt = select(SysUser)
+    scope = DataScope(RoleDataScope.ALL, user_id=1)
+    assert scope.apply(stmt, owner_column=SysUser.id) is stmt
+
+
+def test_dept_scope_filters_on_dept_ids():
+    scope = DataScope(RoleDataScope.DEPT_AND_CHILD, user_id=3, dept_ids=(2, 5))
+    sql = compiled(
+        scope.apply(select(SysUser), owner_column=SysUser.id, dept_column=SysUser.dept_id)
+    )
+    assert "sys_user.dept_id IN (2, 5)" in sql
+    assert "sys_user.id = 3" in sql
+
+
+def test_dept_scope_without_dept_column_goes_through_owner():
+    scope = DataScope(RoleDataScope.DEPT, user_id=3, dept_ids=(2,))
+    sql = compiled(scope.apply(select(SysNotice), owner_column=SysNotice.publisher_id))
+    assert "sys_notice.publisher_id IN (SELECT sys_user.id" in sql
+
+
+def test_self_scope_only_matches_owner():
+    scope = DataScope(RoleDataScope.SELF, user_id=3, dept_ids=(2,))
+    sql = compiled(
+        scope.apply(select(SysUser), owner_column=SysUser.id, dept_column=SysUser.dept_id)
+    )
+    assert "sys_user.id = 3" in sql
+    assert "dept_id" not in sql.split("WHERE")[1]
+
+
+@pytest.mark.anyio
+async def test_resolved_scope_is_cached(mocker):
+    data_scope_cache.clear()
+    mocker.patch(
+        "app.core.perm_bundle.get_perm_bundle",
+        new_callable=AsyncMock,
+        return_value={"data_scope": RoleDataScope.DEPT.value},
+    )
+    user = SysUser(id=4, dept_id=9, is_superuser=False)
+    db = AsyncMock()
+
+    first = await resolve_data_scope(db, user)
+    second = await resolve_data_scope(db, user)
+
+    assert first is second
+    assert first.dept_ids == (9,)
+    data_scope_cache.clear()
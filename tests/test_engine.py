@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.engine import InstrumentedQueuePool, create_engine, engine_options, pool_stats
+
+URL = "mysql+aiomysql://u:p@localhost:3306/x"
+
+
+def test_prod_profile_pool_settings():
+    options = engine_options("prod")
+    assert options["echo"] is False
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == 20
+    assert options["poolclass"] is InstrumentedQueuePool
+
+
+def test_settings_override_profile(mocker):
+    mocker.patch.object(settings, "DB_POOL_SIZE", 3)
+    mocker.patch.object(settings, "DB_ECHO", True)
+    options = engine_options("prod")
+    assert options["pool_size"] == 3
+    assert options["echo"] is True
+
+
+def test_test_profile_does_not_pool():
+    options = engine_options("test")
+    assert options["poolclass"] is NullPool
+    assert "pool_size" not in options
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        engine_options("staging")
+
+
+def test_pool_stats_on_idle_engine():
+    engine = create_engine(URL, "prod")
+    stats = pool_stats(engine)
+    assert stats["pool"] == "InstrumentedQueuePool"
+    assert stats["size"] == 20
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 0 and stats["avg_wait_ms"] == 0.0
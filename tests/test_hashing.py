@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api import deps
+from app.core.hashing import PasswordHasher, PasswordHasherBusy
+from app.core import security
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.sys.user import SysUser
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify_off_loop():
+    hasher = PasswordHasher(workers=2, max_queue=2)
+    hashed = await hasher.hash("secret")
+    assert await hasher.verify("secret", hashed)
+    assert not await hasher.verify("wrong", hashed)
+
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_saturated_pool_rejects_fast():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    blocking = [hasher._submit(release.wait) for _ in range(2)]
+    tasks = [asyncio.create_task(call) for call in blocking]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("secret")
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert hasher.stats()["completed"] == 2
+
+
+@pytest.mark.anyio
+async def test_busy_pool_returns_503(client, mocker):
+    mocker.patch(
+        "app.core.hashing.password_hasher.verify_and_update", side_effect=PasswordHasherBusy()
+    )
+    session = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = SysUser(
+        id=1, username="a", hashed_password=get_password_hash("x"), is_active=True
+    )
+    session.execute.return_value = result
+
+    async def override_get_db():
+        yield session
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    try:
+        response = await client.post(
+            "/api/v1/admin/auth/login", json={"username": "a", "password": "x"}
+        )
+    finally:
+        app.dependency_overrides = {}
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["code"] == "SERVICE_BUSY"
+
+
+def test_calibration_stays_within_bounds():
+    rounds = security.calibrate_bcrypt_rounds(target_ms=1, min_rounds=4, max_rounds=6)
+    assert rounds == 4
+    rounds = security.calibrate_bcrypt_rounds(
+        target_ms=60_000, min_rounds=4, max_rounds=6
+    )
+    assert rounds == 6
+
+
+def test_weaker_hash_is_upgraded(mocker):
+    mocker.patch.object(settings, "BCRYPT_ROUNDS", 5)
+    original = security.pwd_context
+    try:
+        policy = security.configure_password_context()
+        assert policy["bcrypt_rounds"] == 5
+        current = get_password_hash("secret")
+        assert security.verify_and_update("secret", current) == (True, None)
+
+        weak = original.hash("secret", rounds=4)
+        valid, new_hash = security.verify_and_update("secret", weak)
+        assert valid and new_hash and "$05$" in new_hash
+        assert security.verify_and_update("wrong", weak) == (False, None)
+    finally:
+        security.pwd_context = original
@@ -0,0 +1,36 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db.hierarchy import _ancestors, dept_hierarchy
+
+
+def test_ancestors_walks_to_root():
+    parents = {1: 0, 2: 1, 3: 2}
+    assert _ancestors(3, parents) == [(3, 0), (2, 1), (1, 2)]
+
+
+def test_ancestors_stops_on_cycle():
+    parents = {1: 2, 2: 1}
+    assert _ancestors(1, parents) == [(1, 0), (2, 1)]
+
+
+def test_subtree_filter_falls_back_to_tree_path(mocker):
+    mocker.patch("app.core.config.settings.HIERARCHY_INDEX_ENABLED", False)
+    sql = str(dept_hierarchy.subtree_filter(5, "0,1,5"))
+    assert "tree_path" in sql
+    assert "sys_dept_closure" not in sql
+
+
+@pytest.mark.anyio
+async def test_rebuild_inserts_closure_rows():
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = [(1, 0), (2, 1), (3, 1)]
+    db.execute.return_value = result
+
+    total = await dept_hierarchy.rebuild(db)
+
+    # 1 self row for the root, 2 each for its children
+    assert total == 5
+    rows = db.execute.await_args_list[-1].args[1]
+    assert {"ancestor_id": 1, "descendant_id": 3, "depth": 1} in rows
@@ -0,0 +1,82 @@
+import gzip
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.db.log_tables import log_table
+from worker import log_retention
+
+CUTOFF = datetime(2025, 7, 15)
+
+
+class _Row:
+    def __init__(self, **values):
+        self._mapping = values
+        self.id = values["id"]
+
+
+class _StreamResult:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.close = AsyncMock()
+
+    async def partitions(self, size):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.anyio
+async def test_archive_rows_writes_gzip_jsonl(tmp_path, capsys):
+    chunks = [
+        [_Row(id=1, create_time=datetime(2025, 7, 1), content="GET /a")],
+        [_Row(id=3, create_time=datetime(2025, 7, 2), content="登录")],
+    ]
+    conn = MagicMock()
+    conn.stream = AsyncMock(return_value=_StreamResult(chunks))
+    path = str(tmp_path / "sys_log_202507.jsonl.gz")
+
+    rows, max_id = await log_retention.archive_rows(
+        conn, log_table("202507"), CUTOFF, path, chunk_size=1
+    )
+    assert (rows, max_id) == (2, 3)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0] == {"id": 1, "create_time": "2025-07-01T00:00:00", "content": "GET /a"}
+    assert lines[1]["content"] == "登录"
+    assert "rows/s" in capsys.readouterr().out
+
+    stmt = conn.stream.await_args.args[0]
+    assert stmt.get_execution_options()["yield_per"] == 1
+
+
+@pytest.mark.anyio
+async def test_archive_without_rows_leaves_no_file(tmp_path):
+    conn = MagicMock()
+    conn.stream = AsyncMock(return_value=_StreamResult([]))
+    path = str(tmp_path / "empty.jsonl.gz")
+    assert await log_retention.archive_rows(conn, log_table("202507"), CUTOFF, path, 10) == (0, None)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.anyio
+async def test_delete_archived_runs_bounded_batches(mocker):
+    conn = MagicMock()
+    conn.execute = AsyncMock(
+        side_effect=[MagicMock(rowcount=2), MagicMock(rowcount=2), MagicMock(rowcount=1)]
+    )
+    begin = MagicMock()
+    begin.return_value.__aenter__ = AsyncMock(return_value=conn)
+    begin.return_value.__aexit__ = AsyncMock(return_value=False)
+    mocker.patch.object(log_retention, "engine", MagicMock(begin=begin))
+
+    deleted = await log_retention.delete_archived(
+        log_table("202507"), CUTOFF, max_id=5, batch_size=2, pause=0
+    )
+    assert deleted == 5
+    # Every batch commits on its own
+    assert begin.call_count == 3
+    sql = str(conn.execute.await_args.args[0].compile(dialect=mysql.dialect()))
+    assert "LIMIT" in sql
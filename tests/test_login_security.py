@@ -0,0 +1,88 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.core.login_limiter import LOGIN_ATTEMPT, LOGIN_FORGIVE, LoginAttempt, LoginRateLimiter
+from app.db.redis import RedisManager
+
+
+@pytest.mark.anyio
+async def test_login_attempt_is_one_script_call():
+    RedisManager.eval_script.return_value = [1, 3, 0]
+    limiter = LoginRateLimiter(max_attempts=5, window=60, max_attempts_per_ip=20)
+    attempt = await limiter.hit("alice", "10.0.0.1")
+
+    assert attempt[:4] == (True, 3, 0, "10.0.0.1")
+    RedisManager.eval_script.assert_awaited_once()
+    script, keys, args = RedisManager.eval_script.await_args.args
+    assert args[3] == attempt.member
+    assert script == LOGIN_ATTEMPT
+    assert keys == [
+        "login_attempts:alice",
+        "login_lockout:alice",
+        "login_attempts:ip:10.0.0.1",
+        "login_lockout:ip:10.0.0.1",
+    ]
+    assert args[0] == 60 and args[2] == 0 and args[4:] == [5, 20]
+    RedisManager.get.assert_not_awaited()
+    RedisManager.set.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_ip_dimension_is_optional():
+    limiter = LoginRateLimiter(max_attempts=5, window=60, sliding=True)
+    attempt = await limiter.hit("alice", "10.0.0.1")
+
+    _, keys, args = RedisManager.eval_script.await_args.args
+    assert keys == ["login_attempts:alice", "login_lockout:alice"]
+    assert args[2] == 1 and args[4:] == [5]
+    assert attempt.ip is None
+
+
+@pytest.mark.anyio
+async def test_complete_login_uses_one_pipeline():
+    await security.complete_login("alice", "tok", 7)
+
+    RedisManager.pipeline.assert_called_once()
+    pipe = await RedisManager.pipeline.return_value.__aenter__()
+    pipe.delete.assert_called_once_with("login_attempts:alice", "login_lockout:alice")
+    pipe.set.assert_called_once_with(
+        "login_token:tok", "7", ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_successful_login_is_taken_out_of_the_ip_count(mocker):
+    limiter = LoginRateLimiter(max_attempts=5, window=60, max_attempts_per_ip=20)
+    mocker.patch.object(security, "login_limiter", limiter)
+    attempt = LoginAttempt(True, 1, 0, ip="10.0.0.1", member="m1")
+    await security.complete_login("alice", "tok", 7, attempt)
+
+    pipe = await RedisManager.pipeline.return_value.__aenter__()
+    pipe.eval.assert_called_once_with(
+        LOGIN_FORGIVE, 2, "login_attempts:ip:10.0.0.1", "login_lockout:ip:10.0.0.1", 0, "m1", 20
+    )
+    pipe.execute.assert_awaited_once()
+
+    pipe.eval.reset_mock()
+    await security.complete_login("alice", "tok", 7, LoginAttempt(True, 1, 0))
+    pipe.eval.assert_not_called()
+
+
+@pytest.mark.anyio
+async def test_scripts_are_registered_once(mocker):
+    mocker.stopall()
+    script = AsyncMock(return_value="ok")
+    client = MagicMock()
+    client.register_script.return_value = script
+    mocker.patch.object(RedisManager, "get_client", return_value=client)
+    mocker.patch.object(RedisManager, "_scripts", {})
+
+    assert await RedisManager.eval_script("return 1", ["k"], [1]) == "ok"
+    assert await RedisManager.eval_script("return 1", ["k"], [2]) == "ok"
+
+    client.register_script.assert_called_once_with("return 1")
+    script.assert_awaited_with(keys=["k"], args=[2])
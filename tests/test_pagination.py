@@ -0,0 +1,99 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.models.sys.dictionary import SysDict
+from app.models.sys.role import SysRole
+from app.schemas.response import (
+    cursor_page,
+    decode_cursor,
+    encode_cursor,
+    keyset_paginate,
+)
+
+
+def compiled(stmt) -> str:
+    return str(stmt.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_cursor_round_trip():
+    ts = datetime(2025, 1, 2, 3, 4, 5)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    assert decode_cursor(encode_cursor(7, 8)) == (7, 8)
+    assert decode_cursor("") is None
+
+
+def test_invalid_cursor_raises():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_paginate_first_page():
+    stmt = keyset_paginate(
+        select(SysRole), SysRole.create_time, SysRole.id, "", 10, descending=True
+    )
+    sql = compiled(stmt)
+    assert "WHERE" not in sql
+    assert "ORDER BY sys_role.create_time DESC, sys_role.id DESC" in sql
+    assert "LIMIT 11" in sql
+
+
+def test_keyset_paginate_after_cursor():
+    cursor = encode_cursor(5, 30)
+    sql = compiled(keyset_paginate(select(SysRole), SysRole.sort, SysRole.id, cursor, 10))
+    assert "sys_role.sort > 5 OR sys_role.sort = 5 AND sys_role.id > 30" in sql
+    assert "OFFSET" not in sql
+
+
+def test_cursor_page_detects_next_page():
+    rows = [(i, i) for i in range(1, 5)]
+    page, next_cursor = cursor_page(rows, 3, key=lambda r: r)
+    assert page == rows[:3]
+    assert decode_cursor(next_cursor) == (3, 3)
+
+    page, next_cursor = cursor_page(rows[:3], 3, key=lambda r: r)
+    assert next_cursor is None
+
+
+def test_keyset_paginate_pages_through_null_sort_values():
+    # Ascending: NULLs come first, then every non-NULL value
+    cursor = encode_cursor(None, 9)
+    sql = compiled(
+        keyset_paginate(select(SysRole), SysRole.sort, SysRole.id, cursor, 2, nullable=True)
+    )
+    assert "sys_role.sort IS NULL AND sys_role.id > 9 OR sys_role.sort IS NOT NULL" in sql
+    assert "ORDER BY sys_role.sort ASC, sys_role.id ASC" in sql
+    assert "coalesce" not in sql
+
+    # Descending: NULLs come last, after the remaining non-NULL values
+    cursor = encode_cursor(datetime(2025, 1, 2), 30)
+    stmt = keyset_paginate(
+        select(SysRole), SysRole.create_time, SysRole.id, cursor, 2, descending=True, nullable=True
+    )
+    assert "OR sys_role.create_time IS NULL" in compiled(stmt)
+    stmt = keyset_paginate(
+        select(SysRole),
+        SysRole.create_time,
+        SysRole.id,
+        encode_cursor(None, 30),
+        2,
+        descending=True,
+        nullable=True,
+    )
+    assert "sys_role.create_time IS NULL AND sys_role.id < 30" in compiled(stmt)
+
+    with pytest.raises(ValueError):
+        keyset_paginate(select(SysRole), SysRole.sort, SysRole.id, encode_cursor(None, 9), 2)
+
+
+def test_cursor_page_encodes_null_sort_value():
+    page, next_cursor = cursor_page([(None, 4), (None, 9), (1, 2)], 2, key=lambda r: r)
+    assert decode_cursor(next_cursor) == (None, 9)
+
+
+def test_keyset_sort_columns_are_indexed():
+    indexes = {tuple(c.name for c in index.columns) for index in SysRole.__table__.indexes}
+    assert ("create_time", "id") in indexes
+    indexes = {tuple(c.name for c in index.columns) for index in SysDict.__table__.indexes}
+    assert ("sort", "id") in indexes
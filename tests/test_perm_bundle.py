@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.core import perm_bundle
+from app.globals.enum import RoleDataScope
+from app.models.sys.user import SysUser
+
+user = SysUser(id=7, username="u7", is_superuser=False)
+
+
+def make_db(roles, perms):
+    db = AsyncMock()
+    roles_result = MagicMock()
+    roles_result.all.return_value = roles
+    perms_result = MagicMock()
+    perms_result.scalars.return_value.all.return_value = perms
+    db.execute.side_effect = [roles_result, perms_result]
+    return db
+
+
+@pytest.mark.anyio
+async def test_bundle_built_and_stored_on_miss(mocker):
+    set_mock = mocker.patch("app.db.redis.RedisManager.set", new_callable=AsyncMock)
+    db = make_db(
+        [(1, "editor", RoleDataScope.DEPT), (2, "viewer", RoleDataScope.SELF)],
+        ["sys:user:query"],
+    )
+
+    bundle = await perm_bundle.get_perm_bundle(db, user)
+
+    assert bundle["role_ids"] == [1, 2]
+    assert bundle["role_codes"] == ["editor", "viewer"]
+    assert bundle["perms"] == ["sys:user:query"]
+    assert bundle["data_scope"] == RoleDataScope.DEPT.value
+    assert set_mock.await_args.args[0] == "perm_bundle:7"
+
+
+@pytest.mark.anyio
+async def test_bundle_served_from_redis_when_version_matches(mocker):
+    cached = {"role_ids": [1], "role_codes": ["a"], "perms": [], "data_scope": "all"}
+    cached["version"] = "3"
+    mocker.patch(
+        "app.db.redis.RedisManager.mget",
+        new_callable=AsyncMock,
+        return_value=[json.dumps(cached), "3"],
+    )
+    db = AsyncMock()
+
+    bundle = await perm_bundle.get_perm_bundle(db, user)
+
+    assert bundle["role_codes"] == ["a"]
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.anyio
+async def test_bundle_rebuilt_when_version_is_stale(mocker):
+    cached = {"role_ids": [], "role_codes": [], "perms": [], "data_scope": None}
+    cached["version"] = "1"
+    mocker.patch(
+        "app.db.redis.RedisManager.mget",
+        new_callable=AsyncMock,
+        return_value=[json.dumps(cached), "2"],
+    )
+    db = make_db([(1, "editor", RoleDataScope.ALL)], ["sys:menu:add"])
+
+    bundle = await perm_bundle.get_perm_bundle(db, user)
+
+    assert bundle["perms"] == ["sys:menu:add"]
+    assert bundle["version"] == "2"
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.api import deps
+from app.core import security
+from app.core.principal_cache import PrincipalCache, principal_cache
+from app.models.sys.user import SysUser
+from app.schemas.sys.auth import TokenPayload
+
+
+def make_user(user_id=1):
+    return SysUser(id=user_id, username=f"user{user_id}", is_active=True)
+
+
+def test_cache_hit_returns_detached_copy():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.set("token-a", TokenPayload(sub=1), make_user())
+
+    claims, user = cache.get("token-a")
+    assert claims.sub == 1
+    assert user.username == "user1"
+
+    # Mutating the returned user must not leak into the cache
+    user.username = "changed"
+    assert cache.get("token-a")[1].username == "user1"
+
+
+def test_cache_is_lru_bounded():
+    cache = PrincipalCache(max_size=2, ttl=60)
+    cache.set("t1", TokenPayload(sub=1), make_user(1))
+    cache.set("t2", TokenPayload(sub=2), make_user(2))
+    cache.get("t1")
+    cache.set("t3", TokenPayload(sub=3), make_user(3))
+
+    assert cache.get("t2") is None
+    assert cache.get("t1") is not None
+    assert len(cache) == 2
+
+
+def test_cache_respects_token_expiry():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.set("expired", TokenPayload(sub=1), make_user(), token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+
+
+def test_invalidate_user_drops_all_tokens():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    cache.set("t1", TokenPayload(sub=1), make_user(1))
+    cache.set("t2", TokenPayload(sub=1), make_user(1))
+    cache.set("t3", TokenPayload(sub=2), make_user(2))
+
+    cache.invalidate_user(1)
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.get("t3") is not None
+
+    cache.invalidate_token("t3")
+    assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_get_current_user_uses_cache(mocker):
+    principal_cache.clear()
+    token = security.create_access_token(1)
+    mocker.patch(
+        "app.db.redis.RedisManager.get", new_callable=AsyncMock, return_value="1"
+    )
+
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = make_user(1)
+    db.execute.return_value = result
+
+    first = await deps.get_current_user(db=db, token=token)
+    second = await deps.get_current_user(db=db, token=token)
+
+    assert first.id == second.id == 1
+    assert db.execute.await_count == 1
+    principal_cache.clear()
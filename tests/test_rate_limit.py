@@ -0,0 +1,113 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    RateLimit,
+    RateLimitMiddleware,
+    TokenBucketLimiter,
+    client_ip,
+    principal_of,
+)
+from app.core.security import create_access_token
+from app.db.redis import RedisManager
+
+
+def make_app(limiter: TokenBucketLimiter) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/captcha")
+    async def captcha():
+        return {"ok": True}
+
+    @app.get("/other")
+    async def other():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits={"/captcha": RateLimit(rate=0.5, burst=2)},
+        default=None,
+        limiter=limiter,
+    )
+    return app
+
+
+@pytest.mark.anyio
+async def test_bucket_exhaustion_returns_429():
+    app = make_app(TokenBucketLimiter(sync_interval=3600))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        assert (await c.get("/captcha")).status_code == 200
+        assert (await c.get("/captcha")).status_code == 200
+        response = await c.get("/captcha")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "2"
+        assert response.json()["code"] == "TOO_MANY_REQUESTS"
+
+        # Unlimited routes and other principals are unaffected
+        assert (await c.get("/other")).status_code == 200
+        headers = {"Authorization": f"Bearer {create_access_token(7)}"}
+        assert (await c.get("/captcha", headers=headers)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_bogus_bearer_tokens_share_the_ip_bucket():
+    app = make_app(TokenBucketLimiter(sync_interval=3600))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://t") as c:
+        statuses = [
+            (await c.get("/captcha", headers={"Authorization": f"Bearer fake{i}"})).status_code
+            for i in range(3)
+        ]
+    assert statuses == [200, 200, 429]
+
+
+def test_principal_needs_a_verified_token():
+    scope = {
+        "client": ("10.0.0.9", 1234),
+        "headers": [(b"authorization", f"Bearer {create_access_token(7)}".encode())],
+    }
+    assert principal_of(scope) == "u:7"
+    assert principal_of({"client": ("10.0.0.9", 1234), "headers": []}) == "ip:10.0.0.9"
+
+
+def test_forwarded_for_only_from_trusted_proxy(mocker):
+    headers = [(b"x-forwarded-for", b"1.2.3.4, 203.0.113.5, 10.0.0.2")]
+    scope = {"client": ("10.0.0.1", 80), "headers": headers}
+    assert client_ip(scope) == "10.0.0.1"
+
+    mocker.patch.object(settings, "TRUSTED_PROXIES", ["10.0.0.1", "10.0.0.2"])
+    # The spoofable leftmost entry is ignored
+    assert client_ip(scope) == "203.0.113.5"
+
+
+@pytest.mark.anyio
+async def test_sync_deducts_other_workers_consumption():
+    limiter = TokenBucketLimiter(sync_interval=3600)
+    limit = RateLimit(rate=0.001, burst=10)
+    limiter.acquire("k", limit)
+
+    pipe = await RedisManager.pipeline.return_value.__aenter__()
+    # First sync only records the baseline
+    pipe.execute.return_value = [50, True]
+    await limiter.sync()
+    bucket = limiter._buckets["k"][0]
+    assert bucket.tokens == pytest.approx(9, abs=0.01)
+    pipe.incrby.assert_called_with("ratelimit:k", 1)
+
+    # Other workers took 6 tokens since
+    limiter.acquire("k", limit)
+    pipe.execute.return_value = [57, True]
+    await limiter.sync()
+    assert bucket.tokens == pytest.approx(2, abs=0.01)
+    assert bucket.pending == 0
+
+
+@pytest.mark.anyio
+async def test_failed_sync_keeps_pending():
+    limiter = TokenBucketLimiter(sync_interval=3600)
+    limiter.acquire("k", RateLimit(rate=1, burst=5))
+    RedisManager.pipeline.side_effect = ConnectionError()
+
+    await limiter.sync()
+    assert limiter._buckets["k"][0].pending == 1
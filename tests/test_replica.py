@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from starlette.requests import Request
+
+from app.api import deps
+from app.db.redis import RedisManager
+from app.db.replica import ReplicaRouter
+
+
+def make_request(method="GET", token=b"Bearer t1") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": method,
+            "path": "/",
+            "headers": [(b"authorization", token)],
+            "client": ("1.2.3.4", 1),
+        }
+    )
+
+
+def fake_sessionmaker(name):
+    session = MagicMock(name=name)
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session)
+
+
+def test_round_robin_over_replicas():
+    makers = [fake_sessionmaker("r1"), fake_sessionmaker("r2")]
+    router = ReplicaRouter(makers, window=5)
+    sessions = [router.replica_session() for _ in range(4)]
+    assert sessions[0] is sessions[2] and sessions[1] is sessions[3]
+    assert sessions[0] is not sessions[1]
+
+
+@pytest.mark.anyio
+async def test_recent_writer_reads_primary(mocker):
+    router = ReplicaRouter([fake_sessionmaker("r1")], window=5)
+    mocker.patch.object(deps, "replica_router", router)
+    primary = object()
+
+    gen = deps.get_read_db(make_request(), db=primary)
+    assert await gen.__anext__() is not primary
+
+    await router.mark_write("t:whatever")
+    RedisManager.set.assert_awaited_once()
+
+    # Another worker recorded the write: only Redis knows about it
+    mocker.patch.object(RedisManager, "get", AsyncMock(return_value="1"))
+    gen = deps.get_read_db(make_request(), db=primary)
+    assert await gen.__anext__() is primary
+
+
+@pytest.mark.anyio
+async def test_writes_open_the_window(mocker):
+    router = ReplicaRouter([fake_sessionmaker("r1")], window=5)
+    mocker.patch.object(deps, "replica_router", router)
+    mocker.patch.object(deps, "SessionLocal", fake_sessionmaker("primary"))
+
+    gen = deps.get_db(make_request("POST"))
+    await gen.__anext__()
+    assert await router.wrote_recently(deps.principal_of(make_request().scope))
+
+    RedisManager.set.reset_mock()
+    gen = deps.get_db(make_request("GET", token=b"Bearer other"))
+    await gen.__anext__()
+    RedisManager.set.assert_not_awaited()
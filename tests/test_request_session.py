@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db.request_session import (
+    HoldTimeStats,
+    LazySession,
+    SessionReleaseMiddleware,
+    track_request_session,
+)
+from app.models.sys.user import SysUser
+
+
+def test_hold_time_histogram():
+    stats = HoldTimeStats()
+    stats.record(0)
+    stats.record(0.003)
+    stats.record(7)
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["without_connection"] == 1
+    assert snapshot["max_hold_ms"] == 7000
+    assert snapshot["histogram"]["<=1ms"] == 1
+    assert snapshot["histogram"]["<=5ms"] == 1
+    assert snapshot["histogram"][">5000ms"] == 1
+
+
+@pytest.mark.anyio
+async def test_release_keeps_pending_changes(mocker):
+    session = LazySession()
+    close = mocker.patch.object(session, "close", AsyncMock())
+    mocker.patch.object(session, "in_transaction", return_value=True)
+
+    session.add(SysUser(username="alice"))
+    await session.release()
+    close.assert_not_awaited()
+
+    session.expunge_all()
+    await session.release()
+    close.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_middleware_releases_before_response(mocker):
+    session = MagicMock(hold_seconds=0.02)
+    events = []
+    session.release = AsyncMock(side_effect=lambda: events.append("release"))
+
+    async def app(scope, receive, send):
+        track_request_session(session)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        events.append(message["type"])
+
+    stats = mocker.patch("app.db.request_session.hold_time_stats", HoldTimeStats())
+    await SessionReleaseMiddleware(app)({"type": "http"}, AsyncMock(), send)
+
+    assert events == ["release", "http.response.start", "http.response.body"]
+    assert stats.snapshot()["requests"] == 1
+    assert stats.snapshot()["avg_hold_ms"] == 20
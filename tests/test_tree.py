@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+from app.api.v1.admin.sys.dept import build_dept_tree
+from app.models.sys.dept import SysDept
+from app.utils.tree import build_tree
+
+
+def node(id, parent_id, sort=0, kind="menu"):
+    return SimpleNamespace(id=id, parent_id=parent_id, sort=sort, kind=kind)
+
+
+def project(n):
+    return {"id": n.id}
+
+
+def test_build_tree_keeps_input_order():
+    nodes = [node(2, 0), node(1, 0), node(4, 1), node(3, 1)]
+    tree = build_tree(nodes, 0, project)
+
+    assert [n["id"] for n in tree] == [2, 1]
+    assert "children" not in tree[0]
+    assert [n["id"] for n in tree[1]["children"]] == [4, 3]
+
+
+def test_build_tree_sort_key_and_filter():
+    nodes = [
+        node(1, 0, sort=2),
+        node(2, 0, sort=1),
+        node(3, 2, kind="button"),
+        node(4, 3),
+    ]
+    tree = build_tree(
+        nodes,
+        0,
+        project,
+        include=lambda n: n.kind != "button",
+        sort_key=lambda n: n.sort,
+    )
+
+    assert [n["id"] for n in tree] == [2, 1]
+    # Excluding a node drops its subtree too
+    assert "children" not in tree[0]
+
+
+def test_build_tree_skips_orphans_and_cycles():
+    nodes = [node(1, 0), node(2, 99), node(3, 4), node(4, 3)]
+    tree = build_tree(nodes, 0, project)
+    assert tree == [{"id": 1}]
+
+
+def test_build_dept_tree():
+    depts = [
+        SysDept(id=1, name="Root", code="root", parent_id=0, sort=1, status=1),
+        SysDept(id=2, name="Child", code="child", parent_id=1, sort=1, status=1),
+    ]
+    tree = build_dept_tree(depts, 0)
+
+    assert tree[0].name == "Root"
+    assert tree[0].children[0].name == "Child"
+    assert tree[0].children[0].children is None
@@ -0,0 +1,106 @@
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.api import deps
+from app.core import visit_stats
+from app.core.visit_stats import DailyVisits
+from app.db.redis import RedisManager
+from app.main import app
+from app.models.sys.user import SysUser
+
+admin = SysUser(id=1, username="admin", is_active=True, is_superuser=True)
+
+
+def _pipe():
+    return RedisManager.pipeline.return_value.__aenter__.return_value
+
+
+@pytest.fixture
+def override_deps():
+    db = AsyncMock()
+
+    async def override_get_db():
+        yield db
+
+    async def override_get_current_user():
+        return admin
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_current_user] = override_get_current_user
+    yield db
+    app.dependency_overrides = {}
+
+
+@pytest.mark.anyio
+async def test_record_visits_counts_per_day():
+    day = datetime(2025, 7, 1, 10)
+    await visit_stats.record_visits(
+        [
+            {"create_time": day, "user_id": 5, "ip": "10.0.0.1"},
+            {"create_time": day, "user_id": -1, "ip": "10.0.0.2"},
+            {"create_time": day, "user_id": 5, "ip": "10.0.0.1"},
+        ]
+    )
+    pipe = _pipe()
+    pipe.incrby.assert_called_once_with("visit:pv:2025-07-01", 3)
+    uv_call = pipe.pfadd.call_args_list[0]
+    assert uv_call.args[0] == "visit:uv:2025-07-01"
+    assert set(uv_call.args[1:]) == {"u:5", "ip:10.0.0.2"}
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_live_visits_skips_missing_days():
+    first, second = date(2025, 7, 1), date(2025, 7, 2)
+    _pipe().execute = AsyncMock(return_value=["12", 4, 3, None, 0, 0])
+    visits = await visit_stats.live_visits([first, second])
+    assert visits == {first: DailyVisits(12, 4, 3)}
+
+
+@pytest.mark.anyio
+async def test_visit_trend_fills_missing_days(client, override_deps, mocker):
+    end = date.today()
+    mocker.patch(
+        "app.core.visit_stats.daily_visits",
+        AsyncMock(return_value={end: DailyVisits(10, 3, 2)}),
+    )
+    response = await client.get("/api/v1/admin/sys/log/visit-trend")
+    assert response.status_code == 200
+    data = response.json()["result"]
+    assert len(data["dates"]) == 7
+    assert data["dates"][-1] == end.isoformat()
+    assert data["pvList"] == [0] * 6 + [10]
+    assert data["uvList"][-1] == 3
+
+
+@pytest.mark.anyio
+async def test_visit_trend_rejects_long_range(client, override_deps):
+    start = date.today() - timedelta(days=1000)
+    response = await client.get(
+        f"/api/v1/admin/sys/log/visit-trend?start_date={start.isoformat()}"
+    )
+    assert response.json()["code"] == "INVALID_ARGUMENT"
+
+
+@pytest.mark.anyio
+async def test_visit_stats_growth(client, override_deps, mocker):
+    today = date.today()
+    mocker.patch(
+        "app.core.visit_stats.daily_visits",
+        AsyncMock(
+            return_value={
+                today: DailyVisits(150, 30, 20),
+                today - timedelta(days=1): DailyVisits(100, 20, 10),
+            }
+        ),
+    )
+    override_deps.scalar.return_value = 1000
+    RedisManager.pfcount.return_value = 400
+    response = await client.get("/api/v1/admin/sys/log/visit-stats")
+    data = response.json()["result"]
+    assert data["todayPvCount"] == 150
+    assert data["totalPvCount"] == 1150
+    assert data["pvGrowthRate"] == 0.5
+    assert data["totalUvCount"] == 400
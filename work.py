@@ -2,7 +2,15 @@ import os
 import shutil
 import sys
 import asyncio
-from worker.database_worker import create_initial_data, reset_database
+from worker.database_worker import (
+    create_initial_data,
+    rebuild_hierarchy_index,
+    rebuild_notice_targets,
+    rebuild_notice_unread_counters,
+    reset_database,
+    rollup_visit_stats,
+)
+from worker.log_retention import run_log_retention
 
 
 def main():
@@ -18,6 +26,11 @@ def main():
             5、create initial data
             6、create 3d asset data
             7、download metadata files
+            8、rebuild dept/menu hierarchy index
+            9、rebuild notice targets
+            10、rebuild unread notice counters
+            11、roll up visit stats
+            12、archive and purge expired request logs
         """
         )
         selection = input("")
@@ -35,6 +48,21 @@ def main():
         elif selection == 2:
             asyncio.run(reset_database())
 
+        elif selection == 8:
+            asyncio.run(rebuild_hierarchy_index())
+
+        elif selection == 9:
+            asyncio.run(rebuild_notice_targets())
+
+        elif selection == 10:
+            asyncio.run(rebuild_notice_unread_counters())
+
+        elif selection == 11:
+            asyncio.run(rollup_visit_stats())
+
+        elif selection == 12:
+            asyncio.run(run_log_retention())
+
         else:
             print(f"未知的选项{selection}")
 
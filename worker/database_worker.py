@@ -11,12 +11,14 @@ from app.core.security import get_password_hash
 from app.models.sys.dept import SysDept
 from app.models.sys.dictionary import SysDict, SysDictItem
 from app.models.sys.menu import SysMenu, SysRoleMenu
+from app.models.sys.notice import SysNotice
 from app.models.sys.role import SysRole
 from app.models.sys.user import SysUserRoleRef, SysUser
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy import text
+from sqlalchemy import select, text
 from app.globals.enum import RoleDataScope, MenuType
 from app.db.base import Base
+from app.db.hierarchy import dept_hierarchy, menu_hierarchy
 
 
 async def create_initial_data():
@@ -25,6 +27,49 @@ async def create_initial_data():
         await db.commit()
 
 
+async def rebuild_hierarchy_index():
+    """根据 parent_id 重建部门/菜单层级闭包表"""
+    async with SessionLocal() as db:
+        dept_rows = await dept_hierarchy.rebuild(db)
+        menu_rows = await menu_hierarchy.rebuild(db)
+        await db.commit()
+    print(f"Hierarchy index rebuilt: {dept_rows} dept rows, {menu_rows} menu rows")
+
+
+async def rebuild_notice_targets():
+    """根据 target_user_ids_str 回填 sys_notice_target"""
+    from app.api.v1.admin.sys.notice import sync_notice_targets
+
+    async with SessionLocal() as db:
+        result = await db.execute(select(SysNotice).where(SysNotice.target_type != 0))
+        notices = result.scalars().all()
+        for notice in notices:
+            await sync_notice_targets(db, notice)
+        await db.commit()
+    print(f"Notice targets rebuilt for {len(notices)} notices")
+
+
+async def rebuild_notice_unread_counters():
+    """根据 sys_user_notice 重建 Redis 中的用户未读通知计数"""
+    from app.api.v1.admin.sys.notice import count_all_unread
+    from app.core import notice_counter
+
+    async with SessionLocal() as db:
+        counts = await count_all_unread(db)
+    await notice_counter.set_unread_many(counts)
+    print(f"Unread notice counters rebuilt for {len(counts)} users")
+
+
+async def rollup_visit_stats():
+    """把 Redis 中已结束日期的访问计数汇总到 sys_visit_daily (可重复执行)"""
+    from app.core import visit_stats
+
+    async with SessionLocal() as db:
+        days = await visit_stats.rollup(db, visit_stats.rollup_days())
+        await db.commit()
+    print(f"Visit stats rolled up for {days} days")
+
+
 async def check_database_exists(db_name: str) -> bool:
     """检查数据库是否存在"""
     db_url_without_db = settings.SQLALCHEMY_DATABASE_URI.rsplit('/', 1)[0]
@@ -93,6 +138,7 @@ async def reset_database():
     # 初始化数据
     print("Creating initial data...")
     await create_initial_data()
+    await rebuild_hierarchy_index()
     
     print("Database reset completed successfully!")
 
@@ -0,0 +1,165 @@
+import asyncio
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+# Add the parent directory to sys.path to allow imports from app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Table, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db import log_tables
+from app.db.session import engine
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class _Progress:
+    """按块打印归档进度和吞吐"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def add(self, rows: int) -> None:
+        self.rows += rows
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0.0
+        print(f"  {self.name}: {self.rows} rows, {rate:.0f} rows/s")
+
+
+async def archive_rows(
+    conn: AsyncConnection,
+    table: Table,
+    cutoff: datetime,
+    path: str,
+    chunk_size: int,
+) -> Tuple[int, Optional[int]]:
+    """
+    用服务端游标分块读取 create_time < cutoff 的日志, 写入 gzip 压缩的 JSONL 文件
+
+    先写入 .part 临时文件, 全部写完后再改名, 中途失败不会留下看似完整的归档
+    :return: (归档行数, 归档的最大id)
+    """
+    stmt = (
+        select(table)
+        .where(table.c.create_time < cutoff)
+        .order_by(table.c.create_time)
+        .execution_options(yield_per=chunk_size)
+    )
+    progress = _Progress(f"archive {table.name}")
+    max_id = None
+    part = path + ".part"
+    result = await conn.stream(stmt)
+    try:
+        with gzip.open(part, "wt", encoding="utf-8") as f:
+            async for chunk in result.partitions(chunk_size):
+                for row in chunk:
+                    f.write(json.dumps(dict(row._mapping), default=_json_default, ensure_ascii=False))
+                    f.write("\n")
+                chunk_max = max(row.id for row in chunk)
+                max_id = chunk_max if max_id is None else max(max_id, chunk_max)
+                progress.add(len(chunk))
+    except BaseException:
+        await result.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+    if progress.rows:
+        os.replace(part, path)
+    else:
+        os.remove(part)
+    return progress.rows, max_id
+
+
+async def delete_archived(
+    table: Table, cutoff: datetime, max_id: int, batch_size: int, pause: float
+) -> int:
+    """
+    分批删除已归档的日志, 每批单独提交, 避免一次大 DELETE 长时间锁表
+    """
+    progress = _Progress(f"delete {table.name}")
+    stmt = (
+        delete(table)
+        .where(table.c.create_time < cutoff, table.c.id <= max_id)
+        .with_dialect_options(mysql_limit=batch_size)
+    )
+    while True:
+        async with engine.begin() as conn:
+            deleted = (await conn.execute(stmt)).rowcount
+        progress.add(deleted)
+        if deleted < batch_size:
+            return progress.rows
+        # Let replicas and concurrent writers catch up between batches
+        await asyncio.sleep(pause)
+
+
+async def run_log_retention(retention_days: int = None) -> Dict[str, int]:
+    """
+    归档并清理超过保留期的请求日志
+
+    整月都已过期的月表归档后直接 DROP; 跨越保留期边界的月表只归档过期的行,
+    再分批删除
+    """
+    retention_days = retention_days or settings.LOG_RETENTION_DAYS
+    cutoff = datetime.combine(date.today() - timedelta(days=retention_days), datetime.min.time())
+    os.makedirs(settings.LOG_ARCHIVE_DIR, exist_ok=True)
+    run_at = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    async with engine.connect() as conn:
+        months = await log_tables.existing_log_months(conn)
+    expired = [month for month in months if log_tables.month_start(month) < cutoff]
+
+    summary = {"tables": 0, "archived": 0, "deleted": 0, "dropped": 0}
+    for month in sorted(expired):
+        table = log_tables.log_table(month)
+        path = os.path.join(settings.LOG_ARCHIVE_DIR, f"{table.name}.{run_at}.jsonl.gz")
+        async with engine.connect() as conn:
+            archived, max_id = await archive_rows(
+                conn, table, cutoff, path, settings.LOG_ARCHIVE_CHUNK_SIZE
+            )
+        summary["tables"] += 1
+        summary["archived"] += archived
+
+        if log_tables.month_end(month) <= cutoff:
+            # Nothing in the table is kept and nothing new is written to a
+            # past month, so dropping it replaces deleting every row
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP TABLE {table.name}"))
+            log_tables.forget_log_table(month)
+            summary["dropped"] += 1
+        elif max_id is not None:
+            summary["deleted"] += await delete_archived(
+                table,
+                cutoff,
+                max_id,
+                settings.LOG_DELETE_BATCH_SIZE,
+                settings.LOG_DELETE_PAUSE_MS / 1000,
+            )
+        print(f"{table.name}: {archived} rows archived" + (f" to {path}" if archived else ""))
+
+    print(
+        f"Log retention done: {summary['archived']} rows archived from "
+        f"{summary['tables']} tables, {summary['deleted']} rows deleted, "
+        f"{summary['dropped']} tables dropped"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    asyncio.run(run_log_retention())